@@ -22,3 +22,26 @@ def full_analysis():
     except Exception as e:
         logger.exception("full_analysis failed for portfolio %s", pid)
         return jsonify({"error": str(e)}), 200
+
+
+def _get_what_if_holdings(body: dict) -> list[tuple[int, float]]:
+    try:
+        return [(int(h["stock_id"]), float(h["weight"])) for h in body.get("holdings") or []]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("holdings must be a list of {stock_id, weight}")
+
+
+@portfolio_bp.route("/what-if", methods=["POST"])
+def what_if():
+    body = request.get_json(silent=True) or {}
+    market_group = body.get("market_group")
+    if not market_group:
+        return jsonify({"error": "market_group required"}), 400
+    try:
+        holdings = _get_what_if_holdings(body)
+        return jsonify(PortfolioAnalysisService.what_if(holdings, market_group))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.exception("what_if failed for %s", market_group)
+        return jsonify({"error": str(e)}), 200
@@ -20,6 +20,9 @@ def portfolio_simulation(portfolio_id: int):
             "confidence": float(request.args.get("confidence", DEFAULT_CONFIDENCE)),
             "lookback": int(request.args.get("lookback", DEFAULT_LOOKBACK)),
             "method": request.args.get("method", "bootstrap"),
+            "seed": int(request.args["seed"]) if request.args.get("seed") else None,
+            "sampler": request.args.get("sampler", "pseudo"),
+            "control_variate": request.args.get("control_variate", "false").lower() in ("1", "true"),
         }
         result = PortfolioSimulationService.run(portfolio_id=portfolio_id, **params)
         return jsonify(result)
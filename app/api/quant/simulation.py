@@ -38,4 +38,5 @@ def _parse_params(args) -> dict:
         "confidence": float(args.get("confidence", DEFAULT_CONFIDENCE)),
         "lookback": int(args.get("lookback", DEFAULT_LOOKBACK)),
         "method": args.get("method", "gbm"),
+        "seed": int(args["seed"]) if args.get("seed") else None,
     }
\ No newline at end of file
@@ -7,6 +7,7 @@ from .repositories import (
     FinancialStatementRepository,
     FundamentalRepository,
     IndicatorRepository,
+    IndicatorStateRepository,
     PortfolioRepository,
     RiskBadgeRepository,
     RiskFreeRateRepository,
@@ -23,6 +24,7 @@ __all__ = [
     "FinancialStatementRepository",
     "FundamentalRepository",
     "IndicatorRepository",
+    "IndicatorStateRepository",
     "PortfolioRepository",
     "RiskBadgeRepository",
     "RiskFreeRateRepository",
@@ -0,0 +1,71 @@
+"""
+Bulk writes through COPY into a temporary staging table.
+
+The UNNEST path sends each column as one array literal rendered by psycopg2,
+so a few hundred thousand rows become a query string of hundreds of MB.
+Here the rows are streamed as CSV into a staging table that is dropped at
+commit, then moved into the target by a single INSERT ... SELECT carrying
+the target's usual ON CONFLICT clause.
+"""
+
+import csv
+import io
+import os
+
+from psycopg2.extensions import connection, cursor
+
+# "copy" (staging table) or "unnest" (single array-parameter statement)
+WRITE_MODE = os.getenv("DB_WRITE_MODE", "copy")
+WRITE_MODES = ("copy", "unnest")
+
+_NULL = r"\N"
+
+
+def check_write_mode(mode: str) -> str:
+    if mode not in WRITE_MODES:
+        raise ValueError(f"Unknown write mode {mode!r}; expected one of {WRITE_MODES}")
+    return mode
+
+
+def create_stage(cur: cursor, table: str, col_types: list[tuple[str, str]]) -> str:
+    """Empty temp table shaped like `col_types`, dropped at commit; returns its name."""
+    stage = f"_stage_{table}"
+    # ON COMMIT DROP: the transaction pooler may hand this server session to another client
+    cur.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {stage} "
+        f"({', '.join(f'{c} {t}' for c, t in col_types)}) ON COMMIT DROP"
+    )
+    cur.execute(f"TRUNCATE {stage}")
+    return stage
+
+
+def copy_rows(cur: cursor, table: str, columns: list[str], rows: list[tuple]) -> None:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(
+        tuple(_NULL if v is None else v for v in row) for row in rows
+    )
+    buf.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')", buf,
+    )
+
+
+def copy_insert(
+    conn: connection,
+    table: str,
+    col_types: list[tuple[str, str]],
+    rows: list[tuple],
+    on_conflict: str = "",
+) -> int:
+    """COPY `rows` into a staging copy of `table`, then INSERT ... SELECT them with `on_conflict`."""
+    if not rows:
+        return 0
+    columns = [c for c, _ in col_types]
+    with conn.cursor() as cur:
+        stage = create_stage(cur, table, col_types)
+        copy_rows(cur, stage, columns, rows)
+        cur.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(columns)} FROM {stage} {on_conflict}"
+        )
+        return cur.rowcount
@@ -6,6 +6,7 @@ from .factor import FactorRepository
 from .financial_statement import FinancialStatementRepository
 from .fundamental import FundamentalRepository
 from .indicator import IndicatorRepository
+from .indicator_state import IndicatorStateRepository
 from .portfolio import PortfolioRepository
 from .risk_badge import RiskBadgeRepository
 from .risk_free_rate import RiskFreeRateRepository
@@ -20,6 +21,7 @@ __all__ = [
     "FinancialStatementRepository",
     "FundamentalRepository",
     "IndicatorRepository",
+    "IndicatorStateRepository",
     "PortfolioRepository",
     "RiskBadgeRepository",
     "RiskFreeRateRepository",
@@ -1,6 +1,10 @@
+import io
 from datetime import date
+
+import numpy as np
 from psycopg2.extensions import connection
-from app.schema import DailyPrice, Market
+from app.db.bulk import WRITE_MODE, check_write_mode, copy_insert
+from app.schema import DailyPrice, Market, PriceStore
 
 _COL_TYPES = [
     ("stock_id", "bigint"), ("date", "date"),
@@ -15,10 +19,79 @@ _UPSERT_CONFLICT = (
     "low = EXCLUDED.low, close = EXCLUDED.close, volume = EXCLUDED.volume"
 )
 
+# numeric prices are cast to float8 so every column has a fixed binary width
+_PRICES_BY_MARKET = """
+    SELECT stock_id, date, open::float8, high::float8, low::float8, close::float8, volume
+    FROM (
+        SELECT dp.stock_id, dp.date, dp.open, dp.high, dp.low,
+               dp.close, dp.volume,
+               ROW_NUMBER() OVER (
+                   PARTITION BY dp.stock_id ORDER BY dp.date DESC
+               ) AS rn
+        FROM daily_prices dp
+        JOIN stocks s ON dp.stock_id = s.id
+        WHERE s.market = %s AND s.is_active = true
+    ) ranked
+    WHERE rn <= %s
+    ORDER BY stock_id, date
+"""
+_PRICES_BY_STOCKS = """
+    SELECT stock_id, date, open::float8, high::float8, low::float8, close::float8, volume
+    FROM (
+        SELECT stock_id, date, open, high, low, close, volume,
+               ROW_NUMBER() OVER (
+                   PARTITION BY stock_id ORDER BY date DESC
+               ) AS rn
+        FROM daily_prices
+        WHERE stock_id = ANY(%s)
+    ) ranked
+    WHERE rn <= %s
+    ORDER BY stock_id, date
+"""
+
+# ── binary COPY layout ──
+# PGCOPY header: 11-byte signature, int32 flags, int32 extension length.
+# Each row: int16 field count, then (int32 length, value) per column, all big-endian.
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_COPY_FIELDS = [
+    ("stock_id", ">i8"), ("date", ">i4"),
+    ("open", ">f8"), ("high", ">f8"), ("low", ">f8"), ("close", ">f8"),
+    ("volume", ">i8"),
+]
+_COPY_ROW = np.dtype([("n_fields", ">i2")] + [
+    field
+    for name, dt in _COPY_FIELDS
+    for field in ((f"{name}_len", ">i4"), (name, dt))
+])
+_PG_EPOCH = date(2000, 1, 1).toordinal()
+
+
+def _parse_copy_binary(buf: memoryview) -> PriceStore:
+    if bytes(buf[:11]) != _COPY_SIGNATURE:
+        raise ValueError("Not a binary COPY stream")
+    start = 19 + int.from_bytes(buf[15:19], "big")
+    body = len(buf) - start - 2  # int16 -1 trailer
+    if body % _COPY_ROW.itemsize:
+        raise ValueError("Binary COPY stream does not match the price row layout")
+
+    rec = np.frombuffer(buf, dtype=_COPY_ROW, count=body // _COPY_ROW.itemsize, offset=start)
+    if (rec["n_fields"] != len(_COPY_FIELDS)).any():
+        raise ValueError("Binary COPY stream does not match the price row layout")
+    return PriceStore.from_columns(
+        rec["stock_id"], rec["date"] + _PG_EPOCH,
+        rec["open"], rec["high"], rec["low"], rec["close"], rec["volume"],
+    )
+
 
 class DailyPriceRepository:
-    def __init__(self, conn: connection):
+    def __init__(self, conn: connection, write_mode: str = WRITE_MODE):
         self._conn = conn
+        self._write_mode = check_write_mode(write_mode)
+
+    def _upsert(self, rows: list[tuple]) -> int:
+        if self._write_mode == "copy":
+            return copy_insert(self._conn, "daily_prices", _COL_TYPES, rows, _UPSERT_CONFLICT)
+        return self._unnest_upsert([list(c) for c in zip(*rows)])
 
     def _unnest_upsert(self, cols: list[list]) -> int:
         with self._conn.cursor() as cur:
@@ -33,22 +106,14 @@ class DailyPriceRepository:
     def upsert_batch(self, stock_id: int, prices: list[DailyPrice]) -> int:
         if not prices:
             return 0
-        cols = [
-            [stock_id] * len(prices),
-            [p.date for p in prices],
-            [p.open for p in prices],
-            [p.high for p in prices],
-            [p.low for p in prices],
-            [p.close for p in prices],
-            [p.volume for p in prices],
-        ]
-        return self._unnest_upsert(cols)
+        return self._upsert([
+            (stock_id, p.date, p.open, p.high, p.low, p.close, p.volume) for p in prices
+        ])
 
     def bulk_upsert(self, rows: list[tuple]) -> int:
         if not rows:
             return 0
-        cols = [list(c) for c in zip(*rows)]
-        return self._unnest_upsert(cols)
+        return self._upsert(rows)
 
     def get_latest_date(self, stock_id: int) -> date | None:
         query = "SELECT MAX(date) FROM daily_prices WHERE stock_id = %s"
@@ -57,6 +122,18 @@ class DailyPriceRepository:
             result = cur.fetchone()
             return result[0] if result and result[0] else None
 
+    def get_latest_dates(self, stock_ids: list[int]) -> dict[int, date]:
+        if not stock_ids:
+            return {}
+        query = """
+            SELECT stock_id, MAX(date) FROM daily_prices
+            WHERE stock_id = ANY(%s)
+            GROUP BY stock_id
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (list(stock_ids),))
+            return dict(cur.fetchall())
+
     def get_latest_date_by_market(self, market: Market) -> date | None:
         query = """
             SELECT MAX(dp.date) FROM daily_prices dp
@@ -68,6 +145,28 @@ class DailyPriceRepository:
             result = cur.fetchone()
             return result[0] if result and result[0] else None
 
+    def get_latest_day_summary_by_market(self, market: Market) -> tuple[date | None, int]:
+        """
+        (latest date, bars on that date) over every stock of the market, active
+        or not. Walks daily_prices_date_idx from the newest date instead of
+        counting the whole history.
+        """
+        query = """
+            SELECT dp.date, COUNT(*) FROM daily_prices dp
+            JOIN stocks s ON dp.stock_id = s.id
+            WHERE s.market = %s AND dp.date = (
+                SELECT dp2.date FROM daily_prices dp2
+                JOIN stocks s2 ON dp2.stock_id = s2.id
+                WHERE s2.market = %s
+                ORDER BY dp2.date DESC LIMIT 1
+            )
+            GROUP BY dp.date
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value, market.value))
+            row = cur.fetchone()
+            return (row[0], row[1]) if row else (None, 0)
+
     def get_prices(
         self,
         stock_id: int,
@@ -110,31 +209,23 @@ class DailyPriceRepository:
 
     def get_prices_by_market(
         self, market: Market, limit_per_stock: int = 300
-    ) -> dict[int, list[tuple]]:
-        query = """
-            SELECT stock_id, date, open, high, low, close, volume
-            FROM (
-                SELECT dp.stock_id, dp.date, dp.open, dp.high, dp.low,
-                       dp.close, dp.volume,
-                       ROW_NUMBER() OVER (
-                           PARTITION BY dp.stock_id ORDER BY dp.date DESC
-                       ) AS rn
-                FROM daily_prices dp
-                JOIN stocks s ON dp.stock_id = s.id
-                WHERE s.market = %s AND s.is_active = true
-            ) ranked
-            WHERE rn <= %s
-            ORDER BY stock_id, date
-        """
+    ) -> PriceStore:
+        return self._copy_prices(_PRICES_BY_MARKET, (market.value, limit_per_stock))
+
+    def get_prices_by_stocks(
+        self, stock_ids: list[int], limit_per_stock: int = 300
+    ) -> PriceStore:
+        if not stock_ids:
+            return PriceStore.empty()
+        return self._copy_prices(_PRICES_BY_STOCKS, (stock_ids, limit_per_stock))
+
+    def _copy_prices(self, query: str, params: tuple) -> PriceStore:
+        """Run a price query through binary COPY and decode it straight into columns."""
         with self._conn.cursor() as cur:
-            cur.execute(query, (market.value, limit_per_stock))
-            result: dict[int, list[tuple]] = {}
-            for row in cur.fetchall():
-                stock_id = row[0]
-                if stock_id not in result:
-                    result[stock_id] = []
-                result[stock_id].append(row[1:])
-            return result
+            sql = cur.mogrify(query, params).decode()
+            with io.BytesIO() as raw:
+                cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT binary)", raw)
+                return _parse_copy_binary(raw.getbuffer())
 
     def get_close_prices_batch(
         self, stock_ids: list[int], limit: int = 252
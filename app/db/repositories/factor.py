@@ -1,18 +1,27 @@
-import json
-from datetime import date
+from datetime import date, datetime
 
+import numpy as np
 from psycopg2.extensions import connection
 from psycopg2.extras import RealDictCursor
 
-from app.schema import Market
+from app.db.bulk import WRITE_MODE, check_write_mode, copy_insert
+from app.schema import CovarianceState, FactorCovariance, FactorExposures, Market, RiskSnapshot
 
 _EXPOSURE_COL_TYPES = [
     ("stock_id", "bigint"), ("date", "date"),
     ("size_z", "numeric"), ("value_z", "numeric"), ("momentum_z", "numeric"),
     ("volatility_z", "numeric"), ("quality_z", "numeric"), ("leverage_z", "numeric"),
+    ("specific_return", "numeric"),
 ]
 _EXPOSURE_COLS = [c for c, _ in _EXPOSURE_COL_TYPES]
 _EXPOSURE_UNNEST = ", ".join(f"%s::{t}[]" for _, t in _EXPOSURE_COL_TYPES)
+_EXPOSURE_CONFLICT = (
+    "ON CONFLICT (stock_id, date) DO UPDATE SET "
+    "size_z = EXCLUDED.size_z, value_z = EXCLUDED.value_z, "
+    "momentum_z = EXCLUDED.momentum_z, volatility_z = EXCLUDED.volatility_z, "
+    "quality_z = EXCLUDED.quality_z, leverage_z = EXCLUDED.leverage_z, "
+    "specific_return = EXCLUDED.specific_return"
+)
 
 _RETURN_COL_TYPES = [
     ("market", "market_type"), ("date", "date"),
@@ -30,46 +39,73 @@ _SECTOR_AGG_COL_TYPES = [
 _SECTOR_AGG_COLS = [c for c, _ in _SECTOR_AGG_COL_TYPES]
 _SECTOR_AGG_UNNEST = ", ".join(f"%s::{t}[]" for _, t in _SECTOR_AGG_COL_TYPES)
 
+_SPECIFIC_COL_TYPES = [
+    ("stock_id", "bigint"), ("date", "date"), ("n_obs", "int"),
+    ("ewm_weight", "float8"), ("ewm_mean", "float8"), ("ewm_var", "float8"),
+]
+_SPECIFIC_COLS = [c for c, _ in _SPECIFIC_COL_TYPES]
+_SPECIFIC_UNNEST = ", ".join(f"%s::{t}[]" for _, t in _SPECIFIC_COL_TYPES)
+_SPECIFIC_CONFLICT = (
+    "ON CONFLICT (stock_id) DO UPDATE SET "
+    "date = EXCLUDED.date, n_obs = EXCLUDED.n_obs, ewm_weight = EXCLUDED.ewm_weight, "
+    "ewm_mean = EXCLUDED.ewm_mean, ewm_var = EXCLUDED.ewm_var"
+)
+
 
 class FactorRepository:
-    def __init__(self, conn: connection):
+    def __init__(self, conn: connection, write_mode: str = WRITE_MODE):
         self._conn = conn
+        self._write_mode = check_write_mode(write_mode)
 
     # ── factor_exposures ──
 
     def upsert_exposures(self, rows: list[tuple]) -> int:
-        """rows: [(stock_id, date, size_z, value_z, momentum_z, volatility_z, quality_z, leverage_z)]"""
+        """rows: [(stock_id, date, size_z, value_z, momentum_z, volatility_z, quality_z, leverage_z, specific_return)]"""
         if not rows:
             return 0
+        if self._write_mode == "copy":
+            return copy_insert(
+                self._conn, "factor_exposures", _EXPOSURE_COL_TYPES, rows, _EXPOSURE_CONFLICT,
+            )
         cols = [list(c) for c in zip(*rows)]
         with self._conn.cursor() as cur:
             cur.execute(
                 f"INSERT INTO factor_exposures ({', '.join(_EXPOSURE_COLS)}) "
                 f"SELECT * FROM UNNEST({_EXPOSURE_UNNEST}) "
-                "ON CONFLICT (stock_id, date) DO UPDATE SET "
-                "size_z = EXCLUDED.size_z, value_z = EXCLUDED.value_z, "
-                "momentum_z = EXCLUDED.momentum_z, volatility_z = EXCLUDED.volatility_z, "
-                "quality_z = EXCLUDED.quality_z, leverage_z = EXCLUDED.leverage_z",
+                f"{_EXPOSURE_CONFLICT}",
                 cols,
             )
             return cur.rowcount
 
-    def get_latest_exposures(self, market: Market) -> list[tuple]:
-        """Returns [(stock_id, size_z, value_z, momentum_z, volatility_z, quality_z, leverage_z)]"""
+    def get_latest_exposure_matrix(self, market: Market) -> FactorExposures | None:
+        """Latest exposures of the market's active stocks, with their sectors."""
         query = """
-            SELECT fe.stock_id, fe.size_z, fe.value_z, fe.momentum_z,
+            SELECT fe.date, fe.stock_id, s.sector, fe.size_z, fe.value_z, fe.momentum_z,
                    fe.volatility_z, fe.quality_z, fe.leverage_z
             FROM factor_exposures fe
             JOIN stocks s ON s.id = fe.stock_id
-            WHERE fe.date = (
-                SELECT MAX(date) FROM factor_exposures fe2
-                JOIN stocks s2 ON s2.id = fe2.stock_id
-                WHERE s2.market = %s
-            )
-            AND s.market = %s AND s.is_active = true
+            WHERE s.market = %s AND s.is_active = true
+              AND fe.date = (SELECT MAX(date) FROM factor_exposures fe2
+                             JOIN stocks s2 ON s2.id = fe2.stock_id WHERE s2.market = %s)
         """
         with self._conn.cursor() as cur:
             cur.execute(query, (market.value, market.value))
+            rows = cur.fetchall()
+        if not rows:
+            return None
+        return FactorExposures.from_rows(rows[0][0], [r[1:] for r in rows])
+
+    def get_specific_return_history(self, market: Market) -> list[tuple]:
+        """Returns [(date, stock_id, specific_return)] of the market's stocks, ordered by date ASC."""
+        query = """
+            SELECT fe.date, fe.stock_id, fe.specific_return
+            FROM factor_exposures fe
+            JOIN stocks s ON s.id = fe.stock_id
+            WHERE s.market = %s AND fe.specific_return IS NOT NULL
+            ORDER BY fe.date ASC
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
             return cur.fetchall()
 
     # ── factor_returns ──
@@ -107,6 +143,26 @@ class FactorRepository:
             cur.execute(query, (market.value, limit, market.value))
             return cur.fetchall()
 
+    def get_factor_return_dates(self, market: Market, limit: int) -> list[date]:
+        """The latest `limit` factor-return dates, newest first."""
+        query = """
+            SELECT DISTINCT date FROM factor_returns
+            WHERE market = %s ORDER BY date DESC LIMIT %s
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value, limit))
+            return [r[0] for r in cur.fetchall()]
+
+    def get_factor_returns_on(self, market: Market, dates: list[date]) -> list[tuple]:
+        """Returns [(date, factor_name, return_value)] for the given dates."""
+        query = """
+            SELECT date, factor_name, return_value FROM factor_returns
+            WHERE market = %s AND date = ANY(%s)
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value, dates))
+            return cur.fetchall()
+
     def count_factor_return_dates(self, market: Market) -> int:
         query = """
             SELECT COUNT(DISTINCT date) FROM factor_returns WHERE market = %s
@@ -115,22 +171,104 @@ class FactorRepository:
             cur.execute(query, (market.value,))
             return cur.fetchone()[0]
 
+    def get_first_factor_return_date(self, market: Market) -> date | None:
+        query = "SELECT MIN(date) FROM factor_returns WHERE market = %s"
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            return cur.fetchone()[0]
+
+    # ── specific_risk ──
+
+    def get_specific_risk_state(self, stock_ids: list[int]) -> list[tuple]:
+        """Returns [(stock_id, date, n_obs, ewm_weight, ewm_mean, ewm_var)]"""
+        query = f"SELECT {', '.join(_SPECIFIC_COLS)} FROM specific_risk WHERE stock_id = ANY(%s)"
+        with self._conn.cursor() as cur:
+            cur.execute(query, (stock_ids,))
+            return cur.fetchall()
+
+    def upsert_specific_risk(self, rows: list[tuple]) -> int:
+        """rows: [(stock_id, date, n_obs, ewm_weight, ewm_mean, ewm_var)]"""
+        if not rows:
+            return 0
+        if self._write_mode == "copy":
+            return copy_insert(self._conn, "specific_risk", _SPECIFIC_COL_TYPES, rows, _SPECIFIC_CONFLICT)
+        cols = [list(c) for c in zip(*rows)]
+        with self._conn.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO specific_risk ({', '.join(_SPECIFIC_COLS)}) "
+                f"SELECT * FROM UNNEST({_SPECIFIC_UNNEST}) "
+                f"{_SPECIFIC_CONFLICT}",
+                cols,
+            )
+            return cur.rowcount
+
+    def get_specific_variances_by_market(self, market: Market, min_obs: int) -> dict[int, float]:
+        """{stock_id: daily specific variance} of active stocks with at least min_obs observations."""
+        query = """
+            SELECT sr.stock_id, sr.ewm_var
+            FROM specific_risk sr
+            JOIN stocks s ON s.id = sr.stock_id
+            WHERE s.market = %s AND s.is_active = true AND sr.n_obs >= %s
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value, min_obs))
+            return {row[0]: row[1] for row in cur.fetchall()}
+
     # ── factor_covariance ──
 
     def upsert_covariance(
-        self, market: Market, dt: date, matrix: list[list[float]]
+        self, market: Market, cov: FactorCovariance, state: CovarianceState | None = None,
     ) -> None:
+        """Publish `cov`; `state` is the decayed window it was computed from, kept for the next update."""
         query = """
-            INSERT INTO factor_covariance (market, date, matrix)
-            VALUES (%s, %s, %s)
-            ON CONFLICT (market, date) DO UPDATE SET matrix = EXCLUDED.matrix
+            INSERT INTO factor_covariance (
+                market, date, factor_names, matrix,
+                window_start, window_end, window_dates, ewm_sum, ewm_outer, rebuilt_on
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (market, date) DO UPDATE SET
+                factor_names = EXCLUDED.factor_names, matrix = EXCLUDED.matrix,
+                window_start = EXCLUDED.window_start, window_end = EXCLUDED.window_end,
+                window_dates = EXCLUDED.window_dates, ewm_sum = EXCLUDED.ewm_sum,
+                ewm_outer = EXCLUDED.ewm_outer, rebuilt_on = EXCLUDED.rebuilt_on,
+                updated_at = now()
         """
+        if state is None:
+            state_values = (None,) * 6
+        else:
+            state_values = (
+                state.window_start, state.window_end, state.window_dates,
+                np.ascontiguousarray(state.weighted_sum, dtype="<f8").tobytes(),
+                np.ascontiguousarray(state.weighted_outer, dtype="<f8").tobytes(),
+                state.rebuilt_on,
+            )
         with self._conn.cursor() as cur:
-            cur.execute(query, (market.value, dt, json.dumps(matrix)))
+            cur.execute(query, (market.value, cov.date, cov.factor_names, cov.to_bytes(), *state_values))
+
+    def get_covariance_state(self, market: Market) -> CovarianceState | None:
+        query = """
+            SELECT factor_names, window_start, window_end, window_dates,
+                   ewm_sum, ewm_outer, rebuilt_on
+            FROM factor_covariance
+            WHERE market = %s ORDER BY date DESC LIMIT 1
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            row = cur.fetchone()
+        if row is None or row[4] is None:
+            return None
+        names, start, end, n_dates, total, outer, rebuilt_on = row
+        k = len(names)
+        return CovarianceState(
+            factor_names=list(names), window_start=start, window_end=end, window_dates=n_dates,
+            weighted_sum=np.frombuffer(bytes(total), dtype="<f8").copy(),
+            weighted_outer=np.frombuffer(bytes(outer), dtype="<f8").reshape(k, k).copy(),
+            rebuilt_on=rebuilt_on,
+        )
 
-    def get_latest_covariance(self, market: Market) -> tuple[date, list] | None:
+    def get_latest_covariance(self, market: Market) -> FactorCovariance | None:
         query = """
-            SELECT date, matrix FROM factor_covariance
+            SELECT date, factor_names, matrix FROM factor_covariance
             WHERE market = %s ORDER BY date DESC LIMIT 1
         """
         with self._conn.cursor() as cur:
@@ -138,7 +276,77 @@ class FactorRepository:
             row = cur.fetchone()
             if row is None:
                 return None
-            return row[0], row[1]
+            return FactorCovariance.from_bytes(*row)
+
+    def get_latest_covariance_version(self, market: Market) -> tuple[date, datetime] | None:
+        """(date, updated_at) of the latest covariance; changes on every republish, same date or not."""
+        query = """
+            SELECT date, updated_at FROM factor_covariance
+            WHERE market = %s ORDER BY date DESC LIMIT 1
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            return cur.fetchone()
+
+    # ── factor_risk_snapshot ──
+
+    def upsert_risk_snapshot(self, market: Market, snapshot: RiskSnapshot) -> None:
+        exp = snapshot.exposures
+        query = """
+            INSERT INTO factor_risk_snapshot (
+                market, date, covariance_date, factor_names, covariance,
+                stock_ids, styles, sector_codes, sector_names, specific_var
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (market) DO UPDATE SET
+                date = EXCLUDED.date, covariance_date = EXCLUDED.covariance_date,
+                factor_names = EXCLUDED.factor_names, covariance = EXCLUDED.covariance,
+                stock_ids = EXCLUDED.stock_ids, styles = EXCLUDED.styles,
+                sector_codes = EXCLUDED.sector_codes, sector_names = EXCLUDED.sector_names,
+                specific_var = EXCLUDED.specific_var, updated_at = now()
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (
+                market.value, snapshot.date, snapshot.covariance.date,
+                snapshot.covariance.factor_names, snapshot.covariance.to_bytes(),
+                np.ascontiguousarray(exp.stock_ids, dtype="<i8").tobytes(),
+                np.ascontiguousarray(exp.styles, dtype="<f8").tobytes(),
+                np.ascontiguousarray(exp.sector_codes, dtype="<i8").tobytes(),
+                [str(n) for n in exp.sector_names],
+                np.ascontiguousarray(snapshot.specific_var, dtype="<f8").tobytes(),
+            ))
+
+    def get_risk_snapshot(self, market: Market) -> RiskSnapshot | None:
+        query = """
+            SELECT date, covariance_date, factor_names, covariance,
+                   stock_ids, styles, sector_codes, sector_names, specific_var
+            FROM factor_risk_snapshot WHERE market = %s
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        dt, cov_date, names, cov, stock_ids, styles, codes, sector_names, specific = row
+        stock_ids = np.frombuffer(bytes(stock_ids), dtype="<i8")
+        return RiskSnapshot(
+            date=dt,
+            covariance=FactorCovariance.from_bytes(cov_date, names, cov),
+            exposures=FactorExposures(
+                dt, stock_ids,
+                np.frombuffer(bytes(styles), dtype="<f8").reshape(len(stock_ids), -1),
+                np.frombuffer(bytes(codes), dtype="<i8"),
+                np.array(sector_names, dtype=object),
+            ),
+            specific_var=np.frombuffer(bytes(specific), dtype="<f8"),
+        )
+
+    def get_risk_snapshot_version(self, market: Market) -> tuple[date, datetime] | None:
+        """(date, updated_at) of the market's snapshot; changes on every republish."""
+        query = "SELECT date, updated_at FROM factor_risk_snapshot WHERE market = %s"
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            return cur.fetchone()
 
     # ── risk badge helpers ──
 
@@ -154,23 +362,6 @@ class FactorRepository:
             row = cur.fetchone()
             return float(row[0]) if row and row[0] is not None else None
 
-    def get_all_exposures_by_market(self, market: Market) -> dict[int, float]:
-        """Returns {stock_id: volatility_z} for the latest date."""
-        query = """
-            SELECT fe.stock_id, fe.volatility_z
-            FROM factor_exposures fe
-            JOIN stocks s ON s.id = fe.stock_id
-            WHERE s.market = %s AND s.is_active = true
-              AND fe.date = (SELECT MAX(date) FROM factor_exposures fe2
-                             JOIN stocks s2 ON s2.id = fe2.stock_id WHERE s2.market = %s)
-        """
-        with self._conn.cursor() as cur:
-            cur.execute(query, (market.value, market.value))
-            return {
-                row[0]: float(row[1]) if row[1] is not None else None
-                for row in cur.fetchall()
-            }
-
     def get_all_sector_aggregates(self, market: Market) -> dict[str, dict]:
         """Returns {sector: {stock_count, median_per, ...}} for the latest date."""
         query = """
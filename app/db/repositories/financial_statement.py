@@ -95,6 +95,22 @@ class FinancialStatementRepository:
 
         return result
 
+    def get_shares_history_by_market(self, market: Market) -> list[tuple]:
+        """
+        Returns [(stock_id, fiscal_year, report_type, shares_outstanding)] with shares reported,
+        for every stock of the market, delisted ones included.
+        """
+        query = """
+            SELECT fs.stock_id, fs.fiscal_year, fs.report_type, fs.shares_outstanding
+            FROM financial_statements fs
+            JOIN stocks s ON s.id = fs.stock_id
+            WHERE s.market = %s
+              AND fs.shares_outstanding IS NOT NULL
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            return cur.fetchall()
+
     @staticmethod
     def _row_to_dto(row: tuple) -> FinancialStatement:
         return FinancialStatement(
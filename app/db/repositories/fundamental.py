@@ -1,6 +1,7 @@
 from psycopg2.extensions import connection
 from psycopg2.extras import RealDictCursor
 
+from app.db.bulk import WRITE_MODE, check_write_mode, copy_insert
 from app.schema import Market
 
 _COL_TYPES = [
@@ -21,12 +22,15 @@ _UPSERT_CONFLICT = (
 
 
 class FundamentalRepository:
-    def __init__(self, conn: connection):
+    def __init__(self, conn: connection, write_mode: str = WRITE_MODE):
         self._conn = conn
+        self._write_mode = check_write_mode(write_mode)
 
     def upsert_batch(self, rows: list[tuple]) -> int:
         if not rows:
             return 0
+        if self._write_mode == "copy":
+            return copy_insert(self._conn, "stock_fundamentals", _COL_TYPES, rows, _UPSERT_CONFLICT)
         cols = [list(c) for c in zip(*rows)]
         with self._conn.cursor() as cur:
             cur.execute(
@@ -62,6 +66,24 @@ class FundamentalRepository:
             cur.execute(query, (stock_ids,))
             return cur.fetchall()
 
+    def get_history_by_market(self, market: Market) -> list[tuple]:
+        """
+        Returns [(stock_id, date, pbr, roe, operating_margin, debt_ratio)] ordered by stock_id, date,
+        for every stock of the market, delisted ones included.
+        """
+        query = """
+            SELECT f.stock_id, f.date, f.pbr::float8, f.roe::float8,
+                   f.operating_margin::float8, f.debt_ratio::float8
+            FROM stock_fundamentals f
+            JOIN stocks s ON s.id = f.stock_id
+            WHERE s.market = %s
+              AND f.data_coverage NOT IN ('NO_FS', 'INSUFFICIENT')
+            ORDER BY f.stock_id, f.date
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            return cur.fetchall()
+
     def get_latest_by_stock(self, stock_id: int) -> dict | None:
         query = """
             SELECT sf.*, s.sector, s.market
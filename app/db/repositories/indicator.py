@@ -1,5 +1,6 @@
 from psycopg2.extensions import connection
 from psycopg2.extras import RealDictCursor
+from app.db.bulk import WRITE_MODE, check_write_mode, copy_rows, create_stage
 from app.schema import Market
 
 _COL_TYPES = [
@@ -17,32 +18,134 @@ _COL_TYPES = [
 COLUMNS = [c for c, _ in _COL_TYPES]
 _UNNEST = ", ".join(f"%s::{t}[]" for _, t in _COL_TYPES)
 
+# stock_indicators is list-partitioned by market; rows carry no market, it comes from stocks
+_TARGET_COLS = ", ".join(COLUMNS + ["market"])
+_SOURCE_COLS = ", ".join(f"src.{c}" for c in COLUMNS) + ", s.market"
+_SWAP_LOCK_TIMEOUT = "5s"
+
+
+def _partition(market: Market) -> str:
+    return f"stock_indicators_{market.value.lower()}"
+
 
 class IndicatorRepository:
-    def __init__(self, conn: connection):
+    def __init__(self, conn: connection, write_mode: str = WRITE_MODE):
         self._conn = conn
+        self._write_mode = check_write_mode(write_mode)
 
-    def delete_by_markets(self, markets: list[Market]) -> int:
+    # ── writes ──
+
+    def delete_by_markets(self, markets: list[Market], partitioned: bool = True) -> int:
         market_values = [m.value for m in markets]
+        # the pre-partitioning table has no market column
+        where = (
+            "market = ANY(%s::market_type[])" if partitioned
+            else "stock_id IN (SELECT id FROM stocks WHERE market = ANY(%s::market_type[]))"
+        )
         with self._conn.cursor() as cur:
-            cur.execute(
-                "DELETE FROM stock_indicators "
-                "WHERE stock_id IN (SELECT id FROM stocks WHERE market = ANY(%s::market_type[]))",
-                (market_values,),
-            )
+            cur.execute(f"DELETE FROM stock_indicators WHERE {where}", (market_values,))
             return cur.rowcount
 
-    def insert_batch(self, rows: list[tuple]) -> int:
+    def insert_batch(self, rows: list[tuple], partitioned: bool = True) -> int:
         if not rows:
             return 0
-        cols = [list(c) for c in zip(*rows)]
+        with self._conn.cursor() as cur:
+            stage = self._stage(cur, rows)
+            if partitioned:
+                cur.execute(
+                    f"INSERT INTO stock_indicators ({_TARGET_COLS}) "
+                    f"SELECT {_SOURCE_COLS} FROM {stage} src JOIN stocks s ON s.id = src.stock_id"
+                )
+            else:
+                cur.execute(f"INSERT INTO stock_indicators ({', '.join(COLUMNS)}) SELECT * FROM {stage}")
+            return cur.rowcount
+
+    def is_partitioned(self) -> bool:
+        """False while the database still has the plain stock_indicators of before the migration."""
         with self._conn.cursor() as cur:
             cur.execute(
-                f"INSERT INTO stock_indicators ({', '.join(COLUMNS)}) "
-                f"SELECT * FROM UNNEST({_UNNEST})",
-                cols,
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass('public.stock_indicators'))"
             )
-            return cur.rowcount
+            return cur.fetchone()[0]
+
+    def publish(self, rows: list[tuple], markets: list[Market]) -> int:
+        """
+        Replace the markets' snapshots by building each next partition off to
+        the side and swapping all of them in at the end of this transaction.
+        The replaced partitions stay as <partition>_prev for rollback().
+        Readers are only blocked for the catalog swap itself, not the build.
+        """
+        inserted = 0
+        with self._conn.cursor() as cur:
+            stage = self._stage(cur, rows)
+            for market in markets:
+                nxt = f"{_partition(market)}_next"
+                cur.execute(f"DROP TABLE IF EXISTS {nxt}")
+                cur.execute(f"CREATE TABLE {nxt} (LIKE stock_indicators INCLUDING ALL)")
+                # lets ATTACH skip the partition-constraint scan
+                cur.execute(
+                    f"ALTER TABLE {nxt} ADD CONSTRAINT {nxt}_market_chk CHECK (market = %s)",
+                    (market.value,),
+                )
+                cur.execute(
+                    f"INSERT INTO {nxt} ({_TARGET_COLS}) "
+                    f"SELECT {_SOURCE_COLS} FROM {stage} src JOIN stocks s ON s.id = src.stock_id "
+                    f"WHERE s.market = %s",
+                    (market.value,),
+                )
+                inserted += cur.rowcount
+
+            cur.execute("SET LOCAL lock_timeout = %s", (_SWAP_LOCK_TIMEOUT,))
+            for market in markets:
+                part = _partition(market)
+                cur.execute(f"DROP TABLE IF EXISTS {part}_prev")
+                self._swap(cur, market, retired=f"{part}_prev", incoming=f"{part}_next")
+        return inserted
+
+    def rollback(self, markets: list[Market]) -> list[Market]:
+        """Swap each market's retained previous snapshot back in; returns the markets swapped."""
+        swapped = []
+        with self._conn.cursor() as cur:
+            cur.execute("SET LOCAL lock_timeout = %s", (_SWAP_LOCK_TIMEOUT,))
+            for market in markets:
+                part = _partition(market)
+                if not self._exists(cur, f"{part}_prev"):
+                    continue
+                cur.execute(f"DROP TABLE IF EXISTS {part}_next")
+                self._swap(cur, market, retired=f"{part}_next", incoming=f"{part}_prev")
+                cur.execute(f"ALTER TABLE {part}_next RENAME TO {part}_prev")
+                swapped.append(market)
+        return swapped
+
+    def _stage(self, cur, rows: list[tuple]) -> str:
+        stage = create_stage(cur, "stock_indicators", _COL_TYPES)
+        if self._write_mode == "copy":
+            copy_rows(cur, stage, COLUMNS, rows)
+        elif rows:
+            cur.execute(
+                f"INSERT INTO {stage} SELECT * FROM UNNEST({_UNNEST})",
+                [list(c) for c in zip(*rows)],
+            )
+        return stage
+
+    def _swap(self, cur, market: Market, retired: str, incoming: str) -> None:
+        part = _partition(market)
+        if self._exists(cur, part):
+            cur.execute(f"ALTER TABLE stock_indicators DETACH PARTITION {part}")
+            cur.execute(f"ALTER TABLE {part} RENAME TO {retired}")
+        cur.execute(f"ALTER TABLE {incoming} RENAME TO {part}")
+        cur.execute(
+            f"ALTER TABLE stock_indicators ATTACH PARTITION {part} FOR VALUES IN (%s)",
+            (market.value,),
+        )
+
+    @staticmethod
+    def _exists(cur, table: str) -> bool:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (f"public.{table}",))
+        return cur.fetchone()[0]
+
+    # ── reads ──
 
     def get_latest_by_stock(self, stock_id: int) -> dict | None:
         query = """
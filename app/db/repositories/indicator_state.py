@@ -0,0 +1,64 @@
+from psycopg2.extensions import connection
+from app.schema import Market
+
+_COL_TYPES = [
+    ("stock_id", "bigint"), ("date", "date"), ("bars", "int"),
+    ("ema_20", "float8"),
+    ("macd_fast", "float8"), ("macd_slow", "float8"), ("macd_signal", "float8"),
+    ("avg_gain", "float8"), ("avg_loss", "float8"),
+    ("atr_14", "float8"), ("plus_dm", "float8"), ("minus_dm", "float8"),
+    ("dx", "float8"), ("dx_weight", "float8"), ("dx_count", "int"),
+    ("obv", "float8"),
+    ("sar", "float8"), ("sar_ep", "float8"), ("sar_af", "float8"), ("sar_uptrend", "boolean"),
+    ("window_dates", "bytea"), ("window_close", "bytea"), ("window_volume", "bytea"),
+    ("window_high", "bytea"), ("window_low", "bytea"),
+]
+COLUMNS = [c for c, _ in _COL_TYPES]
+_UNNEST = ", ".join(f"%s::{t}[]" for _, t in _COL_TYPES)
+_UPDATE_SET = ", ".join(f"{c} = EXCLUDED.{c}" for c in COLUMNS[1:])
+
+
+class IndicatorStateRepository:
+    def __init__(self, conn: connection):
+        self._conn = conn
+
+    def get_by_market(self, market: Market) -> list[tuple]:
+        query = f"""
+            SELECT {', '.join(f'st.{c}' for c in COLUMNS)}
+            FROM stock_indicator_state st
+            JOIN stocks s ON s.id = st.stock_id
+            WHERE s.market = %s AND s.is_active = true
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            return cur.fetchall()
+
+    def get_bars_since_state(self, market: Market) -> dict[int, list[tuple]]:
+        """Bars from each stock's state date onward (inclusive, to detect revisions)."""
+        query = """
+            SELECT dp.stock_id, dp.date, dp.open, dp.high, dp.low, dp.close, dp.volume
+            FROM daily_prices dp
+            JOIN stock_indicator_state st ON st.stock_id = dp.stock_id
+            JOIN stocks s ON s.id = dp.stock_id
+            WHERE s.market = %s AND s.is_active = true AND dp.date >= st.date
+            ORDER BY dp.stock_id, dp.date
+        """
+        with self._conn.cursor() as cur:
+            cur.execute(query, (market.value,))
+            result: dict[int, list[tuple]] = {}
+            for row in cur.fetchall():
+                result.setdefault(row[0], []).append(row[1:])
+            return result
+
+    def upsert_batch(self, rows: list[tuple]) -> int:
+        if not rows:
+            return 0
+        cols = [list(c) for c in zip(*rows)]
+        with self._conn.cursor() as cur:
+            cur.execute(
+                f"INSERT INTO stock_indicator_state ({', '.join(COLUMNS)}) "
+                f"SELECT * FROM UNNEST({_UNNEST}) "
+                f"ON CONFLICT (stock_id) DO UPDATE SET {_UPDATE_SET}, updated_at = now()",
+                cols,
+            )
+            return cur.rowcount
@@ -3,17 +3,26 @@ import json
 from psycopg2.extensions import connection
 from psycopg2.extras import RealDictCursor
 
+from app.db.bulk import WRITE_MODE, check_write_mode, copy_insert
+
 _COL_TYPES = [
     ("stock_id", "bigint"), ("market", "market_type"), ("date", "date"),
     ("summary_tier", "varchar"), ("dimensions", "jsonb"),
 ]
 _COLS = [c for c, _ in _COL_TYPES]
 _UNNEST = ", ".join(f"%s::{t}[]" for _, t in _COL_TYPES)
+_UPSERT_CONFLICT = (
+    "ON CONFLICT (stock_id) DO UPDATE SET "
+    "market = EXCLUDED.market, date = EXCLUDED.date, "
+    "summary_tier = EXCLUDED.summary_tier, "
+    "dimensions = EXCLUDED.dimensions, updated_at = now()"
+)
 
 
 class RiskBadgeRepository:
-    def __init__(self, conn: connection):
+    def __init__(self, conn: connection, write_mode: str = WRITE_MODE):
         self._conn = conn
+        self._write_mode = check_write_mode(write_mode)
 
     def get_by_stock(self, stock_id: int) -> dict | None:
         query = """
@@ -39,21 +48,18 @@ class RiskBadgeRepository:
     def upsert_batch(self, rows: list[dict]) -> int:
         if not rows:
             return 0
-        cols = [
-            [r["stock_id"] for r in rows],
-            [r["market"] for r in rows],
-            [r["date"] for r in rows],
-            [r["summary_tier"] for r in rows],
-            [json.dumps(r["dimensions"]) for r in rows],
+        records = [
+            (r["stock_id"], r["market"], r["date"], r["summary_tier"], json.dumps(r["dimensions"]))
+            for r in rows
         ]
+        if self._write_mode == "copy":
+            return copy_insert(self._conn, "risk_badges", _COL_TYPES, records, _UPSERT_CONFLICT)
+        cols = [list(c) for c in zip(*records)]
         with self._conn.cursor() as cur:
             cur.execute(
                 f"INSERT INTO risk_badges ({', '.join(_COLS)}) "
                 f"SELECT * FROM UNNEST({_UNNEST}) "
-                "ON CONFLICT (stock_id) DO UPDATE SET "
-                "market = EXCLUDED.market, date = EXCLUDED.date, "
-                "summary_tier = EXCLUDED.summary_tier, "
-                "dimensions = EXCLUDED.dimensions, updated_at = now()",
+                f"{_UPSERT_CONFLICT}",
                 cols,
             )
             return cur.rowcount
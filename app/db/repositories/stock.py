@@ -161,11 +161,12 @@ class StockRepository:
             cur.execute(query, (market.value,))
             return cur.fetchone()
 
-    def get_eligible_for_factors(self, market: Market) -> list[tuple]:
-        """Returns [(id, symbol, sector)] for quant-eligible stocks."""
-        query = """
+    def get_eligible_for_factors(self, market: Market, include_inactive: bool = False) -> list[tuple]:
+        """Returns [(id, symbol, sector)] for quant-eligible stocks; delisted ones too with include_inactive."""
+        active = "" if include_inactive else "AND is_active = true"
+        query = f"""
             SELECT id, symbol, sector FROM stocks
-            WHERE market = %s AND is_active = true
+            WHERE market = %s {active}
               AND sector IS NOT NULL AND sector != 'N/A'
         """
         with self._conn.cursor() as cur:
@@ -5,19 +5,25 @@ from app.utils import setup_logging
 from app.db import close_pool
 from app.pipeline.orchestrator import PipelineOrchestrator
 
-COMMANDS = {"kr", "us", "kr-fs", "us-fs", "kr-initial", "us-initial"}
+COMMANDS = {
+    "kr", "us", "kr-fs", "us-fs", "kr-initial", "us-initial",
+    "kr-indicators-rollback", "us-indicators-rollback",
+    "kr-factor-backfill", "us-factor-backfill",
+}
+
+FLAGS = {"--resume"}
 
 logger = logging.getLogger(__name__)
 
 
 def main() -> int:
-    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
-        print(f"Usage: python -m app.pipeline <{'|'.join(sorted(COMMANDS))}>")
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS or not set(sys.argv[2:]) <= FLAGS:
+        print(f"Usage: python -m app.pipeline <{'|'.join(sorted(COMMANDS))}> [--resume]")
         return 1
 
     setup_logging(level=logging.INFO, log_file="logs/pipeline.log")
     command = sys.argv[1]
-    pipeline = PipelineOrchestrator()
+    pipeline = PipelineOrchestrator(resume="--resume" in sys.argv[2:])
 
     try:
         match command:
@@ -33,6 +39,14 @@ def main() -> int:
                 pipeline.run_initial_kr()
             case "us-initial":
                 pipeline.run_initial_us()
+            case "kr-indicators-rollback":
+                pipeline.rollback_indicators("kr")
+            case "us-indicators-rollback":
+                pipeline.rollback_indicators("us")
+            case "kr-factor-backfill":
+                pipeline.run_factor_backfill("kr")
+            case "us-factor-backfill":
+                pipeline.run_factor_backfill("us")
     except Exception as e:
         logger.error(f"[Pipeline] Failed: {e}", exc_info=True)
         return 1
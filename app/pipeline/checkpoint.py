@@ -0,0 +1,97 @@
+"""
+Completion markers and spilled artifacts for resuming a pipeline command.
+
+Every finished step records a fingerprint of what it ran on: each market's
+latest trading date and its bar count on that date, the content hashes of its input
+artifacts, and the fingerprints of the steps it waited for. Its outputs are
+pickled to the cache directory alongside. A `--resume` run recomputes the
+fingerprints and skips every step whose marker still matches, reloading its
+outputs from disk instead of the DB.
+
+Spilling every artifact costs a pickle, a hash and tens of MB of writes per
+run, so it is off unless PIPELINE_CHECKPOINT=1 (for runs that may need to
+be resumed) or the run itself is a `--resume`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_CACHE_DIR = Path(os.getenv("PIPELINE_CACHE_DIR", "cache/pipeline"))
+_ENABLED = os.getenv("PIPELINE_CHECKPOINT", "0").lower() in ("1", "true")
+
+
+class Checkpoint:
+    def __init__(self, command: str, resume: bool = False, root: Path = _CACHE_DIR):
+        self.resume = resume
+        self._dir = root / command
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._markers_path = self._dir / "markers.json"
+        self._lock = threading.Lock()
+        self._markers: dict[str, dict] = {}
+        if resume and self._markers_path.exists():
+            self._markers = json.loads(self._markers_path.read_text())
+        else:
+            # a fresh run must not inherit markers from an earlier one
+            self._write_markers()
+
+    @classmethod
+    def open(cls, command: str, resume: bool = False) -> "Checkpoint | None":
+        """A checkpoint for `command` when checkpointing is on or the run resumes, else None."""
+        if not (_ENABLED or resume):
+            return None
+        return cls(command, resume)
+
+    @staticmethod
+    def fingerprint(step: str, *parts: str) -> str:
+        return hashlib.sha256("\x1f".join((step, *parts)).encode()).hexdigest()
+
+    # ── markers ──
+
+    def is_done(self, step: str, fingerprint: str) -> bool:
+        """True when resuming and `step` last finished on identical inputs with its outputs still on disk."""
+        marker = self._markers.get(step)
+        if not self.resume or marker is None or marker["fingerprint"] != fingerprint:
+            return False
+        return all((self._dir / f"{name}.pkl").exists() for name in marker["outputs"])
+
+    def outputs(self, step: str) -> dict[str, str]:
+        """{artifact: content hash} recorded for a finished step."""
+        return self._markers[step]["outputs"]
+
+    def mark_done(self, step: str, fingerprint: str, outputs: dict[str, str] | None = None) -> None:
+        with self._lock:
+            self._markers[step] = {
+                "fingerprint": fingerprint,
+                "outputs": outputs or {},
+                "completed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._write_markers()
+
+    def _write_markers(self) -> None:
+        tmp = self._markers_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._markers, indent=2))
+        os.replace(tmp, self._markers_path)
+
+    # ── artifacts ──
+
+    def save_artifact(self, name: str, value: Any) -> str:
+        """Spill `value` to the cache directory; returns its content hash."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._dir / f"{name}.pkl"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return hashlib.sha256(data).hexdigest()
+
+    def load_artifact(self, name: str) -> Any:
+        with open(self._dir / f"{name}.pkl", "rb") as f:
+            return pickle.load(f)
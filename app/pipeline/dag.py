@@ -0,0 +1,191 @@
+"""
+Dependency-ordered step runner for the compute pipeline.
+
+Each step names the artifacts it consumes (passed to it as keyword
+arguments) and produces, plus steps it must wait for: `requires` must have
+succeeded, `after` only has to have finished. Ready steps run concurrently
+up to `width`. A failed step's outputs never appear, so everything that
+depends on it is recorded as skipped rather than run.
+
+With a Checkpoint (only when checkpointing is on), each step's fingerprint chains its inputs' content
+hashes and its upstream steps' fingerprints onto `salt`; finished steps
+are marked, and a resumed run reuses any step whose fingerprint matches.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from app.pipeline.checkpoint import Checkpoint
+from app.schema import StepResult
+
+logger = logging.getLogger(__name__)
+
+_WIDTH = int(os.getenv("PIPELINE_WIDTH", "4"))
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    fn: Callable[..., Any]
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    requires: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+
+
+class DagRunner:
+    def __init__(
+        self,
+        steps: list[Step],
+        width: int = _WIDTH,
+        checkpoint: Checkpoint | None = None,
+        salt: str = "",
+    ):
+        self._steps = steps
+        self._width = max(width, 1)
+        self._checkpoint = checkpoint
+        self._salt = salt
+        self._producer = {out: s.name for s in steps for out in s.outputs}
+        self._validate()
+
+    def _validate(self) -> None:
+        names = [s.name for s in self._steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate step names in {names}")
+        if len(self._producer) != sum(len(s.outputs) for s in self._steps):
+            raise ValueError("An artifact is produced by more than one step")
+        for step in self._steps:
+            for art in step.inputs:
+                if art not in self._producer:
+                    raise ValueError(f"Step '{step.name}' needs '{art}', which no step produces")
+            for dep in step.requires + step.after:
+                if dep not in names:
+                    raise ValueError(f"Step '{step.name}' waits on unknown step '{dep}'")
+
+    def _upstream(self, step: Step) -> list[str]:
+        return [self._producer[a] for a in step.inputs] + list(step.requires) + list(step.after)
+
+    def run(self) -> list[StepResult]:
+        """Run every step once; results come back in declaration order."""
+        start = time.monotonic()
+        artifacts: dict[str, Any] = {}
+        results: dict[str, StepResult] = {}
+        # content hashes of artifacts and fingerprints of finished steps, for checkpointing
+        hashes: dict[str, str] = {}
+        fingerprints: dict[str, str] = {}
+        pending = list(self._steps)
+        running: dict[Future, Step] = {}
+
+        with ThreadPoolExecutor(max_workers=self._width) as pool:
+            while pending or running:
+                # a skip can unblock (or skip) steps declared before it, so rescan until stable
+                progressed = True
+                while progressed:
+                    progressed = False
+                    for step in list(pending):
+                        state = self._readiness(step, results)
+                        if state == "skip":
+                            results[step.name] = StepResult(step.name, False, 0, "skipped")
+                            logger.warning(f"[Pipeline] Step '{step.name}' skipped (upstream failed)")
+                        elif state == "ready" and self._resumable(step, hashes, fingerprints):
+                            results[step.name] = self._resume(step, artifacts, hashes)
+                        elif state == "ready" and len(running) < self._width:
+                            kwargs = {a: artifacts[a] for a in step.inputs}
+                            fp = fingerprints.get(step.name)
+                            running[pool.submit(self._call, step, kwargs, start, fp)] = step
+                        else:
+                            continue
+                        pending.remove(step)
+                        progressed = True
+
+                if not running:
+                    if pending:
+                        raise RuntimeError(f"Pipeline DAG is stuck (cycle?): {[s.name for s in pending]}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    result, produced, produced_hashes = future.result()
+                    results[step.name] = result
+                    artifacts.update(produced)
+                    hashes.update(produced_hashes)
+                    if not result.success:
+                        fingerprints.pop(step.name, None)
+
+        self._log_critical_path(results)
+        return [results[s.name] for s in self._steps]
+
+    def _readiness(self, step: Step, results: dict[str, StepResult]) -> str:
+        needed = [self._producer[a] for a in step.inputs] + list(step.requires)
+        if any(dep in results and not results[dep].success for dep in needed):
+            return "skip"
+        if all(dep in results for dep in self._upstream(step)):
+            return "ready"
+        return "wait"
+
+    # ── checkpointing ──
+
+    def _resumable(self, step: Step, hashes: dict[str, str], fingerprints: dict[str, str]) -> bool:
+        """Fingerprint a ready step (kept in `fingerprints`); True if its marker matches."""
+        if self._checkpoint is None:
+            return False
+        parts = [self._salt]
+        parts += [f"{a}={hashes.get(a, '')}" for a in step.inputs]
+        parts += [f"{d}={fingerprints.get(d, 'failed')}" for d in step.requires + step.after]
+        fingerprints[step.name] = fp = Checkpoint.fingerprint(step.name, *parts)
+        return self._checkpoint.is_done(step.name, fp)
+
+    def _resume(self, step: Step, artifacts: dict[str, Any], hashes: dict[str, str]) -> StepResult:
+        outputs = self._checkpoint.outputs(step.name)
+        for name in step.outputs:
+            artifacts[name] = self._checkpoint.load_artifact(name)
+            hashes[name] = outputs[name]
+        logger.info(f"[Pipeline] Step '{step.name}' resumed from checkpoint")
+        return StepResult(step.name, True, 0, resumed=True)
+
+    def _call(
+        self, step: Step, kwargs: dict[str, Any], origin: float, fingerprint: str | None,
+    ) -> tuple[StepResult, dict[str, Any], dict[str, str]]:
+        started = time.monotonic()
+        started_ms = int((started - origin) * 1000)
+        try:
+            value = step.fn(**kwargs)
+        except Exception as e:
+            duration = int((time.monotonic() - started) * 1000)
+            logger.error(f"[Pipeline] Step '{step.name}' failed: {e}", exc_info=True)
+            return StepResult(step.name, False, duration, str(e), started_ms), {}, {}
+
+        if len(step.outputs) == 1:
+            value = (value,)
+        produced = dict(zip(step.outputs, value)) if step.outputs else {}
+        produced_hashes = {}
+        if self._checkpoint is not None:
+            produced_hashes = {n: self._checkpoint.save_artifact(n, v) for n, v in produced.items()}
+            self._checkpoint.mark_done(step.name, fingerprint, produced_hashes)
+
+        duration = int((time.monotonic() - started) * 1000)
+        return StepResult(step.name, True, duration, None, started_ms), produced, produced_hashes
+
+    def _log_critical_path(self, results: dict[str, StepResult]) -> None:
+        """The chain of steps whose finish times gated the last step to finish."""
+        ran = {n: r for n, r in results.items() if r.started_ms is not None}
+        if not ran:
+            return
+        by_name = {s.name: s for s in self._steps}
+
+        def finish(name: str) -> int:
+            return ran[name].started_ms + ran[name].duration_ms
+
+        path = [max(ran, key=finish)]
+        while True:
+            deps = [d for d in self._upstream(by_name[path[-1]]) if d in ran]
+            if not deps:
+                break
+            path.append(max(deps, key=finish))
+        path.reverse()
+        logger.info(f"[Pipeline] Critical path: {' → '.join(path)} ({finish(path[-1])}ms)")
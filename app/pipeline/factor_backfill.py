@@ -0,0 +1,339 @@
+"""
+Historical backfill of factor exposures and factor returns.
+
+The daily run only writes today's cross-section, so a new market waits
+months for the 90 factor-return dates the covariance (and factor betas)
+need. This rebuilds every trading date of the last FACTOR_BACKFILL_DAYS
+that precedes the market's live factor-return series, using the same
+exposures and constrained regression as the daily run.
+
+Inputs are taken as of each date: price windows end on that date,
+stock_fundamentals rows count from their own date, and statement share
+counts from their period end plus a filing lag. A stock's earliest
+snapshot stands in for dates before it was first recorded, since a new
+market has no fundamentals history yet.
+
+Each date's universe is every stock that traded on it and has a sector,
+delisted or deactivated ones included, so the factor returns are not
+biased towards today's survivors. Two biases remain: sectors are today's
+(stocks keep no sector history), and stocks deleted from `stocks` are gone.
+
+Cross-sections are built date by date, or with FACTOR_BACKFILL_WORKERS > 1
+across dates in a process pool that shares the price history through a
+PriceBlock (when /dev/shm can hold it), and each one is cached as .npz under
+FACTOR_BACKFILL_CACHE_DIR, keyed by the inputs, so a rerun only solves.
+The regressions of a chunk of dates are solved in one batch; their
+residuals are stored as specific returns, and each stock's specific
+variance is recomputed from the whole series once the market is done.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+from psycopg2.extensions import connection
+
+from app.db import (
+    DailyPriceRepository,
+    FactorRepository,
+    FinancialStatementRepository,
+    FundamentalRepository,
+    RiskFreeRateRepository,
+    StockRepository,
+)
+from app.pipeline.price_block import PriceBlock
+from app.quant.factor_model.exposure import STYLE_FACTORS, compute_exposures, sector_codes
+from app.quant.factor_model.regression import constrained_wls_batch
+from app.schema import Market, Maturity, PriceStore
+from app.schema.enums.market import market_to_country
+from app.services.factor_model_service import (
+    MIN_COVARIANCE_DAYS,
+    PRICE_LIMIT,
+    FactorModelService,
+    compute_price_features,
+    exposure_rows,
+)
+from app.utils import load_risk_free_rates
+
+logger = logging.getLogger(__name__)
+
+_DAYS = int(os.getenv("FACTOR_BACKFILL_DAYS", "504"))
+_MAX_WORKERS = int(os.getenv("FACTOR_BACKFILL_WORKERS", "1"))
+_CHUNK_DATES = int(os.getenv("FACTOR_BACKFILL_CHUNK_DATES", "63"))
+_CACHE_DIR = Path(os.getenv("FACTOR_BACKFILL_CACHE_DIR", "cache/factor_backfill"))
+_MIN_STOCKS = 30
+
+# statements are assumed public this many days after their (calendar) period end
+_PERIOD_END = {"Q1": (3, 31), "Q2": (6, 30), "Q3": (9, 30), "FY": (12, 31)}
+_FILING_LAG_DAYS = {"Q1": 45, "Q2": 45, "Q3": 45, "FY": 90}
+
+_shared: dict = {}
+
+
+class _PointInTime:
+    """Per-stock values keyed by the day they became known, sorted by (stock_id, day)."""
+
+    def __init__(self, stock_ids: np.ndarray, days: np.ndarray, values: np.ndarray):
+        # rows repeating the previous value of the same stock add nothing
+        same = np.zeros(len(stock_ids), dtype=bool)
+        if len(stock_ids) > 1:
+            prev, cur = values[:-1], values[1:]
+            same[1:] = (stock_ids[1:] == stock_ids[:-1]) & (
+                (prev == cur) | (np.isnan(prev) & np.isnan(cur))
+            ).all(axis=1)
+        stock_ids, days, values = stock_ids[~same], days[~same], values[~same]
+
+        self.stock_ids, first = np.unique(stock_ids, return_index=True)
+        self._first = first
+        self._keys = (np.searchsorted(self.stock_ids, stock_ids).astype(np.int64) << 32) | days
+        self._values = values
+
+    def at(self, stock_ids: np.ndarray, day: int) -> np.ndarray:
+        """(n, k) latest values known by `day`; NaN for stocks never recorded."""
+        out = np.full((len(stock_ids), self._values.shape[1]), np.nan)
+        pos = np.searchsorted(self.stock_ids, stock_ids)
+        known = pos < len(self.stock_ids)
+        known[known] = self.stock_ids[pos[known]] == stock_ids[known]
+        pos = pos[known]
+        idx = np.searchsorted(self._keys, (pos.astype(np.int64) << 32) | day, side="right") - 1
+        out[known] = self._values[np.maximum(idx, self._first[pos])]
+        return out
+
+    def covers(self, stock_ids: np.ndarray) -> np.ndarray:
+        return np.isin(stock_ids, self.stock_ids)
+
+    def update_digest(self, digest) -> None:
+        digest.update(self._keys.tobytes())
+        digest.update(self._values.tobytes())
+
+
+def _init_worker(block_handle, inputs: dict) -> None:
+    _shared["block"] = PriceBlock.attach(block_handle)
+    _shared["store"] = _shared["block"].store
+    _shared.update(inputs)
+
+
+def _cross_section(day: int) -> tuple[int, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(day, stock_ids, style exposures, excess returns, market caps) of the stocks that traded on `day`."""
+    path = _shared["cache_dir"] / f"{day}.npz"
+    if path.exists():
+        with np.load(path) as cached:
+            return day, cached["ids"], cached["style"], cached["excess"], cached["mcap"]
+
+    store: PriceStore = _shared["store"].as_of(day, PRICE_LIMIT)
+    traded = store.dates[store.offsets[1:] - 1] == day
+    ids = np.intersect1d(store.stock_ids[traded], _shared["stock_ids"])
+
+    close, returns_today, returns_252, returns_21, ewm_vol = compute_price_features(ids, store)
+    pbr, roe, opm, debt = _shared["fundamentals"].at(ids, day).T
+    shares = np.where(_shared["fundamentals"].covers(ids), _shared["shares"].at(ids, day)[:, 0], np.nan)
+
+    style = compute_exposures(shares * close, pbr, roe, opm, debt, returns_252, returns_21, ewm_vol)
+    rf_days, rf_rates = _shared["rf"]
+    i = np.searchsorted(rf_days, day, side="right") - 1
+    excess = returns_today - rf_rates[max(i, 0)] / 100 / 252
+    mcap = np.nan_to_num(shares) * np.nan_to_num(close)
+
+    np.savez(path, ids=ids, style=style, excess=excess, mcap=mcap)
+    return day, ids, style, excess, mcap
+
+
+class FactorBackfillEngine:
+    def __init__(self, conn: connection):
+        self._conn = conn
+        self._stock_repo = StockRepository(conn)
+        self._price_repo = DailyPriceRepository(conn)
+        self._fund_repo = FundamentalRepository(conn)
+        self._fs_repo = FinancialStatementRepository(conn)
+        self._rf_repo = RiskFreeRateRepository(conn)
+        self._factor_repo = FactorRepository(conn)
+        self._service = FactorModelService(conn)
+
+    def run(self, markets: list[Market], days: int = _DAYS) -> int:
+        """Backfill each market; returns the number of factor-return dates written."""
+        total = 0
+        for market in markets:
+            total += self._backfill_market(market, days)
+        return total
+
+    def _backfill_market(self, market: Market, days: int) -> int:
+        stocks = sorted(self._stock_repo.get_eligible_for_factors(market, include_inactive=True))
+        if len(stocks) < _MIN_STOCKS:
+            logger.warning(f"[Backfill] {market.value}: only {len(stocks)} eligible stocks, skipping")
+            return 0
+
+        store = self._price_repo.get_prices_by_stocks([s[0] for s in stocks], limit_per_stock=days + PRICE_LIMIT)
+        live_start = self._factor_repo.get_first_factor_return_date(market)
+        trading_days = np.unique(store.dates)
+        if live_start is not None:
+            trading_days = trading_days[trading_days < live_start.toordinal()]
+        trading_days = trading_days[-days:].tolist()
+        if not trading_days:
+            logger.info(f"[Backfill] {market.value}: nothing before {live_start} to backfill")
+            return 0
+
+        stock_ids = np.array([s[0] for s in stocks], dtype=np.int64)
+        codes, industry_names = sector_codes(np.array([s[2] for s in stocks], dtype=object))
+        inputs = self._point_in_time_inputs(market, stock_ids)
+        inputs["cache_dir"] = self._cache_dir(market, store, stocks, inputs)
+
+        logger.info(
+            f"[Backfill] {market.value}: {len(trading_days)} dates "
+            f"{date.fromordinal(trading_days[0])} ~ {date.fromordinal(trading_days[-1])}"
+        )
+        chunks = [trading_days[i:i + _CHUNK_DATES] for i in range(0, len(trading_days), _CHUNK_DATES)]
+        written = 0
+        workers = min(_MAX_WORKERS, os.cpu_count() or 1)
+        if workers > 1 and not PriceBlock.fits_shared(store):
+            logger.warning(f"[Backfill] {market.value}: /dev/shm too small for the price block, running in-process")
+            workers = 1
+        if workers <= 1:
+            _shared.update(inputs, store=store)
+            for chunk in chunks:
+                written += self._store_chunk(market, map(_cross_section, chunk), stock_ids, codes, industry_names)
+        else:
+            with PriceBlock.from_store(store, shared=True) as block:
+                with ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker, initargs=(block.handle, inputs),
+                ) as pool:
+                    for chunk in chunks:
+                        sections = pool.map(_cross_section, chunk)
+                        written += self._store_chunk(market, sections, stock_ids, codes, industry_names)
+
+        self._service.rebuild_specific_risk(market)
+        self._conn.commit()
+        n_dates = self._factor_repo.count_factor_return_dates(market)
+        if n_dates >= MIN_COVARIANCE_DAYS:
+            self._service.update_covariance(market, date.today())
+            self._service.publish_risk_snapshot(market)
+            self._conn.commit()
+        logger.info(f"[Backfill] {market.value}: {written} dates written, history_days={n_dates}")
+        return written
+
+    def _store_chunk(
+        self,
+        market: Market,
+        sections,
+        stock_ids: np.ndarray,
+        codes: np.ndarray,
+        industry_names: np.ndarray,
+    ) -> int:
+        """Solve one chunk of cross-sections in a single batch and write its rows."""
+        exp_rows: list[tuple] = []
+        solved: list[date] = []
+        sections = list(sections)
+        regressed: list[np.ndarray] = []  # per section, the rows that went into the regression
+        ys, Xs, cs, mcaps = [], [], [], []
+        for day, ids, style, excess, mcap in sections:
+            valid = ~np.isnan(style).any(axis=1) & ~np.isnan(excess)
+            if valid.sum() < _MIN_STOCKS:
+                regressed.append(np.zeros(len(ids), dtype=bool))
+                continue
+            regressed.append(valid)
+            solved.append(date.fromordinal(day))
+            ys.append(excess[valid])
+            Xs.append(np.column_stack([np.ones(valid.sum()), style[valid]]))
+            cs.append(codes[np.searchsorted(stock_ids, ids[valid])])
+            mcaps.append(mcap[valid])
+        specific = np.full(sum(len(v) for v in regressed), np.nan)
+
+        if solved:
+            y, X, code, mcap = np.concatenate(ys), np.vstack(Xs), np.concatenate(cs), np.concatenate(mcaps)
+            dates = np.repeat(np.arange(len(solved)), [len(v) for v in ys])
+            w = np.sqrt(mcap.clip(min=0))
+            w = np.where(np.isnan(w) | (w == 0), 1.0, w)
+
+            T, I = len(solved), len(industry_names)
+            has = code >= 0
+            cell = dates[has] * I + code[has]
+            members = np.bincount(cell, minlength=T * I).reshape(T, I)
+            industry_mcap = np.bincount(cell, weights=mcap[has], minlength=T * I).reshape(T, I)
+            total = industry_mcap.sum(axis=1, keepdims=True)
+            present = (members > 0).astype(float)
+            weights = np.where(
+                total > 0,
+                industry_mcap / np.where(total > 0, total, 1.0),
+                present / np.maximum(present.sum(axis=1, keepdims=True), 1),
+            )
+
+            factor_ret, specific_ret = constrained_wls_batch(y, X, code, dates, w, weights)
+            specific[np.concatenate(regressed)] = specific_ret
+
+            styles_present = np.stack(
+                [np.bincount(dates, weights=X[:, 1 + j] != 0.0, minlength=T) > 0 for j in range(len(STYLE_FACTORS))],
+                axis=1,
+            )
+            names = ["market"] + STYLE_FACTORS + [str(n) for n in industry_names]
+            present_mask = np.column_stack([np.ones(T, dtype=bool), styles_present, members > 0])
+            fr_rows = [
+                (market.value, dt, names[k], float(factor_ret[t, k]))
+                for t, dt in enumerate(solved)
+                for k in np.flatnonzero(present_mask[t]).tolist()
+            ]
+            self._factor_repo.upsert_factor_returns(fr_rows)
+
+        offsets = np.cumsum([len(v) for v in regressed])[:-1]
+        for (day, ids, style, _, _), residuals in zip(sections, np.split(specific, offsets)):
+            exp_rows.extend(exposure_rows(ids, date.fromordinal(day), style, residuals))
+        self._factor_repo.upsert_exposures(exp_rows)
+        self._conn.commit()
+        logger.info(f"[Backfill] {market.value}: {len(solved)} dates solved, {len(exp_rows)} exposure rows")
+        return len(solved)
+
+    # ── point-in-time inputs ──
+
+    def _point_in_time_inputs(self, market: Market, stock_ids: np.ndarray) -> dict:
+        fund = self._fund_repo.get_history_by_market(market)
+        fund_ids = np.array([r[0] for r in fund], dtype=np.int64)
+        fund_days = np.array([r[1].toordinal() for r in fund], dtype=np.int64)
+        fund_values = np.array(
+            [[np.nan if v is None else v for v in r[2:6]] for r in fund], dtype=float,
+        ).reshape(len(fund), 4)
+
+        statements = self._fs_repo.get_shares_history_by_market(market)
+        fs_ids = np.array([r[0] for r in statements], dtype=np.int64)
+        fs_days = np.array([self._known_from(r[1], r[2]) for r in statements], dtype=np.int64)
+        fs_values = np.array([float(r[3]) for r in statements], dtype=float).reshape(len(statements), 1)
+        order = np.lexsort((fs_days, fs_ids))
+
+        country = market_to_country(market)
+        rates = self._rf_repo.get_rates(country, Maturity.D91)
+        if rates:
+            rates = sorted(rates, key=lambda r: r.date)
+            rf = (
+                np.array([r.date.toordinal() for r in rates], dtype=np.int64),
+                np.array([float(r.rate) for r in rates]),
+            )
+        else:
+            rf = (np.zeros(1, dtype=np.int64), np.array([load_risk_free_rates(self._conn, [market])[country]]))
+
+        return {
+            "stock_ids": stock_ids,
+            "fundamentals": _PointInTime(fund_ids, fund_days, fund_values),
+            "shares": _PointInTime(fs_ids[order], fs_days[order], fs_values[order]),
+            "rf": rf,
+        }
+
+    @staticmethod
+    def _known_from(fiscal_year: int, report_type: str) -> int:
+        month, day = _PERIOD_END[str(report_type)]
+        return (date(fiscal_year, month, day) + timedelta(days=_FILING_LAG_DAYS[str(report_type)])).toordinal()
+
+    @staticmethod
+    def _cache_dir(market: Market, store: PriceStore, stocks: list[tuple], inputs: dict) -> Path:
+        """Per-market cache directory, keyed by everything a cross-section is built from."""
+        digest = hashlib.sha256()
+        for arr in (store.stock_ids, store.offsets, store.dates, store.close):
+            digest.update(arr.tobytes())
+        digest.update(repr(stocks).encode())
+        inputs["fundamentals"].update_digest(digest)
+        inputs["shares"].update_digest(digest)
+        for arr in inputs["rf"]:
+            digest.update(arr.tobytes())
+        path = _CACHE_DIR / market.value / digest.hexdigest()[:16]
+        path.mkdir(parents=True, exist_ok=True)
+        return path
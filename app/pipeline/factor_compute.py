@@ -1,12 +1,38 @@
+"""
+Daily factor model step for a region's markets.
+
+Markets share no state, so each market's regression (price features,
+exposures, constrained WLS) runs in its own process with its own
+connection for the reads, FACTOR_WORKERS at a time. The regressions come
+back to this process, which stores every market on one connection and
+commits once: a run publishes all of its markets or none.
+
+Each worker receives its market's PriceStore pickled with the task; with
+one task per market that is the same single copy a shared PriceBlock
+would make, without depending on the container's /dev/shm size.
+"""
+
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 
 from psycopg2.extensions import connection
 
-from app.schema import Market
+from app.db import get_connection
+from app.schema import FactorRegression, Market, PriceStore
 from app.services.factor_model_service import FactorModelService
+from app.utils import setup_logging
 
 logger = logging.getLogger(__name__)
 
+_MAX_WORKERS = int(os.getenv("FACTOR_WORKERS", str(os.cpu_count() or 1)))
+
+
+def _regress_market(market: Market, store: PriceStore | None) -> FactorRegression | None:
+    with get_connection() as conn:
+        return FactorModelService(conn).regress(market, store)
+
 
 class FactorComputeEngine:
     def __init__(self, conn: connection):
@@ -16,13 +42,26 @@ class FactorComputeEngine:
     def run(
         self,
         markets: list[Market],
-        price_maps: dict[Market, dict[int, list[tuple]]] | None = None,
+        price_stores: dict[Market, PriceStore] | None = None,
     ) -> int:
+        stores = [price_stores.get(market) if price_stores else None for market in markets]
+        workers = min(_MAX_WORKERS, len(markets), os.cpu_count() or 1)
+        if workers <= 1:
+            regressions = [self._service.regress(m, s) for m, s in zip(markets, stores)]
+        else:
+            # spawn: a forked child would inherit the parent's pooled connections
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=setup_logging,
+            ) as pool:
+                regressions = list(pool.map(_regress_market, markets, stores))
+
         total = 0
-        for market in markets:
-            pm = price_maps.get(market) if price_maps else None
-            result = self._service.run(market, pm)
-            if result.get("status") == "ok":
-                total += result.get("exposures", 0)
+        for regression in regressions:
+            if regression is None:
+                continue
+            result = self._service.persist(regression)
+            total += result.get("exposures", 0)
         self._conn.commit()
         return total
@@ -5,7 +5,7 @@ from psycopg2.extensions import connection
 from app.db import DailyPriceRepository
 from app.db.repositories.financial_statement import FinancialStatementRepository
 from app.db.repositories.fundamental import FundamentalRepository
-from app.schema import Market
+from app.schema import Market, PriceStore
 from app.services.fundamental_service import FundamentalService
 
 logger = logging.getLogger(__name__)
@@ -21,14 +21,14 @@ class FundamentalComputeEngine:
     def run(
         self,
         markets: list[Market],
-        price_maps: dict[Market, dict[int, list[tuple]]] | None = None,
+        price_stores: dict[Market, PriceStore] | None = None,
     ) -> int:
         FundamentalService.reset_stats()
         all_rows: list[tuple] = []
 
         for market in markets:
-            pm = price_maps.get(market) if price_maps else None
-            rows = self._process_market(market, pm)
+            store = price_stores.get(market) if price_stores else None
+            rows = self._process_market(market, store)
             all_rows.extend(rows)
 
         stats = FundamentalService.get_stats()
@@ -43,22 +43,22 @@ class FundamentalComputeEngine:
         return count
 
     def _process_market(
-        self, market: Market, price_map: dict[int, list[tuple]] | None = None
+        self, market: Market, store: PriceStore | None = None
     ) -> list[tuple]:
         fs_map = self._fs_repo.get_ttm_by_market(market)
 
-        if price_map is None:
-            price_map = self._price_repo.get_prices_by_market(market, limit_per_stock=1)
+        if store is None:
+            store = self._price_repo.get_prices_by_market(market, limit_per_stock=1)
+        last_close = dict(zip(store.stock_ids.tolist(), store.last_close().tolist()))
 
         rows: list[tuple] = []
         fs_stock_ids = set(fs_map.keys()) if fs_map else set()
 
         for i, (stock_id, statements) in enumerate((fs_map or {}).items(), 1):
-            prices = price_map.get(stock_id)
-            if not prices:
+            latest_close = last_close.get(stock_id)
+            if latest_close is None:
                 continue
 
-            latest_close = float(prices[-1][4])
             result = FundamentalService.compute(stock_id, latest_close, statements)
             if result:
                 rows.append(result)
@@ -67,7 +67,7 @@ class FundamentalComputeEngine:
                 logger.info(f"[FundCompute] {market.value}: {i}/{len(fs_map)} stocks")
 
         no_fs_count = 0
-        for stock_id in price_map:
+        for stock_id in last_close:
             if stock_id not in fs_stock_ids:
                 rows.append(FundamentalService.no_fs_row(stock_id))
                 no_fs_count += 1
@@ -1,13 +1,17 @@
 import logging
+import math
 import os
 from concurrent.futures import ProcessPoolExecutor
 
-import pandas as pd
+import numpy as np
 from psycopg2.extensions import connection
 
-from app.db import DailyPriceRepository
+from app.db import DailyPriceRepository, IndicatorStateRepository, StockRepository
 from app.db.repositories.indicator import IndicatorRepository
-from app.schema import Market
+from app.pipeline.price_block import PriceBlock
+from app.quant.indicators import streaming
+from app.quant.indicators.streaming import IndicatorState
+from app.schema import Market, PriceStore
 from app.schema.enums.market import market_to_benchmark, market_to_country
 from app.services import IndicatorService
 from app.services.factor_model_service import FactorModelService
@@ -15,35 +19,38 @@ from app.utils import load_benchmark_returns, load_risk_free_rates
 
 logger = logging.getLogger(__name__)
 
-_MAX_WORKERS = min(16, os.cpu_count() or 8)
-_CHUNK_SIZE = 200
+_HISTORY_BARS = streaming.WINDOW
+_STATE_CHECK_SAMPLE = int(os.getenv("INDICATOR_STATE_CHECK_SAMPLE", "50"))
+_MAX_WORKERS = int(os.getenv("INDICATOR_WORKERS", "1"))
+# "swap": build next partitions and swap them in; "replace": DELETE + INSERT in place
+_PUBLISH_MODE = os.getenv("INDICATOR_PUBLISH_MODE", "swap")
 
 _shared: dict = {}
 
 
-def _init_worker(bench_ret_map, rf_rate_map, factor_betas, stock_market_map):
-    _shared["bench_ret_map"] = bench_ret_map
-    _shared["rf_rate_map"] = rf_rate_map
+def _init_worker(block_handle, bench_ret, rf_rate, factor_betas):
+    _shared["block"] = PriceBlock.attach(block_handle)
+    _shared["bench_ret"] = bench_ret
+    _shared["rf_rate"] = rf_rate
     _shared["factor_betas"] = factor_betas
-    _shared["stock_market_map"] = stock_market_map
-
-
-def _compute_chunk(stock_batch: list[tuple[int, list[tuple]]]) -> tuple[list[tuple], list[int]]:
-    rows, failed = [], []
-    for stock_id, raw_prices in stock_batch:
-        try:
-            df = IndicatorService.build_dataframe(raw_prices)
-            if df is not None:
-                mkt = _shared["stock_market_map"][stock_id]
-                rows.append(IndicatorService.compute(
-                    stock_id, df,
-                    _shared["bench_ret_map"].get(mkt),
-                    _shared["rf_rate_map"].get(mkt, 3.0),
-                    _shared["factor_betas"].get(stock_id),
-                ))
-        except Exception:
-            failed.append(stock_id)
-    return rows, failed
+
+
+def _compute_range(bounds: tuple[int, int]) -> list[tuple]:
+    matrix = IndicatorService.build_matrices(_shared["block"].store.slice(*bounds))
+    if matrix is None:
+        return []
+    return IndicatorService.compute_batch(
+        matrix, _shared["bench_ret"], _shared["rf_rate"], _shared["factor_betas"],
+    )
+
+
+def _rows_agree(a: tuple, b: tuple) -> bool:
+    for x, y in zip(a, b):
+        if x == y:
+            continue
+        if x is None or y is None or not math.isclose(x, y, rel_tol=1e-4, abs_tol=1e-3):
+            return False
+    return True
 
 
 class IndicatorComputeEngine:
@@ -51,76 +58,240 @@ class IndicatorComputeEngine:
         self._conn = conn
         self._price_repo = DailyPriceRepository(conn)
         self._indicator_repo = IndicatorRepository(conn)
+        self._state_repo = IndicatorStateRepository(conn)
+        self._stock_repo = StockRepository(conn)
         self._factor_service = FactorModelService(conn)
 
     def run(
         self,
         markets: list[Market],
-        price_maps: dict[Market, dict[int, list[tuple]]] | None = None,
+        price_stores: dict[Market, PriceStore] | None = None,
+        incremental: bool = False,
     ) -> int:
-        rows, _ = self.compute(markets, price_maps)
+        rows, _ = self.compute(markets, price_stores, incremental)
         return self.persist(rows, markets)
 
     def compute(
         self,
         markets: list[Market],
-        price_maps: dict[Market, dict[int, list[tuple]]] | None = None,
+        price_stores: dict[Market, PriceStore] | None = None,
+        incremental: bool = False,
     ) -> tuple[list[tuple], dict[int, str]]:
+        """
+        incremental=False recomputes every stock from 300 bars of history and
+        rebuilds the streaming state; incremental=True folds only the bars that
+        arrived since the stored state and falls back to history per stock.
+        """
         benchmark_returns = load_benchmark_returns(self._conn, markets)
         rf_rates = load_risk_free_rates(self._conn, markets)
 
-        bench_ret_map = {m.value: benchmark_returns.get(market_to_benchmark(m)) for m in markets}
-        rf_rate_map = {m.value: rf_rates.get(market_to_country(m), 3.0) for m in markets}
-
-        all_items: list[tuple[int, list[tuple]]] = []
+        rows: list[tuple] = []
         stock_market_map: dict[int, str] = {}
-        factor_betas: dict[int, float] = {}
+        fb_used = 0
 
         for market in markets:
-            pm = price_maps.get(market) if price_maps else None
-            if pm is None:
-                pm = self._price_repo.get_prices_by_market(market, limit_per_stock=300)
-            if not pm:
-                logger.warning(f"[Compute] No price data for {market.value}")
-                continue
-
-            factor_betas.update(self._factor_service.get_betas(market))
-            for stock_id in pm:
-                stock_market_map[stock_id] = market.value
-            all_items.extend(pm.items())
+            store = price_stores.get(market) if price_stores else None
+            bench = benchmark_returns.get(market_to_benchmark(market))
+            rf = rf_rates.get(market_to_country(market), 3.0)
 
-        if not all_items:
-            return [], {}
+            if incremental:
+                state = self._advance_state(market, store)
+                if len(state) == 0:
+                    logger.warning(f"[Compute] No indicator state for {market.value}")
+                    continue
+                factor_betas = self._factor_service.get_betas(market)
+                market_rows = IndicatorService.compute_from_state(state, bench, rf, factor_betas)
+                stock_ids = state.stock_ids.tolist()
+            else:
+                if store is None:
+                    store = self._price_repo.get_prices_by_market(market, limit_per_stock=_HISTORY_BARS)
+                if len(store) == 0:
+                    logger.warning(f"[Compute] No price data for {market.value}")
+                    continue
+                factor_betas = self._factor_service.get_betas(market)
+                market_rows = self._compute_full(market, store, bench, rf, factor_betas)
+                stock_ids = store.stock_ids.tolist()
 
-        chunks = [all_items[i:i + _CHUNK_SIZE] for i in range(0, len(all_items), _CHUNK_SIZE)]
+            for stock_id in stock_ids:
+                stock_market_map[stock_id] = market.value
+            fb_used += sum(1 for r in market_rows if r[0] in factor_betas)
+            rows.extend(market_rows)
 
-        rows: list[tuple] = []
-        failed: list[int] = []
-        with ProcessPoolExecutor(
-            max_workers=_MAX_WORKERS,
-            initializer=_init_worker,
-            initargs=(bench_ret_map, rf_rate_map, factor_betas, stock_market_map),
-        ) as pool:
-            for batch_rows, batch_failed in pool.map(_compute_chunk, chunks):
-                rows.extend(batch_rows)
-                failed.extend(batch_failed)
-
-        fb_used = sum(1 for sid in stock_market_map if sid in factor_betas)
+        mode = "incremental" if incremental else "columnar batch"
         logger.info(
             f"[Compute] {len(rows)}/{len(stock_market_map)} stocks computed "
-            f"({fb_used} factor betas, {_MAX_WORKERS} workers)"
+            f"({fb_used} factor betas, {mode})"
         )
-
-        if failed:
-            logger.warning(f"[Compute] {len(failed)} stocks failed: {failed[:20]}")
-
         return rows, stock_market_map
 
     def persist(self, rows: list[tuple], markets: list[Market]) -> int:
-        deleted = self._indicator_repo.delete_by_markets(markets)
+        partitioned = self._indicator_repo.is_partitioned()
+        if _PUBLISH_MODE == "swap" and not partitioned:
+            logger.warning(
+                "[Compute] stock_indicators is not partitioned yet (see the migration in db_table.sql); "
+                "publishing with replace instead of swap"
+            )
+        if _PUBLISH_MODE == "swap" and partitioned:
+            published = self._indicator_repo.publish(rows, markets)
+            self._conn.commit()
+            logger.info(
+                f"[Compute] Published {published} indicator rows "
+                f"({', '.join(m.value for m in markets)} partitions swapped)"
+            )
+            return published
+
+        deleted = self._indicator_repo.delete_by_markets(markets, partitioned)
         logger.info(f"[Compute] Deleted {deleted} old indicator rows")
 
-        inserted = self._indicator_repo.insert_batch(rows)
+        inserted = self._indicator_repo.insert_batch(rows, partitioned)
         self._conn.commit()
         logger.info(f"[Compute] Inserted {inserted} indicator rows")
         return inserted
+
+    def rollback(self, markets: list[Market]) -> list[Market]:
+        """Swap the previous published snapshot back in for each market that kept one."""
+        swapped = self._indicator_repo.rollback(markets)
+        self._conn.commit()
+        logger.info(f"[Compute] Rolled back indicators for {[m.value for m in swapped]}")
+        return swapped
+
+    def _compute_full(
+        self,
+        market: Market,
+        store: PriceStore,
+        bench,
+        rf: float,
+        factor_betas: dict[int, float],
+    ) -> list[tuple]:
+        """Recompute from history and rebuild the streaming state."""
+        self._save_state(self._state_from_history(store), market)
+
+        workers = min(_MAX_WORKERS, os.cpu_count() or 1)
+        if workers > 1 and not PriceBlock.fits_shared(store):
+            logger.warning(f"[Compute] {market.value}: /dev/shm too small for the price block, running in-process")
+            workers = 1
+        if workers <= 1:
+            matrix = IndicatorService.build_matrices(store)
+            return IndicatorService.compute_batch(matrix, bench, rf, factor_betas) if matrix else []
+
+        rows: list[tuple] = []
+        with PriceBlock.from_store(store, shared=True) as block:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(block.handle, bench, rf, factor_betas),
+            ) as pool:
+                for part in pool.map(_compute_range, block.ranges(workers)):
+                    rows.extend(part)
+        return rows
+
+    # ── streaming state ──
+
+    def _advance_state(
+        self, market: Market, store: PriceStore | None,
+    ) -> IndicatorState:
+        state = streaming.from_records(self._state_repo.get_by_market(market))
+        pos = {sid: i for i, sid in enumerate(state.stock_ids.tolist())}
+        active_ids = [sid for sid, _, _ in self._stock_repo.get_active_stocks(market)]
+        rebuild = {sid for sid in active_ids if sid not in pos}
+
+        pending = self._pending_bars(state, pos, self._state_repo.get_bars_since_state(market), rebuild)
+        self._fold_pending(state, pending)
+
+        checked = self._check_consistency(state, pending, store)
+        rebuild |= checked
+
+        advanced = np.array(sorted(i for i in pending if state.stock_ids[i] not in rebuild), dtype=np.int64)
+        if len(advanced):
+            self._save_state(state.take(advanced), market)
+
+        if rebuild:
+            history = self._history_for(sorted(rebuild), store)
+            rebuilt = self._state_from_history(history)
+            self._save_state(rebuilt, market)
+            keep = np.flatnonzero(~np.isin(state.stock_ids, rebuilt.stock_ids))
+            state = IndicatorState.concat([state.take(keep), rebuilt])
+
+        logger.info(
+            f"[Compute] {market.value} state: {len(advanced)} advanced, "
+            f"{len(rebuild)} rebuilt from history ({len(checked)} failed consistency check)"
+        )
+        return state
+
+    @staticmethod
+    def _pending_bars(
+        state: IndicatorState,
+        pos: dict[int, int],
+        bars_by_stock: dict[int, list[tuple]],
+        rebuild: set[int],
+    ) -> dict[int, list[tuple]]:
+        """New bars per state row; stocks whose stored last bar was revised go to `rebuild`."""
+        last_dates = state.last_dates()
+        pending: dict[int, list[tuple]] = {}
+        for sid, bars in bars_by_stock.items():
+            i = pos.get(sid)
+            if i is None:
+                continue
+            head = bars[0]
+            stored = (state.high[i, -1], state.low[i, -1], state.close[i, -1], state.volume[i, -1])
+            if head[0].toordinal() != last_dates[i] or tuple(float(v) for v in head[2:6]) != stored:
+                rebuild.add(sid)
+                continue
+            new_bars = bars[1:]
+            if len(new_bars) > _HISTORY_BARS:
+                rebuild.add(sid)
+            elif new_bars:
+                pending[i] = new_bars
+        return pending
+
+    @staticmethod
+    def _fold_pending(state: IndicatorState, pending: dict[int, list[tuple]]) -> None:
+        depth = max((len(b) for b in pending.values()), default=0)
+        for k in range(depth):
+            items = [(i, bars[k]) for i, bars in pending.items() if len(bars) > k]
+            idx = np.array([i for i, _ in items], dtype=np.int64)
+            ohlcv = np.array([bar[1:6] for _, bar in items], dtype=float)
+            dates = np.array([bar[0].toordinal() for _, bar in items], dtype=np.int64)
+            streaming.advance(state, idx, dates, ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3], ohlcv[:, 4])
+
+    def _check_consistency(
+        self,
+        state: IndicatorState,
+        pending: dict[int, list[tuple]],
+        store: PriceStore | None,
+    ) -> set[int]:
+        """Recompute a sample of advanced stocks from history; returns those that drifted."""
+        if _STATE_CHECK_SAMPLE <= 0 or not pending:
+            return set()
+        candidates = list(pending)
+        rng = np.random.default_rng()
+        sample = rng.choice(candidates, size=min(_STATE_CHECK_SAMPLE, len(candidates)), replace=False)
+
+        sample_ids = [int(state.stock_ids[i]) for i in sample]
+        matrix = IndicatorService.build_matrices(self._history_for(sample_ids, store))
+        if matrix is None:
+            return set()
+        expected = {r[0]: r for r in IndicatorService.compute_batch(matrix, None, 0.0)}
+        actual = IndicatorService.compute_from_state(state.take(np.sort(sample)), None, 0.0)
+        return {r[0] for r in actual if r[0] in expected and not _rows_agree(r, expected[r[0]])}
+
+    def _history_for(self, stock_ids: list[int], store: PriceStore | None) -> PriceStore:
+        if store is not None:
+            return store.take(stock_ids)
+        return self._price_repo.get_prices_by_stocks(stock_ids, limit_per_stock=_HISTORY_BARS)
+
+    @staticmethod
+    def _state_from_history(store: PriceStore) -> IndicatorState:
+        matrix = IndicatorService.build_matrices(store, min_rows=1)
+        if matrix is None:
+            return IndicatorState.empty([])
+        return streaming.from_history(
+            matrix.stock_ids, matrix.dates, matrix.high, matrix.low, matrix.close, matrix.volume,
+        )
+
+    def _save_state(self, state: IndicatorState, market: Market) -> None:
+        if len(state) == 0:
+            return
+        count = self._state_repo.upsert_batch(streaming.to_records(state))
+        self._conn.commit()
+        logger.info(f"[Compute] Saved indicator state for {count} {market.value} stocks")
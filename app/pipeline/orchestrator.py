@@ -1,38 +1,41 @@
 import logging
 import time
-from typing import Callable, Any
+from datetime import date
+from functools import partial
+from typing import Any, Callable
 from concurrent.futures import ThreadPoolExecutor
 
 from app.db import get_connection, DailyPriceRepository
 from app.db.repositories.stock import StockRepository
 from app.db.repositories.indicator import COLUMNS as _IND_COLUMNS
-from app.schema import Market
+from app.schema import Market, PriceStore
 from app.services import PriceCollectionService
 from app.services.price_collection_service import REGION_CONFIG
 from app.services.fundamental_collection_service import FundamentalCollectionService
 from app.pipeline.indicator_compute import IndicatorComputeEngine
 from app.pipeline.fundamental_compute import FundamentalComputeEngine
 from app.pipeline.factor_compute import FactorComputeEngine
+from app.pipeline.factor_backfill import FactorBackfillEngine
 from app.pipeline.sector_aggregate_compute import SectorAggregateComputeEngine
 from app.pipeline.integrity_check import IntegrityCheckEngine
+from app.pipeline.checkpoint import Checkpoint
+from app.pipeline.dag import DagRunner, Step
 from app.collectors.service.exchange_rate import ExchangeRateCollector
 from app.schema import StepResult, PipelineMetadata
 from app.log.service.audit_log_service import log_pipeline
 
 logger = logging.getLogger(__name__)
 
-PriceMaps = dict[Market, dict[int, list[tuple]]]
+PriceStores = dict[Market, PriceStore]
 _SAFETY_THRESHOLD = 0.10
 
 
 def _indicator_rows_to_dicts(
-    rows: list[tuple], price_maps: PriceMaps, stock_market_map: dict[int, str],
+    rows: list[tuple], price_stores: PriceStores, stock_market_map: dict[int, str],
 ) -> dict[str, dict[int, dict]]:
     close_by_id: dict[int, float] = {}
-    for pm in price_maps.values():
-        for sid, prices in pm.items():
-            if prices:
-                close_by_id[sid] = float(prices[-1][4])
+    for store in price_stores.values():
+        close_by_id.update(zip(store.stock_ids.tolist(), store.last_close().tolist()))
 
     by_market: dict[str, dict[int, dict]] = {}
     for row in rows:
@@ -44,7 +47,8 @@ def _indicator_rows_to_dicts(
 
 
 class PipelineOrchestrator:
-    def __init__(self):
+    def __init__(self, resume: bool = False):
+        self._resume = resume
         self._collector = PriceCollectionService()
         self._fund_collector = FundamentalCollectionService()
         self._exchange_rate_collector = ExchangeRateCollector()
@@ -53,38 +57,50 @@ class PipelineOrchestrator:
 
     def run_daily_kr(self) -> None:
         logger.info("[Pipeline] Starting KR daily pipeline")
-        collect_start = time.monotonic()
-        with ThreadPoolExecutor(max_workers=2) as pool:
-            collect_future = pool.submit(self._collector.collect_all, "kr")
-            exchange_future = pool.submit(self._collect_exchange_rates)
-            collect_future.result()
-            exchange_future.result()
-        collect_ms = int((time.monotonic() - collect_start) * 1000)
+        checkpoint = Checkpoint.open("kr", self._resume)
+
+        def collect() -> None:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                collect_future = pool.submit(self._collector.collect_all, "kr")
+                exchange_future = pool.submit(self._collect_exchange_rates)
+                collect_future.result()
+                exchange_future.result()
+
+        collect_ms = self._collect(checkpoint, collect)
         logger.info(f"[Pipeline] KR collection done in {collect_ms}ms")
-        self._run_compute_pipeline("kr", collect_ms=collect_ms)
+        self._run_compute_pipeline("kr", checkpoint, collect_ms=collect_ms)
         logger.info("[Pipeline] KR daily pipeline complete")
 
     def run_daily_us(self) -> None:
         logger.info("[Pipeline] Starting US daily pipeline")
-        collect_start = time.monotonic()
-        self._collector.collect_all("us")
-        collect_ms = int((time.monotonic() - collect_start) * 1000)
+        checkpoint = Checkpoint.open("us", self._resume)
+        collect_ms = self._collect(checkpoint, lambda: self._collector.collect_all("us"))
         logger.info(f"[Pipeline] US collection done in {collect_ms}ms")
-        self._run_compute_pipeline("us", collect_ms=collect_ms)
+        self._run_compute_pipeline("us", checkpoint, collect_ms=collect_ms)
         logger.info("[Pipeline] US daily pipeline complete")
 
     def run_initial_kr(self) -> None:
         logger.info("[Pipeline] Starting KR initial pipeline")
-        self._collector.collect_all("kr")
-        self._fund_collector.collect_all("kr")
-        self._run_compute_pipeline("kr-initial")
+        checkpoint = Checkpoint.open("kr-initial", self._resume)
+
+        def collect() -> None:
+            self._collector.collect_all("kr")
+            self._fund_collector.collect_all("kr")
+
+        self._collect(checkpoint, collect)
+        self._run_compute_pipeline("kr-initial", checkpoint)
         logger.info("[Pipeline] KR initial pipeline complete")
 
     def run_initial_us(self) -> None:
         logger.info("[Pipeline] Starting US initial pipeline")
-        self._collector.collect_all("us")
-        self._fund_collector.collect_all("us")
-        self._run_compute_pipeline("us-initial")
+        checkpoint = Checkpoint.open("us-initial", self._resume)
+
+        def collect() -> None:
+            self._collector.collect_all("us")
+            self._fund_collector.collect_all("us")
+
+        self._collect(checkpoint, collect)
+        self._run_compute_pipeline("us-initial", checkpoint)
         logger.info("[Pipeline] US initial pipeline complete")
 
     def run_collect_fs_kr(self) -> None:
@@ -99,55 +115,94 @@ class PipelineOrchestrator:
         self._compute_fundamentals("us")
         logger.info("[Pipeline] US financial statement pipeline complete")
 
+    def rollback_indicators(self, region: str) -> None:
+        markets = REGION_CONFIG[region]["markets"]
+        with get_connection() as conn:
+            swapped = IndicatorComputeEngine(conn).rollback(markets)
+        if len(swapped) < len(markets):
+            logger.warning(
+                f"[Pipeline] {region.upper()} indicators rolled back for "
+                f"{len(swapped)}/{len(markets)} markets (no previous snapshot for the rest)"
+            )
+
+    def run_factor_backfill(self, region: str) -> None:
+        markets = REGION_CONFIG[region]["markets"]
+        with get_connection() as conn:
+            written = FactorBackfillEngine(conn).run(markets)
+        logger.info(f"[Pipeline] {region.upper()} factor backfill wrote {written} factor-return dates")
+
     # ── compute pipeline ──
 
-    def _run_compute_pipeline(self, command: str, collect_ms: int = 0) -> None:
+    def _collect(self, checkpoint: Checkpoint | None, collect: Callable[[], Any]) -> int:
+        """Run `collect` unless this command already collected today; returns its duration in ms."""
+        fingerprint = Checkpoint.fingerprint("collection", date.today().isoformat())
+        if checkpoint is not None and checkpoint.is_done("collection", fingerprint):
+            self._collector.active_symbols = checkpoint.load_artifact("active_symbols")
+            logger.info("[Pipeline] Collection resumed from checkpoint")
+            return 0
+
+        start = time.monotonic()
+        collect()
+        if checkpoint is not None:
+            checkpoint.mark_done("collection", fingerprint, {
+                "active_symbols": checkpoint.save_artifact("active_symbols", self._collector.active_symbols),
+            })
+        return int((time.monotonic() - start) * 1000)
+
+    def _run_compute_pipeline(self, command: str, checkpoint: Checkpoint | None, collect_ms: int = 0) -> None:
         region = command.replace("-initial", "")
         markets = REGION_CONFIG[region]["markets"]
+        incremental = not command.endswith("-initial")
         steps: list[StepResult] = []
         pipeline_start = time.monotonic()
 
         if collect_ms > 0:
             steps.append(StepResult("collection", True, collect_ms))
 
-        deactivate_start = time.monotonic()
-        deactivate_ok = self._progressive_deactivate(markets)
-        steps.append(StepResult(
-            "progressive_deactivate",
-            deactivate_ok,
-            int((time.monotonic() - deactivate_start) * 1000),
-            None if deactivate_ok else "safety_check_failed",
-        ))
-        if not deactivate_ok:
-            self._log_pipeline_audit(command, steps, pipeline_start)
-            return
-
-        load_start = time.monotonic()
-        price_maps = self._load_prices(markets)
-        steps.append(StepResult(
-            "load_prices", True, int((time.monotonic() - load_start) * 1000),
-        ))
-
-        fund = self._safe_step("fundamentals", self._compute_fundamentals, region, price_maps)
-        steps.append(fund)
-
-        if fund.success:
-            with ThreadPoolExecutor(max_workers=2) as pool:
-                factor_future = pool.submit(self._safe_step, "factors", self._compute_factors, region, price_maps)
-                sector_agg_future = pool.submit(self._safe_step, "sector_agg", self._compute_sector_aggregates, region)
-                factor = factor_future.result()
-                sector_agg = sector_agg_future.result()
-            steps.extend([factor, sector_agg])
-
-            if factor.success:
-                self._run_indicators_and_badges(region, markets, price_maps, steps)
-        else:
-            steps.append(StepResult("factors", False, 0, "skipped"))
-            logger.error("[Pipeline] Fundamentals failed — skipping factors/indicators/risk_badges")
-
-        self._run_integrity_check(region)
+        runner = DagRunner(
+            self._compute_steps(region, markets, incremental),
+            checkpoint=checkpoint, salt=self._price_fingerprint(markets) if checkpoint is not None else "",
+        )
+        steps.extend(runner.run())
         self._log_pipeline_audit(command, steps, pipeline_start)
 
+    @staticmethod
+    def _price_fingerprint(markets: list[Market]) -> str:
+        """Latest trading date and its bar count per market; changes whenever a day's collection does."""
+        with get_connection() as conn:
+            repo = DailyPriceRepository(conn)
+            summaries = [(m.value, *repo.get_latest_day_summary_by_market(m)) for m in markets]
+        return ",".join(f"{m}:{latest}:{count}" for m, latest, count in summaries)
+
+    def _compute_steps(self, region: str, markets: list[Market], incremental: bool) -> list[Step]:
+        """The compute pipeline for one region; KR and US share the same graph."""
+        return [
+            Step("progressive_deactivate", partial(self._deactivate, markets)),
+            Step(
+                "load_prices", partial(self._load_prices, markets),
+                outputs=("price_stores",), requires=("progressive_deactivate",),
+            ),
+            Step("fundamentals", partial(self._compute_fundamentals, region), inputs=("price_stores",)),
+            Step(
+                "factors", partial(self._compute_factors, region),
+                inputs=("price_stores",), requires=("fundamentals",),
+            ),
+            Step("sector_agg", partial(self._compute_sector_aggregates, region), requires=("fundamentals",)),
+            Step(
+                "integrity_check", partial(self._run_integrity_check, region),
+                requires=("progressive_deactivate",), after=("fundamentals",),
+            ),
+            Step(
+                "indicators", partial(self._compute_indicators, markets, incremental),
+                inputs=("price_stores",), outputs=("ind_rows", "ind_dicts"), requires=("factors",),
+            ),
+            Step(
+                "risk_badges", partial(self._compute_risk_badges, region),
+                inputs=("ind_dicts",), after=("sector_agg",),
+            ),
+            Step("indicators_persist", partial(self._persist_indicators, region), inputs=("ind_rows",)),
+        ]
+
     def _log_pipeline_audit(self, command: str, steps: list[StepResult], pipeline_start: float) -> None:
         meta = PipelineMetadata(
             command=command,
@@ -161,6 +216,10 @@ class PipelineOrchestrator:
 
     # ── progressive deactivation (single transaction) ──
 
+    def _deactivate(self, markets: list[Market]) -> None:
+        if not self._progressive_deactivate(markets):
+            raise RuntimeError("safety_check_failed")
+
     def _progressive_deactivate(self, markets: list[Market]) -> bool:
         with get_connection() as conn:
             repo = StockRepository(conn)
@@ -204,91 +263,49 @@ class PipelineOrchestrator:
 
     # ── helpers ──
 
-    def _load_prices(self, markets: list[Market]) -> PriceMaps:
-        def _load_market(market: Market) -> tuple[Market, dict[int, list[tuple]]]:
+    def _load_prices(self, markets: list[Market]) -> PriceStores:
+        def _load_market(market: Market) -> tuple[Market, PriceStore]:
             with get_connection() as conn:
-                return market, DailyPriceRepository(conn).get_prices_by_market(market, limit_per_stock=300)
+                repo = DailyPriceRepository(conn)
+                return market, repo.get_prices_by_market(market, limit_per_stock=300)
 
-        price_maps: PriceMaps = {}
+        price_stores: PriceStores = {}
         with ThreadPoolExecutor(max_workers=len(markets)) as pool:
             for market, data in pool.map(_load_market, markets):
-                price_maps[market] = data
-        return price_maps
-
-    def _safe_step(self, name: str, fn: Callable[..., Any], *args: Any) -> StepResult:
-        start = time.monotonic()
-        try:
-            fn(*args)
-            duration = int((time.monotonic() - start) * 1000)
-            return StepResult(name=name, success=True, duration_ms=duration)
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            logger.error(f"[Pipeline] Step '{name}' failed: {e}", exc_info=True)
-            return StepResult(name=name, success=False, duration_ms=duration, error=str(e))
+                price_stores[market] = data
+        return price_stores
 
     # ── indicators + risk_badges (in-memory handoff) ──
 
-    def _run_indicators_and_badges(
-        self, region: str, markets: list[Market],
-        price_maps: PriceMaps, steps: list[StepResult],
-    ) -> None:
-        ind_rows, stock_market_map = None, None
-        ind_start = time.monotonic()
-        try:
-            with get_connection() as conn:
-                engine = IndicatorComputeEngine(conn)
-                ind_rows, stock_market_map = engine.compute(markets, price_maps)
-            steps.append(StepResult(
-                "indicators", True, int((time.monotonic() - ind_start) * 1000),
-            ))
-        except Exception as e:
-            steps.append(StepResult(
-                "indicators", False, int((time.monotonic() - ind_start) * 1000), str(e),
-            ))
-            logger.error(f"[Pipeline] indicators failed: {e}", exc_info=True)
-            return
-
-        ind_dicts = _indicator_rows_to_dicts(ind_rows, price_maps, stock_market_map)
-
-        with ThreadPoolExecutor(max_workers=2) as pool:
-            persist_start = time.monotonic()
-            persist_future = pool.submit(self._persist_indicators, ind_rows, region)
-            badge_step = self._safe_step("risk_badges", self._compute_risk_badges, region, ind_dicts)
-            steps.append(badge_step)
-            try:
-                persist_future.result()
-                steps.append(StepResult(
-                    "indicators_persist", True,
-                    int((time.monotonic() - persist_start) * 1000),
-                ))
-            except Exception as e:
-                steps.append(StepResult(
-                    "indicators_persist", False,
-                    int((time.monotonic() - persist_start) * 1000), str(e),
-                ))
-                logger.exception("[Pipeline] Failed to persist indicators to DB")
-
-    def _persist_indicators(self, rows: list[tuple], region: str) -> None:
+    def _compute_indicators(
+        self, markets: list[Market], incremental: bool, price_stores: PriceStores,
+    ) -> tuple[list[tuple], dict[str, dict[int, dict]]]:
+        with get_connection() as conn:
+            engine = IndicatorComputeEngine(conn)
+            ind_rows, stock_market_map = engine.compute(markets, price_stores, incremental)
+        return ind_rows, _indicator_rows_to_dicts(ind_rows, price_stores, stock_market_map)
+
+    def _persist_indicators(self, region: str, ind_rows: list[tuple]) -> None:
         markets = REGION_CONFIG[region]["markets"]
         with get_connection() as conn:
             engine = IndicatorComputeEngine(conn)
-            count = engine.persist(rows, markets)
+            count = engine.persist(ind_rows, markets)
             logger.info(f"[Pipeline] Persisted {count} indicator rows")
 
     # ── individual compute steps ──
 
-    def _compute_fundamentals(self, region: str, price_maps: PriceMaps | None = None) -> None:
+    def _compute_fundamentals(self, region: str, price_stores: PriceStores | None = None) -> None:
         markets = REGION_CONFIG[region]["markets"]
         with get_connection() as conn:
             engine = FundamentalComputeEngine(conn)
-            count = engine.run(markets, price_maps)
+            count = engine.run(markets, price_stores)
             logger.info(f"[Pipeline] Computed {count} fundamental rows")
 
-    def _compute_factors(self, region: str, price_maps: PriceMaps | None = None) -> None:
+    def _compute_factors(self, region: str, price_stores: PriceStores | None = None) -> None:
         markets = REGION_CONFIG[region]["markets"]
         with get_connection() as conn:
             engine = FactorComputeEngine(conn)
-            count = engine.run(markets, price_maps)
+            count = engine.run(markets, price_stores)
             logger.info(f"[Pipeline] Computed {count} factor exposure rows")
 
     def _compute_sector_aggregates(self, region: str) -> None:
@@ -0,0 +1,110 @@
+"""
+A PriceStore laid out in one contiguous buffer, optionally in shared memory
+so worker processes can attach to it by name.
+
+Workers attach once in their initializer and receive only (start, end)
+stock ranges, so no price rows are pickled per task. A shared block lives
+in /dev/shm, whose Docker default (64MB) is smaller than a 300-day US load;
+size the container's shm accordingly before enabling workers, or check
+fits_shared() first.
+"""
+
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from app.schema import PriceStore
+
+# 8-byte columns first so every view stays aligned; int32 dates go last
+_LAYOUT = [
+    ("offsets", np.int64), ("stock_ids", np.int64),
+    ("open", np.float64), ("high", np.float64), ("low", np.float64), ("close", np.float64),
+    ("volume", np.int64), ("dates", np.int32),
+]
+
+
+def _shapes(n_stocks: int, n_bars: int) -> dict[str, int]:
+    return {"offsets": n_stocks + 1, "stock_ids": n_stocks} | {
+        name: n_bars for name, _ in _LAYOUT[2:]
+    }
+
+
+def _block_size(n_stocks: int, n_bars: int) -> int:
+    shapes = _shapes(n_stocks, n_bars)
+    return sum(np.dtype(dt).itemsize * shapes[name] for name, dt in _LAYOUT)
+
+
+class PriceBlock:
+    def __init__(
+        self, buf, n_stocks: int, n_bars: int,
+        shm: SharedMemory | None = None, owner: bool = False,
+    ):
+        self._shm = shm
+        self._owner = owner
+        self.n_stocks = n_stocks
+        self.n_bars = n_bars
+
+        shapes = _shapes(n_stocks, n_bars)
+        columns, pos = {}, 0
+        for name, dt in _LAYOUT:
+            columns[name] = np.ndarray((shapes[name],), dtype=dt, buffer=buf, offset=pos)
+            pos += columns[name].nbytes
+        self.store = PriceStore(**columns)
+
+    @property
+    def handle(self) -> tuple[str, int, int]:
+        """Picklable (name, n_stocks, n_bars) for attach(); shared blocks only."""
+        return self._shm.name, self.n_stocks, self.n_bars
+
+    @classmethod
+    def from_store(cls, store: PriceStore, shared: bool = False) -> "PriceBlock":
+        n_stocks, n_bars = len(store), int(store.offsets[-1])
+        size = max(_block_size(n_stocks, n_bars), 1)
+        if shared:
+            shm = SharedMemory(create=True, size=size)
+            block = cls(shm.buf, n_stocks, n_bars, shm=shm, owner=True)
+        else:
+            block = cls(bytearray(size), n_stocks, n_bars)
+
+        for name, _ in _LAYOUT:
+            getattr(block.store, name)[:] = getattr(store, name)
+        return block
+
+    @staticmethod
+    def fits_shared(store: PriceStore) -> bool:
+        """Whether /dev/shm has room for a shared block of store; writing past it raises SIGBUS."""
+        try:
+            st = os.statvfs("/dev/shm")
+        except OSError:
+            return False
+        return st.f_bavail * st.f_frsize >= _block_size(len(store), int(store.offsets[-1]))
+
+    @classmethod
+    def attach(cls, handle: tuple[str, int, int]) -> "PriceBlock":
+        name, n_stocks, n_bars = handle
+        shm = SharedMemory(name=name, track=False)
+        return cls(shm.buf, n_stocks, n_bars, shm=shm)
+
+    def close(self) -> None:
+        # views must go before the mapping can be released
+        self.store = None
+        if self._shm is not None:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+
+    def __enter__(self) -> "PriceBlock":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def ranges(self, parts: int) -> list[tuple[int, int]]:
+        """Split stocks into `parts` contiguous ranges with roughly equal bar counts."""
+        if self.n_stocks == 0:
+            return []
+        targets = np.linspace(0, self.n_bars, parts + 1)[1:-1]
+        cuts = np.searchsorted(self.store.offsets, targets)
+        bounds = np.unique(np.concatenate([[0], cuts, [self.n_stocks]]))
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
@@ -1,18 +1,43 @@
-from .normalize import winsorize, z_score
-from .exposure import compute_exposures
-from .regression import constrained_wls
-from .covariance import ewm_factor_covariance, ewm_specific_variance
-from .beta import factor_beta, ols_beta, risk_decomposition, build_exposure_vector
+from .normalize import winsorize, z_score, winsorize_columns, z_score_columns
+from .exposure import compute_exposures, sector_codes, build_design_matrix
+from .regression import constrained_wls, constrained_wls_batch
+from .covariance import (
+    advance_ewm_moments,
+    advance_ewm_variance,
+    covariance_from_moments,
+    ewm_factor_covariance,
+    ewm_moments,
+    ewm_specific_variance,
+)
+from .beta import (
+    factor_beta,
+    factor_betas,
+    ols_beta,
+    risk_decomposition,
+    build_exposure_vector,
+    build_exposure_matrix,
+)
 
 __all__ = [
     "winsorize",
     "z_score",
+    "winsorize_columns",
+    "z_score_columns",
     "compute_exposures",
+    "sector_codes",
+    "build_design_matrix",
     "constrained_wls",
+    "constrained_wls_batch",
     "ewm_factor_covariance",
+    "ewm_moments",
+    "advance_ewm_moments",
+    "covariance_from_moments",
     "ewm_specific_variance",
+    "advance_ewm_variance",
     "factor_beta",
+    "factor_betas",
     "ols_beta",
     "risk_decomposition",
     "build_exposure_vector",
+    "build_exposure_matrix",
 ]
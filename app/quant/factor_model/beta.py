@@ -2,6 +2,7 @@
 Beta calculation — single source of truth.
 
 factor_beta : primary (Barra, requires ≥90 days factor history)
+factor_betas: factor_beta for all stocks of a market in one product
 ols_beta    : fallback (simple Cov/Var, used when factor history insufficient)
 """
 
@@ -23,6 +24,17 @@ def factor_beta(
     return float(X_i @ cov_matrix @ X_m / denom)
 
 
+def factor_betas(
+    X: np.ndarray, X_m: np.ndarray, cov_matrix: np.ndarray
+) -> np.ndarray:
+    """factor_beta for every row of X (N, K): X Σ_F X_m / (X_m' Σ_F X_m)"""
+    cov_m = cov_matrix @ X_m
+    denom = X_m @ cov_m
+    if denom == 0:
+        return np.ones(len(X))
+    return X @ cov_m / denom
+
+
 # ── Fallback: OLS beta (< 90 days factor history) ──
 
 def ols_beta(stock_returns: pd.Series, market_returns: pd.Series) -> float:
@@ -70,3 +82,28 @@ def build_exposure_vector(
     if sector and sector != "N/A" and sector in name_idx:
         X[name_idx[sector]] = 1.0
     return X
+
+
+def build_exposure_matrix(
+    style_values: np.ndarray,
+    sector_codes: np.ndarray,
+    sector_names: np.ndarray,
+    factor_names: list[str],
+) -> np.ndarray:
+    """
+    build_exposure_vector for many stocks at once: (N, 6) style z-scores and
+    (N,) codes into sector_names (-1 for none) → (N, K) in factor_names order.
+    """
+    name_idx = {n: i for i, n in enumerate(factor_names)}
+    X = np.zeros((len(style_values), len(factor_names)))
+    if "market" in name_idx:
+        X[:, name_idx["market"]] = 1.0
+    for j, f in enumerate(STYLE_FACTORS):
+        if f in name_idx:
+            X[:, name_idx[f]] = style_values[:, j]
+
+    column_of = np.array([name_idx.get(str(s), -1) for s in sector_names] + [-1], dtype=np.int64)
+    industry = column_of[sector_codes]  # code -1 reads the trailing -1
+    rows = np.flatnonzero(industry >= 0)
+    X[rows, industry[rows]] = 1.0
+    return X
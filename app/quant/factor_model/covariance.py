@@ -48,3 +48,76 @@ def ewm_specific_variance(
     weighted_mean = weights @ specific_returns
     centered = specific_returns - weighted_mean
     return (centered ** 2 * weights[:, None]).sum(axis=0)
+
+
+# ── recursive form ──
+# The window's decayed moments, with the newest date at age 0:
+#   sum   = Σ λ^age r          outer = Σ λ^age r r'
+# give the same covariance as ewm_factor_covariance over that window, and a
+# new date only needs a decay, one outer product added, and the outer
+# products of the dates leaving the window subtracted.
+
+def ewm_moments(
+    factor_returns: np.ndarray, halflife: int = 90
+) -> tuple[np.ndarray, np.ndarray]:
+    """(sum, outer) decayed moments of a (T, K) window, oldest row first."""
+    T = factor_returns.shape[0]
+    decay = 0.5 ** (1.0 / halflife)
+    raw_weights = decay ** np.arange(T - 1, -1, -1)
+    return raw_weights @ factor_returns, (factor_returns * raw_weights[:, None]).T @ factor_returns
+
+
+def advance_ewm_moments(
+    moments: tuple[np.ndarray, np.ndarray],
+    steps: int,
+    entering: np.ndarray,
+    entering_ages: np.ndarray,
+    leaving: np.ndarray,
+    leaving_ages: np.ndarray,
+    halflife: int = 90,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Age the moments by `steps` new dates, add the (n, K) rows entering the
+    window and remove those leaving it, each at its age after the step.
+    """
+    decay = 0.5 ** (1.0 / halflife)
+    total, outer = moments
+    w_in = decay ** np.asarray(entering_ages, dtype=float)
+    w_out = decay ** np.asarray(leaving_ages, dtype=float)
+    total = decay ** steps * total + w_in @ entering - w_out @ leaving
+    outer = (
+        decay ** steps * outer
+        + (entering * w_in[:, None]).T @ entering
+        - (leaving * w_out[:, None]).T @ leaving
+    )
+    return total, outer
+
+
+def covariance_from_moments(
+    moments: tuple[np.ndarray, np.ndarray], n_dates: int, halflife: int = 90
+) -> np.ndarray:
+    """(K, K) EWM covariance of a window of n_dates from its decayed moments."""
+    decay = 0.5 ** (1.0 / halflife)
+    weight = (1.0 - decay ** n_dates) / (1.0 - decay)
+    mean = moments[0] / weight
+    cov = moments[1] / weight - np.outer(mean, mean)
+    return (cov + cov.T) / 2
+
+
+def advance_ewm_variance(
+    weight: np.ndarray,
+    mean: np.ndarray,
+    var: np.ndarray,
+    specific_returns: np.ndarray,
+    halflife: int = 42,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ewm_specific_variance one observation at a time: per stock, the decayed
+    weight total, mean and variance of its history so far, advanced by one
+    new (N,) specific return. A fresh stock starts from zeros.
+    """
+    decay = 0.5 ** (1.0 / halflife)
+    weight = decay * weight + 1.0
+    a = 1.0 / weight
+    d = specific_returns - mean
+    return weight, mean + a * d, (1.0 - a) * (var + a * d * d)
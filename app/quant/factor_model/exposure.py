@@ -1,88 +1,88 @@
 import numpy as np
-import pandas as pd
 
-from .normalize import winsorize, z_score
+from .normalize import winsorize_columns, z_score_columns
 
 STYLE_FACTORS = ["size", "value", "momentum", "volatility", "quality", "leverage"]
 
 
 def compute_exposures(
-    stock_ids: np.ndarray,
-    close_prices: pd.Series,
-    shares_outstanding: pd.Series,
-    pbr: pd.Series,
-    roe: pd.Series,
-    operating_margin: pd.Series,
-    debt_ratio: pd.Series,
-    returns_252: pd.Series,
-    returns_21: pd.Series,
-    ewm_vol: pd.Series,
-    sectors: pd.Series,
-) -> tuple[pd.DataFrame, pd.DataFrame]:
+    mcap: np.ndarray,
+    pbr: np.ndarray,
+    roe: np.ndarray,
+    operating_margin: np.ndarray,
+    debt_ratio: np.ndarray,
+    returns_252: np.ndarray,
+    returns_21: np.ndarray,
+    ewm_vol: np.ndarray,
+) -> np.ndarray:
     """
-    Compute standardized factor exposures for all stocks.
+    Compute standardized style exposures for all stocks.
+
+    Inputs are (N,) float arrays aligned on the same stocks, NaN where missing.
 
     Returns:
-        (style_exposures, industry_dummies) — both indexed by stock_id.
-        style_exposures: DataFrame[stock_id, 6 style z-scores]
-        industry_dummies: DataFrame[stock_id, one-hot industry columns]
+        (N, 6) matrix of style z-scores in STYLE_FACTORS order; NaN where the
+        raw value was missing, all zeros for a factor with fewer than 2 values.
     """
-    exposures = pd.DataFrame(index=stock_ids)
-
-    # ensure float64 dtype
-    close_prices = close_prices.astype(float)
-    shares_outstanding = shares_outstanding.astype(float)
-    pbr = pbr.astype(float)
-
-    # raw values
-    mcap = shares_outstanding * close_prices
-    exposures["size"] = np.log(mcap.where(mcap > 0, np.nan))
-    exposures["value"] = (1.0 / pbr).replace([np.inf, -np.inf], np.nan)
-    exposures["momentum"] = returns_252 - returns_21
-    exposures["volatility"] = ewm_vol
+    with np.errstate(divide="ignore", invalid="ignore"):
+        size = np.log(np.where(mcap > 0, mcap, np.nan))
+        value = 1.0 / pbr
+    value[np.isinf(value)] = np.nan
 
     # Quality = equal-weighted average of ROE z-score + operating_margin z-score
-    roe_z = z_score(winsorize(roe.reindex(stock_ids)))
-    opm_z = z_score(winsorize(operating_margin.reindex(stock_ids)))
-    exposures["quality"] = (roe_z + opm_z) / 2
+    quality = z_score_columns(winsorize_columns(np.column_stack([roe, operating_margin]))).mean(axis=1)
 
-    exposures["leverage"] = debt_ratio
+    raw = np.column_stack([size, value, returns_252 - returns_21, ewm_vol, quality, debt_ratio])
 
-    # standardize: winsorize → z_score (weighted by sqrt market cap)
-    sqrt_mcap = np.sqrt(mcap.reindex(stock_ids).clip(lower=0)).replace(0, np.nan)
-    for col in STYLE_FACTORS:
-        raw = exposures[col].copy()
-        valid = raw.dropna()
-        if len(valid) < 2:
-            exposures[col] = 0.0
-            continue
-        w = winsorize(valid)
-        exposures.loc[valid.index, col] = z_score(w, weights=sqrt_mcap.reindex(valid.index))
+    # standardize: winsorize → z_score (weighted by sqrt market cap), all factors at once
+    with np.errstate(invalid="ignore"):
+        sqrt_mcap = np.sqrt(np.clip(mcap, 0, None))
+    sqrt_mcap[sqrt_mcap == 0] = np.nan
+    exposures = z_score_columns(winsorize_columns(raw), weights=sqrt_mcap)
+    exposures[:, (~np.isnan(raw)).sum(axis=0) < 2] = 0.0
+    return exposures
 
-    # industry dummies from sector
-    valid_sectors = sectors.reindex(stock_ids).dropna()
-    valid_sectors = valid_sectors[valid_sectors != "N/A"]
-    industry_dummies = pd.get_dummies(valid_sectors, dtype=float)
-    industry_dummies = industry_dummies.reindex(stock_ids, fill_value=0.0)
 
-    return exposures[STYLE_FACTORS], industry_dummies
+def sector_codes(sectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Integer industry code per stock (-1 for missing or "N/A") and the
+    sorted industry names the codes index into.
+    """
+    known = np.array([s is not None and s != "N/A" for s in sectors], dtype=bool)
+    codes = np.full(len(sectors), -1, dtype=np.int64)
+    names, codes[known] = np.unique(sectors[known].astype(str), return_inverse=True)
+    return codes, names
 
 
 def build_design_matrix(
-    style_exposures: pd.DataFrame,
-    industry_dummies: pd.DataFrame,
-) -> pd.DataFrame:
+    style_exposures: np.ndarray,
+    codes: np.ndarray,
+    industry_names: np.ndarray,
+) -> tuple[np.ndarray, list[str], int, np.ndarray]:
     """
-    Build full design matrix X = [market(1) | styles(S) | industries(I)].
-    Only includes rows where all style factors are non-NaN.
-    Drops zero-variance industry columns to prevent singular KKT matrix.
+    Build full design matrix X = [market(1) | styles(S) | industries(I)] for
+    rows with complete style exposures. Drops all-zero style and industry
+    columns to prevent a singular KKT matrix.
+
+    Returns:
+        (X, factor_names, n_styles, industry_codes) — industry_codes are the
+        sector codes behind X's industry columns, in column order.
     """
-    market_col = pd.DataFrame(
-        {"market": 1.0}, index=style_exposures.index
+    n = len(style_exposures)
+    styles = np.flatnonzero((style_exposures != 0).any(axis=0))
+    industries = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(industry_names)))
+    column_of = np.full(len(industry_names), -1, dtype=np.int64)
+    column_of[industries] = np.arange(len(industries))
+
+    X = np.zeros((n, 1 + len(styles) + len(industries)))
+    X[:, 0] = 1.0
+    X[:, 1:1 + len(styles)] = style_exposures[:, styles]
+    rows = np.flatnonzero(codes >= 0)
+    X[rows, 1 + len(styles) + column_of[codes[rows]]] = 1.0
+
+    factor_names = (
+        ["market"]
+        + [STYLE_FACTORS[j] for j in styles]
+        + [str(industry_names[k]) for k in industries]
     )
-    X = pd.concat([market_col, style_exposures, industry_dummies], axis=1)
-    X = X.dropna()
-    zero_cols = X.columns[(X == 0).all()]
-    if len(zero_cols) > 0:
-        X = X.drop(columns=zero_cols)
-    return X
+    return X, factor_names, len(styles), industries
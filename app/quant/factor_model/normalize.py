@@ -1,3 +1,6 @@
+import warnings
+
+import numpy as np
 import pandas as pd
 
 
@@ -19,3 +22,39 @@ def z_score(series: pd.Series, weights: pd.Series | None = None) -> pd.Series:
     else:
         mean, std = series.mean(), series.std()
     return (series - mean) / std if std > 0 else series * 0
+
+
+# ── column-wise NumPy versions (NaN = missing) ──
+
+def winsorize_columns(values: np.ndarray, n_mad: float = 3.0) -> np.ndarray:
+    """winsorize() applied to every column of an (N, F) array at once."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+        median = np.nanmedian(values, axis=0)
+        mad = np.nanmedian(np.abs(values - median), axis=0) * 1.4826
+    clip = mad > 0
+    lower = np.where(clip, median - n_mad * mad, -np.inf)
+    upper = np.where(clip, median + n_mad * mad, np.inf)
+    return np.clip(values, lower, upper)
+
+
+def z_score_columns(values: np.ndarray, weights: np.ndarray | None = None) -> np.ndarray:
+    """
+    z_score() applied to every column of an (N, F) array at once. With (N,)
+    weights, rows whose weight is NaN are standardized but do not move the
+    mean or std, as in the pandas version.
+    """
+    present = ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if weights is not None:
+            w = np.where(present & ~np.isnan(weights)[:, None], weights[:, None], 0.0)
+            w = w / w.sum(axis=0)
+            filled = np.where(present, values, 0.0)
+            mean = (filled * w).sum(axis=0)
+            std = np.sqrt((np.where(present, (values - mean) ** 2, 0.0) * w).sum(axis=0))
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # fewer than two values
+                mean = np.nanmean(values, axis=0)
+                std = np.nanstd(values, axis=0, ddof=1)
+        return np.where(std > 0, (values - mean) / std, values * 0)
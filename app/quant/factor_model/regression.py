@@ -15,6 +15,8 @@ def constrained_wls(
         [X'WX  C] [f]   [X'Wy]
         [C'    0] [λ] = [  0  ]
 
+    Solved through its block structure, see constrained_wls_batch.
+
     Parameters:
         y: (N,) excess returns
         X: (N, 1+S+I) design matrix [market(1) | styles(S) | industries(I)]
@@ -25,28 +27,98 @@ def constrained_wls(
     Returns:
         (factor_returns, specific_returns)
     """
-    N, K = X.shape
-    w_norm = w / w.sum()
-
-    # element-wise weighting: O(N×K) memory, avoids np.diag(N×N)
-    Xw = X * w_norm[:, None]
-    XtWX = Xw.T @ X
-    XtWy = Xw.T @ y
-
-    # constraint vector C: mcap weights at industry factor positions
-    # industry columns start at index 1 (market) + n_styles
-    C = np.zeros(K)
-    C[1 + n_styles:] = industry_mcap_weights
-
-    # build KKT system
-    KKT = np.zeros((K + 1, K + 1))
-    KKT[:K, :K] = XtWX
-    KKT[:K, K] = C
-    KKT[K, :K] = C
-    rhs = np.zeros(K + 1)
-    rhs[:K] = XtWy
-
-    solution = np.linalg.solve(KKT, rhs)
-    factor_returns = solution[:K]
-    specific_returns = y - X @ factor_returns
-    return factor_returns, specific_returns
+    p = 1 + n_styles
+    industries = X[:, p:]
+    codes = np.where(industries.any(axis=1), industries.argmax(axis=1), -1)
+    factor_returns, specific_returns = constrained_wls_batch(
+        y, X[:, :p], codes, np.zeros(len(y), dtype=np.int64), w, industry_mcap_weights[None, :],
+    )
+    return factor_returns[0], specific_returns
+
+
+def constrained_wls_batch(
+    y: np.ndarray,
+    X_dense: np.ndarray,
+    codes: np.ndarray,
+    dates: np.ndarray,
+    w: np.ndarray,
+    industry_mcap_weights: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    constrained_wls for many cross-sections at once, rows of all dates stacked.
+
+    With one-hot industries X'WX is block-arrow: a small dense block A over
+    [market | styles], a cross block B, and a diagonal industry block D. The
+    industry returns are eliminated through D, leaving a (1+S+1)-square Schur
+    complement system in the dense returns and λ per date:
+
+        [A − B D⁻¹B'   −B D⁻¹c ] [f_d]   [r_d − B D⁻¹r_i]
+        [−c'D⁻¹B'      −c'D⁻¹c ] [ λ ] = [   −c'D⁻¹r_i  ]
+
+        f_i = D⁻¹(r_i − B'f_d − cλ)
+
+    All dates are solved in one batched np.linalg.solve. A factor with no
+    exposure on a date (all-zero style column, empty industry) gets return 0
+    there, as if its column had been dropped.
+
+    Parameters:
+        y: (R,) excess returns
+        X_dense: (R, 1+S) [market | styles] exposures
+        codes: (R,) industry index in [0, I), -1 for none
+        dates: (R,) cross-section index in [0, T)
+        w: (R,) weights = sqrt(market_cap)
+        industry_mcap_weights: (T, I) mcap share per industry and date
+
+    Returns:
+        (factor_returns (T, 1+S+I), specific_returns (R,))
+    """
+    T, I = industry_mcap_weights.shape
+    p = X_dense.shape[1]
+    w_norm = w / np.bincount(dates, weights=w, minlength=T)[dates]
+
+    # ── sufficient statistics per date ──
+    A = np.empty((T, p, p))
+    for k in range(p):
+        for l in range(k, p):
+            A[:, k, l] = A[:, l, k] = np.bincount(dates, weights=w_norm * X_dense[:, k] * X_dense[:, l], minlength=T)
+    r_d = np.stack(
+        [np.bincount(dates, weights=w_norm * X_dense[:, k] * y, minlength=T) for k in range(p)], axis=1,
+    )
+
+    has = codes >= 0
+    cell = dates[has] * I + codes[has]  # (date, industry) slot
+    wi = w_norm[has]
+    d = np.bincount(cell, weights=wi, minlength=T * I).reshape(T, I)
+    r_i = np.bincount(cell, weights=wi * y[has], minlength=T * I).reshape(T, I)
+    B = np.stack(
+        [np.bincount(cell, weights=wi * X_dense[has, k], minlength=T * I).reshape(T, I) for k in range(p)],
+        axis=1,
+    )  # (T, p, I)
+
+    # ── Schur complement on the dense block + λ ──
+    d_inv = np.divide(1.0, d, out=np.zeros_like(d), where=d > 0)
+    c = np.where(d > 0, industry_mcap_weights, 0.0)
+    BD = B * d_inv[:, None, :]
+
+    S = np.empty((T, p + 1, p + 1))
+    S[:, :p, :p] = A - BD @ B.transpose(0, 2, 1)
+    S[:, :p, p] = S[:, p, :p] = -(BD @ c[:, :, None])[:, :, 0]
+    S[:, p, p] = -(c * d_inv * c).sum(axis=1)
+    rhs = np.empty((T, p + 1))
+    rhs[:, :p] = r_d - (BD @ r_i[:, :, None])[:, :, 0]
+    rhs[:, p] = -(c * d_inv * r_i).sum(axis=1)
+
+    # absent factors (and λ on dates without industries) are pinned to 0
+    absent = np.concatenate([np.diagonal(A, axis1=1, axis2=2) == 0, ~(d > 0).any(axis=1)[:, None]], axis=1)
+    S[absent[:, :, None] | absent[:, None, :]] = 0.0
+    S[:, np.arange(p + 1), np.arange(p + 1)] += absent
+    rhs[absent] = 0.0
+
+    solution = np.linalg.solve(S, rhs[:, :, None])[:, :, 0]
+    f_d, lam = solution[:, :p], solution[:, p]
+    f_i = d_inv * (r_i - (B.transpose(0, 2, 1) @ f_d[:, :, None])[:, :, 0] - c * lam[:, None])
+
+    factor_returns = np.concatenate([f_d, f_i], axis=1)
+    fitted = (X_dense * f_d[dates]).sum(axis=1)
+    fitted[has] += f_i[dates[has], codes[has]]
+    return factor_returns, y - fitted
@@ -0,0 +1,365 @@
+"""
+Columnar indicator kernels — every stock of a market in one NumPy pass.
+
+Inputs are (N, T) matrices: one row per stock, aligned on the right edge
+(column T-1 is each stock's latest bar) and NaN-padded on the left.
+Each kernel mirrors its per-stock pandas counterpart in this package,
+so the last column matches what the pandas path would report.
+"""
+
+import numpy as np
+
+PERIOD = 14
+MA_PERIOD = 20
+STOCH_K = 14
+STOCH_D = 3
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BB_STD = 2.0
+SAR_AF_START, SAR_AF_STEP, SAR_AF_MAX = 0.02, 0.02, 0.2
+
+
+def span_alpha(span: int) -> float:
+    return 2.0 / (1.0 + span)
+
+
+def ewm_step(
+    mean: np.ndarray, old_wt: np.ndarray, cur: np.ndarray, alpha: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Advance a pandas-style ewm(alpha, adjust=False) state by one bar.
+
+    NaN bars follow pandas' ignore_na=False rule: the previous mean keeps
+    decaying across the gap and is carried forward unchanged.
+    """
+    obs = ~np.isnan(cur)
+    started = ~np.isnan(mean)
+
+    old_wt = np.where(started, old_wt * (1.0 - alpha), old_wt)
+    upd = started & obs & (mean != cur)
+    with np.errstate(invalid="ignore"):
+        mean = np.where(upd, (old_wt * mean + alpha * cur) / (old_wt + alpha), mean)
+    old_wt = np.where(started & obs, 1.0, old_wt)
+    mean = np.where(~started & obs, cur, mean)
+    return mean, old_wt
+
+
+def ewm_mean(x: np.ndarray, alpha: float, min_periods: int = 0) -> np.ndarray:
+    """Row-wise EWM mean, identical to pandas ewm(alpha, adjust=False).mean()."""
+    N, T = x.shape
+    out = np.full((N, T), np.nan)
+    mean = np.full(N, np.nan)
+    old_wt = np.ones(N)
+    nobs = np.zeros(N, dtype=np.int64)
+    min_periods = max(min_periods, 1)
+
+    for t in range(T):
+        cur = x[:, t]
+        nobs += ~np.isnan(cur)
+        mean, old_wt = ewm_step(mean, old_wt, cur, alpha)
+        out[:, t] = np.where(nobs >= min_periods, mean, np.nan)
+    return out
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    out = np.full_like(x, np.nan)
+    out[:, 1:] = x[:, :-1]
+    return out
+
+
+def _windows(x: np.ndarray, window: int, count: int = 1) -> np.ndarray:
+    """The last `count` windows of each row: (N, count, window)."""
+    tail = x[:, -(window + count - 1):]
+    return np.lib.stride_tricks.sliding_window_view(tail, window, axis=1)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    return true_range_step(high, low, _shift(close))
+
+
+def true_range_step(high: np.ndarray, low: np.ndarray, prev_close: np.ndarray) -> np.ndarray:
+    tr = np.fmax(high - low, np.abs(high - prev_close))
+    return np.fmax(tr, np.abs(low - prev_close))
+
+
+def directional_movement(
+    high: np.ndarray, low: np.ndarray, prev_high: np.ndarray, prev_low: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    plus_dm = high - prev_high
+    minus_dm = prev_low - low
+    plus_dm = np.where((plus_dm > minus_dm) & (plus_dm > 0), plus_dm, 0.0)
+    minus_dm = np.where((minus_dm > plus_dm) & (minus_dm > 0), minus_dm, 0.0)
+    return plus_dm, minus_dm
+
+
+# ── last-value kernels ──
+
+def sma_last(x: np.ndarray, period: int = MA_PERIOD) -> np.ndarray:
+    return x[:, -period:].mean(axis=1)
+
+
+def wma_last(x: np.ndarray, period: int = MA_PERIOD) -> np.ndarray:
+    weights = np.arange(1, period + 1, dtype=float)
+    weights /= weights.sum()
+    return x[:, -period:] @ weights
+
+
+def ema_last(x: np.ndarray, period: int = MA_PERIOD) -> np.ndarray:
+    return ewm_mean(x, span_alpha(period))[:, -1]
+
+
+def rsi_last(close: np.ndarray, period: int = PERIOD) -> np.ndarray:
+    valid = ~np.isnan(close)
+    delta = np.diff(close, axis=1, prepend=np.nan)
+    gain = np.where(valid, np.where(delta > 0, delta, 0.0), np.nan)
+    loss = np.where(valid, np.where(delta < 0, -delta, 0.0), np.nan)
+
+    avg_gain = ewm_mean(gain, 1 / period, period)[:, -1]
+    avg_loss = ewm_mean(loss, 1 / period, period)[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def macd_last(
+    close: np.ndarray,
+    fast_period: int = MACD_FAST,
+    slow_period: int = MACD_SLOW,
+    signal_period: int = MACD_SIGNAL,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    macd_line = ewm_mean(close, span_alpha(fast_period)) - ewm_mean(close, span_alpha(slow_period))
+    signal = ewm_mean(macd_line, span_alpha(signal_period))[:, -1]
+    line = macd_line[:, -1]
+    return line, signal, line - signal
+
+
+def stochastic_last(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    k_period: int = STOCH_K,
+    d_period: int = STOCH_D,
+) -> tuple[np.ndarray, np.ndarray]:
+    lowest = _windows(low, k_period, d_period).min(axis=2)
+    highest = _windows(high, k_period, d_period).max(axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100 * (close[:, -d_period:] - lowest) / (highest - lowest)
+    return k[:, -1], k.mean(axis=1)
+
+
+def bollinger_last(
+    close: np.ndarray, period: int = MA_PERIOD, std_dev: float = BB_STD,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    window = close[:, -period:]
+    middle = window.mean(axis=1)
+    std = window.std(axis=1, ddof=1)
+    return middle + std * std_dev, middle, middle - std * std_dev
+
+
+def atr_last(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = PERIOD,
+) -> np.ndarray:
+    return ewm_mean(true_range(high, low, close), 1 / period, period)[:, -1]
+
+
+def adx_last(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = PERIOD,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    valid = ~np.isnan(close)
+    plus_dm, minus_dm = directional_movement(high, low, _shift(high), _shift(low))
+    plus_dm = np.where(valid, plus_dm, np.nan)
+    minus_dm = np.where(valid, minus_dm, np.nan)
+
+    alpha = 1 / period
+    atr_val = ewm_mean(true_range(high, low, close), alpha, period)
+    atr_val[atr_val == 0] = np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * (ewm_mean(plus_dm, alpha, period) / atr_val)
+        minus_di = 100 * (ewm_mean(minus_dm, alpha, period) / atr_val)
+        di_sum = plus_di + minus_di
+        di_sum[di_sum == 0] = np.nan
+        dx = 100 * np.abs(plus_di - minus_di) / di_sum
+    adx_val = ewm_mean(dx, alpha, period)
+
+    return plus_di[:, -1], minus_di[:, -1], adx_val[:, -1]
+
+
+def sar_step(
+    bars: np.ndarray,
+    sar: np.ndarray, ep: np.ndarray, af: np.ndarray, uptrend: np.ndarray,
+    high: np.ndarray, low: np.ndarray,
+    prev_high: np.ndarray, prev_low: np.ndarray,
+    prev2_high: np.ndarray, prev2_low: np.ndarray,
+    af_start: float = SAR_AF_START,
+    af_step: float = SAR_AF_STEP,
+    af_max: float = SAR_AF_MAX,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    One bar of trend.parabolic_sar for many stocks; `bars` counts the bars
+    already folded in. The initial trend depends on the second bar, so the
+    seed values are (re)derived once that bar arrives.
+    """
+    first = bars == 0
+    second = bars == 1
+
+    init_up = high > prev_high
+    sar = np.where(second, np.where(init_up, prev_low, prev_high), sar)
+    ep = np.where(second, np.where(init_up, prev_high, prev_low), ep)
+    af = np.where(second, af_start, af)
+    uptrend = np.where(second, init_up, uptrend)
+
+    s = sar + af * (ep - sar)
+    s_up = np.minimum(s, prev_low)
+    s_up = np.where(bars >= 2, np.minimum(s_up, prev2_low), s_up)
+    s_dn = np.maximum(s, prev_high)
+    s_dn = np.where(bars >= 2, np.maximum(s_dn, prev2_high), s_dn)
+    s = np.where(uptrend, s_up, s_dn)
+
+    flip_dn = uptrend & (low < s)
+    flip_up = ~uptrend & (high > s)
+    ext_up = uptrend & ~flip_dn & (high > ep)
+    ext_dn = ~uptrend & ~flip_up & (low < ep)
+    flip = flip_dn | flip_up
+
+    new_sar = np.where(flip, ep, s)
+    new_ep = np.select([flip_dn | ext_dn, flip_up | ext_up], [low, high], ep)
+    new_af = np.where(flip, af_start, np.where(ext_up | ext_dn, np.minimum(af + af_step, af_max), af))
+    new_up = uptrend ^ flip
+
+    return (
+        np.where(first, low, new_sar),
+        np.where(first, high, new_ep),
+        np.where(first, af_start, new_af),
+        np.where(first, True, new_up),
+    )
+
+
+def parabolic_sar(
+    high: np.ndarray,
+    low: np.ndarray,
+    af_start: float = SAR_AF_START,
+    af_step: float = SAR_AF_STEP,
+    af_max: float = SAR_AF_MAX,
+) -> np.ndarray:
+    """
+    (N, T) SAR series, bar-for-bar equal to trend.parabolic_sar on each row's
+    bars. Loops over days only; every stock advances in the same step.
+    """
+    N, T = high.shape
+    out = np.full((N, T), np.nan)
+    bars = np.zeros(N, dtype=np.int64)
+    sar = np.full(N, np.nan)
+    ep = np.full(N, np.nan)
+    af = np.full(N, af_start)
+    uptrend = np.ones(N, dtype=bool)
+    nan = np.full(N, np.nan)
+
+    for t in range(T):
+        valid = ~np.isnan(high[:, t])
+        if not valid.any():
+            continue
+        stepped = sar_step(
+            bars, sar, ep, af, uptrend,
+            high[:, t], low[:, t],
+            high[:, t - 1] if t >= 1 else nan, low[:, t - 1] if t >= 1 else nan,
+            high[:, t - 2] if t >= 2 else nan, low[:, t - 2] if t >= 2 else nan,
+            af_start, af_step, af_max,
+        )
+        sar, ep, af, uptrend = (np.where(valid, new, old) for new, old in zip(stepped, (sar, ep, af, uptrend)))
+        # the first bar's SAR is only known once the second bar fixes the trend
+        second = np.flatnonzero(valid & (bars == 1))
+        out[second, t - 1] = np.where(
+            high[second, t] > high[second, t - 1], low[second, t - 1], high[second, t - 1],
+        )
+        bars += valid
+        out[:, t] = np.where(valid, sar, np.nan)
+    return out
+
+
+def parabolic_sar_last(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    return parabolic_sar(high, low)[:, -1]
+
+
+def obv_last(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    direction = np.sign(np.diff(close, axis=1))
+    return np.nansum(volume[:, 1:] * direction, axis=1)
+
+
+def vma_last(volume: np.ndarray, period: int = MA_PERIOD) -> np.ndarray:
+    return volume[:, -period:].mean(axis=1)
+
+
+# ── risk metrics ──
+
+def daily_returns(close: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return close / _shift(close) - 1
+
+
+def align_benchmark(
+    dates: np.ndarray, bench_dates: np.ndarray, bench_returns: np.ndarray,
+) -> np.ndarray:
+    """
+    Gather benchmark returns onto the (N, T) date grid of the stocks.
+
+    dates / bench_dates are integer day ordinals (0 marks left padding);
+    bench_dates must be sorted. Missing dates become NaN.
+    """
+    if len(bench_dates) == 0:
+        return np.full(dates.shape, np.nan)
+    pos = np.clip(np.searchsorted(bench_dates, dates), 0, len(bench_dates) - 1)
+    hit = bench_dates[pos] == dates
+    return np.where(hit, bench_returns[pos], np.nan)
+
+
+def _masked_mean(x: np.ndarray, mask: np.ndarray, n: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mask, x, 0.0).sum(axis=1) / n
+
+
+def ols_beta(stock_ret: np.ndarray, market_ret: np.ndarray) -> np.ndarray:
+    """β = Cov(R_i, R_m) / Var(R_m) over dates where both returns exist."""
+    mask = ~np.isnan(stock_ret) & ~np.isnan(market_ret)
+    n = mask.sum(axis=1)
+    s_mean = _masked_mean(stock_ret, mask, n)
+    m_mean = _masked_mean(market_ret, mask, n)
+    s_dev = np.where(mask, stock_ret - s_mean[:, None], 0.0)
+    m_dev = np.where(mask, market_ret - m_mean[:, None], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (s_dev * m_dev).sum(axis=1) / (n - 1)
+        var = (m_dev ** 2).sum(axis=1) / (n - 1)
+        beta = cov / var
+    return np.where((n < 2) | (var == 0), 0.0, beta)
+
+
+def alpha(
+    stock_ret: np.ndarray,
+    market_ret: np.ndarray,
+    risk_free_rate: float,
+    beta_value: np.ndarray,
+    annualize: bool = True,
+) -> np.ndarray:
+    mask = ~np.isnan(stock_ret) & ~np.isnan(market_ret)
+    n = mask.sum(axis=1)
+    daily_rf = risk_free_rate / 100 / 252
+    stock_mean = _masked_mean(stock_ret, mask, n)
+    market_mean = _masked_mean(market_ret, mask, n)
+    daily_alpha = stock_mean - (daily_rf + beta_value * (market_mean - daily_rf))
+    result = daily_alpha * 252 if annualize else daily_alpha
+    return np.where(n < 2, 0.0, result)
+
+
+def sharpe_ratio(
+    returns: np.ndarray, risk_free_rate: float, annualize: bool = True,
+) -> np.ndarray:
+    mask = ~np.isnan(returns)
+    n = mask.sum(axis=1)
+    daily_rf = risk_free_rate / 100 / 252
+    mean = _masked_mean(returns, mask, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dev = np.where(mask, returns - mean[:, None], 0.0)
+        std = np.sqrt((dev ** 2).sum(axis=1) / (n - 1))
+        ratio = (mean - daily_rf) / std
+    if annualize:
+        ratio = ratio * (252 ** 0.5)
+    return np.where((n < 2) | (std == 0), 0.0, ratio)
@@ -0,0 +1,301 @@
+"""
+Streaming indicator state — fold new bars into per-stock recursive state.
+
+Recursive indicators (EMA/MACD, Wilder RSI/ATR/ADX, SAR) only need their
+last smoothed values; windowed ones (SMA/WMA/Bollinger/Stochastic/VMA, OBV
+and the risk metrics) read from right-aligned ring buffers of the last
+WINDOW bars. One daily bar therefore costs O(1) per stock instead of a
+300-bar recompute. The state is exact with respect to batch.py except that
+the EWMs remember bars older than the 300-bar history window, whose weight
+has decayed to well below the 4-decimal precision we store.
+"""
+
+from dataclasses import dataclass, fields
+from datetime import date
+
+import numpy as np
+
+from app.quant.indicators import batch
+
+WINDOW = 300
+HL_WINDOW = batch.STOCH_K + batch.STOCH_D - 1
+
+_ALPHA_EMA = batch.span_alpha(batch.MA_PERIOD)
+_ALPHA_FAST = batch.span_alpha(batch.MACD_FAST)
+_ALPHA_SLOW = batch.span_alpha(batch.MACD_SLOW)
+_ALPHA_SIGNAL = batch.span_alpha(batch.MACD_SIGNAL)
+_ALPHA_WILDER = 1 / batch.PERIOD
+
+
+@dataclass
+class IndicatorState:
+    """Per-stock state, one row per stock; buffers are NaN / 0 padded on the left."""
+    stock_ids: np.ndarray
+    bars: np.ndarray
+    ema_20: np.ndarray
+    macd_fast: np.ndarray
+    macd_slow: np.ndarray
+    macd_signal: np.ndarray
+    avg_gain: np.ndarray
+    avg_loss: np.ndarray
+    atr_14: np.ndarray
+    plus_dm: np.ndarray
+    minus_dm: np.ndarray
+    dx: np.ndarray
+    dx_weight: np.ndarray
+    dx_count: np.ndarray
+    obv: np.ndarray
+    sar: np.ndarray
+    sar_ep: np.ndarray
+    sar_af: np.ndarray
+    sar_uptrend: np.ndarray
+    dates: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.stock_ids)
+
+    @classmethod
+    def empty(cls, stock_ids) -> "IndicatorState":
+        n = len(stock_ids)
+        return cls(
+            stock_ids=np.asarray(stock_ids, dtype=np.int64),
+            bars=np.zeros(n, dtype=np.int64),
+            **{name: np.full(n, np.nan) for name in SCALAR_FIELDS if name not in _NON_FLOAT},
+            dx_weight=np.ones(n),
+            dx_count=np.zeros(n, dtype=np.int64),
+            obv=np.zeros(n),
+            sar_af=np.full(n, batch.SAR_AF_START),
+            sar_uptrend=np.ones(n, dtype=bool),
+            dates=np.zeros((n, WINDOW), dtype=np.int64),
+            close=np.full((n, WINDOW), np.nan),
+            volume=np.full((n, WINDOW), np.nan),
+            high=np.full((n, HL_WINDOW), np.nan),
+            low=np.full((n, HL_WINDOW), np.nan),
+        )
+
+    @classmethod
+    def concat(cls, states: list["IndicatorState"]) -> "IndicatorState":
+        return cls(**{
+            f.name: np.concatenate([getattr(s, f.name) for s in states])
+            for f in fields(cls)
+        })
+
+    def take(self, idx: np.ndarray) -> "IndicatorState":
+        return IndicatorState(**{f.name: getattr(self, f.name)[idx] for f in fields(self)})
+
+    def last_dates(self) -> np.ndarray:
+        return self.dates[:, -1]
+
+
+SCALAR_FIELDS = (
+    "bars", "ema_20", "macd_fast", "macd_slow", "macd_signal",
+    "avg_gain", "avg_loss", "atr_14", "plus_dm", "minus_dm",
+    "dx", "dx_weight", "dx_count", "obv",
+    "sar", "sar_ep", "sar_af", "sar_uptrend",
+)
+BUFFER_FIELDS = ("dates", "close", "volume", "high", "low")
+_NON_FLOAT = ("bars", "dx_weight", "dx_count", "obv", "sar_af", "sar_uptrend")
+
+
+# ── state transitions ──
+
+def _directional_index(
+    bars: np.ndarray, atr_val: np.ndarray, plus_dm: np.ndarray, minus_dm: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    ready = bars >= batch.PERIOD
+    atr_val = np.where(ready & (atr_val != 0), atr_val, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * (np.where(ready, plus_dm, np.nan) / atr_val)
+        minus_di = 100 * (np.where(ready, minus_dm, np.nan) / atr_val)
+    return plus_di, minus_di
+
+
+def _fold(
+    st: IndicatorState, idx: np.ndarray,
+    high: np.ndarray, low: np.ndarray, close: np.ndarray,
+    prev_high: np.ndarray, prev_low: np.ndarray, prev_close: np.ndarray,
+    prev2_high: np.ndarray, prev2_low: np.ndarray,
+) -> None:
+    """Fold one bar into the recursive (EWM / SAR) fields of rows `idx`."""
+    ones = np.ones(len(idx))
+    bars = st.bars[idx]
+
+    st.ema_20[idx], _ = batch.ewm_step(st.ema_20[idx], ones, close, _ALPHA_EMA)
+    fast, _ = batch.ewm_step(st.macd_fast[idx], ones, close, _ALPHA_FAST)
+    slow, _ = batch.ewm_step(st.macd_slow[idx], ones, close, _ALPHA_SLOW)
+    st.macd_signal[idx], _ = batch.ewm_step(st.macd_signal[idx], ones, fast - slow, _ALPHA_SIGNAL)
+    st.macd_fast[idx], st.macd_slow[idx] = fast, slow
+
+    delta = close - prev_close
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    st.avg_gain[idx], _ = batch.ewm_step(st.avg_gain[idx], ones, gain, _ALPHA_WILDER)
+    st.avg_loss[idx], _ = batch.ewm_step(st.avg_loss[idx], ones, loss, _ALPHA_WILDER)
+
+    tr = batch.true_range_step(high, low, prev_close)
+    plus_dm, minus_dm = batch.directional_movement(high, low, prev_high, prev_low)
+    atr_val, _ = batch.ewm_step(st.atr_14[idx], ones, tr, _ALPHA_WILDER)
+    plus_dm, _ = batch.ewm_step(st.plus_dm[idx], ones, plus_dm, _ALPHA_WILDER)
+    minus_dm, _ = batch.ewm_step(st.minus_dm[idx], ones, minus_dm, _ALPHA_WILDER)
+    st.atr_14[idx], st.plus_dm[idx], st.minus_dm[idx] = atr_val, plus_dm, minus_dm
+
+    plus_di, minus_di = _directional_index(bars + 1, atr_val, plus_dm, minus_dm)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        di_sum = plus_di + minus_di
+        dx = 100 * np.abs(plus_di - minus_di) / np.where(di_sum == 0, np.nan, di_sum)
+    st.dx[idx], st.dx_weight[idx] = batch.ewm_step(st.dx[idx], st.dx_weight[idx], dx, _ALPHA_WILDER)
+    st.dx_count[idx] += ~np.isnan(dx)
+
+    st.sar[idx], st.sar_ep[idx], st.sar_af[idx], st.sar_uptrend[idx] = batch.sar_step(
+        bars, st.sar[idx], st.sar_ep[idx], st.sar_af[idx], st.sar_uptrend[idx],
+        high, low, prev_high, prev_low, prev2_high, prev2_low,
+    )
+    st.bars[idx] = bars + 1
+
+
+def from_history(
+    stock_ids, dates: np.ndarray, high: np.ndarray, low: np.ndarray,
+    close: np.ndarray, volume: np.ndarray,
+) -> IndicatorState:
+    """Build state from right-aligned (N, T) history — the full-recompute path."""
+    st = IndicatorState.empty(stock_ids)
+    N, T = close.shape
+
+    def col(x: np.ndarray, t: int, idx: np.ndarray) -> np.ndarray:
+        return x[idx, t] if t >= 0 else np.full(len(idx), np.nan)
+
+    for t in range(T):
+        idx = np.flatnonzero(~np.isnan(close[:, t]))
+        if len(idx) == 0:
+            continue
+        _fold(
+            st, idx, high[idx, t], low[idx, t], close[idx, t],
+            col(high, t - 1, idx), col(low, t - 1, idx), col(close, t - 1, idx),
+            col(high, t - 2, idx), col(low, t - 2, idx),
+        )
+
+    w = min(T, WINDOW)
+    st.dates[:, WINDOW - w:] = dates[:, T - w:]
+    st.close[:, WINDOW - w:] = close[:, T - w:]
+    st.volume[:, WINDOW - w:] = volume[:, T - w:]
+    h = min(T, HL_WINDOW)
+    st.high[:, HL_WINDOW - h:] = high[:, T - h:]
+    st.low[:, HL_WINDOW - h:] = low[:, T - h:]
+    st.obv[:] = batch.obv_last(st.close, st.volume)
+    return st
+
+
+def _push(buf: np.ndarray, idx: np.ndarray, values: np.ndarray) -> None:
+    buf[idx, :-1] = buf[idx, 1:]
+    buf[idx, -1] = values
+
+
+def advance(
+    st: IndicatorState, idx: np.ndarray, dates: np.ndarray,
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+) -> None:
+    """Append one new bar to each of rows `idx` in place."""
+    prev_close = st.close[idx, -1]
+    _fold(
+        st, idx, high, low, close,
+        st.high[idx, -1], st.low[idx, -1], prev_close,
+        st.high[idx, -2], st.low[idx, -2],
+    )
+
+    # OBV is a window sum: the oldest price change leaves once the buffer is full
+    full = st.dates[idx, 0] != 0
+    with np.errstate(invalid="ignore"):
+        dropped = st.volume[idx, 1] * np.sign(st.close[idx, 1] - st.close[idx, 0])
+        added = volume * np.sign(close - prev_close)
+    st.obv[idx] += np.where(np.isnan(added), 0.0, added) - np.where(full, dropped, 0.0)
+
+    _push(st.dates, idx, dates)
+    _push(st.close, idx, close)
+    _push(st.volume, idx, volume)
+    _push(st.high, idx, high)
+    _push(st.low, idx, low)
+
+
+# ── read-out ──
+
+def latest(st: IndicatorState) -> dict[str, np.ndarray]:
+    """Current indicator values, keyed like the stock_indicators columns."""
+    close, volume = st.close, st.volume
+    bars = st.bars
+    ready = bars >= batch.PERIOD
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + st.avg_gain / st.avg_loss))
+    macd_line = st.macd_fast - st.macd_slow
+    k, d = batch.stochastic_last(st.high, st.low, close)
+    bb_u, bb_m, bb_l = batch.bollinger_last(close)
+    plus_di, minus_di = _directional_index(bars, st.atr_14, st.plus_dm, st.minus_dm)
+
+    return {
+        "sma_20": batch.sma_last(close),
+        "ema_20": st.ema_20,
+        "wma_20": batch.wma_last(close),
+        "rsi_14": np.where(ready, rsi, np.nan),
+        "macd": macd_line,
+        "macd_signal": st.macd_signal,
+        "macd_hist": macd_line - st.macd_signal,
+        "stoch_k": k,
+        "stoch_d": d,
+        "bb_upper": bb_u,
+        "bb_middle": bb_m,
+        "bb_lower": bb_l,
+        "atr_14": np.where(ready, st.atr_14, np.nan),
+        "adx_14": np.where(st.dx_count >= batch.PERIOD, st.dx, np.nan),
+        "plus_di": plus_di,
+        "minus_di": minus_di,
+        "obv": st.obv,
+        "vma_20": batch.vma_last(volume),
+        "sar": st.sar,
+    }
+
+
+# ── persistence layout (stock_indicator_state) ──
+
+_BUFFER_DTYPES = {"dates": "<i4", "close": "<f8", "volume": "<f8", "high": "<f8", "low": "<f8"}
+_BUFFER_WIDTHS = {"dates": WINDOW, "close": WINDOW, "volume": WINDOW, "high": HL_WINDOW, "low": HL_WINDOW}
+
+
+def to_records(st: IndicatorState) -> list[tuple]:
+    """(stock_id, date, *SCALAR_FIELDS, *buffer bytes) rows for the state table."""
+    scalars = [getattr(st, name).tolist() for name in SCALAR_FIELDS]
+    buffers = [
+        [row.tobytes() for row in getattr(st, name).astype(_BUFFER_DTYPES[name])]
+        for name in BUFFER_FIELDS
+    ]
+    last_dates = [date.fromordinal(d) for d in st.last_dates().tolist()]
+    return [
+        (sid, dt, *values)
+        for sid, dt, values in zip(st.stock_ids.tolist(), last_dates, zip(*scalars, *buffers))
+    ]
+
+
+def from_records(rows: list[tuple]) -> IndicatorState:
+    """Inverse of to_records(); rows whose buffer widths no longer match are dropped."""
+    n_scalar = len(SCALAR_FIELDS)
+    decoded = []
+    for row in rows:
+        buffers = [
+            np.frombuffer(row[2 + n_scalar + i], dtype=_BUFFER_DTYPES[name])
+            for i, name in enumerate(BUFFER_FIELDS)
+        ]
+        if all(len(b) == _BUFFER_WIDTHS[name] for b, name in zip(buffers, BUFFER_FIELDS)):
+            decoded.append((row, buffers))
+
+    st = IndicatorState.empty([row[0] for row, _ in decoded])
+    for name_idx, name in enumerate(SCALAR_FIELDS):
+        target = getattr(st, name)
+        target[:] = [np.nan if row[2 + name_idx] is None else row[2 + name_idx] for row, _ in decoded]
+    for buf_idx, name in enumerate(BUFFER_FIELDS):
+        target = getattr(st, name)
+        for i, (_, buffers) in enumerate(decoded):
+            target[i] = buffers[buf_idx]
+    return st
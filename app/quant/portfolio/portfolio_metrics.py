@@ -1,7 +1,8 @@
 import numpy as np
-from app.db import get_connection, FactorRepository, StockRepository
-from app.quant.factor_model.beta import build_exposure_vector, factor_beta, risk_decomposition
-from app.schema import Market
+from app.db import get_connection
+from app.quant.factor_model.beta import build_exposure_matrix, factor_beta, risk_decomposition
+from app.schema import Market, RiskSnapshot
+from app.utils import cached_risk_snapshot, load_risk_snapshot
 
 
 def compute_factor_risk(
@@ -9,77 +10,53 @@ def compute_factor_risk(
     weights: np.ndarray,
     market: Market,
 ) -> dict | None:
-    with get_connection() as conn:
-        factor_repo = FactorRepository(conn)
-        stock_repo = StockRepository(conn)
-
-        cov_entry = factor_repo.get_latest_covariance(market)
-        if cov_entry is None:
-            return None
-
-        _, cov_list = cov_entry
-        cov_matrix = np.array(cov_list)
-
-        history = factor_repo.get_factor_returns_history(market, limit=1)
-        if not history:
-            return None
-        factor_names = sorted(set(r[1] for r in history))
-
-        if cov_matrix.shape[0] != len(factor_names):
-            return None
-
-        exposures_raw = factor_repo.get_latest_exposures(market)
-        exposures = {
-            r[0]: {"size_z": r[1], "value_z": r[2], "momentum_z": r[3],
-                   "volatility_z": r[4], "quality_z": r[5], "leverage_z": r[6]}
-            for r in exposures_raw
-        }
-        sectors = stock_repo.get_sectors_by_market(market)
+    snapshot = cached_risk_snapshot(market)
+    if snapshot is None:
+        with get_connection() as conn:
+            snapshot = load_risk_snapshot(conn, market)
+    if snapshot is None:
+        return None
+    return factor_risk_from_snapshot(snapshot, stock_ids, weights)
 
-    stock_vectors = []
-    valid_mask = []
-    for sid in stock_ids:
-        exp = exposures.get(sid)
-        sector = sectors.get(sid)
-        if exp is None:
-            valid_mask.append(False)
-            stock_vectors.append(np.zeros(len(factor_names)))
-            continue
-        style_values = np.array([
-            exp.get("size_z", 0), exp.get("value_z", 0), exp.get("momentum_z", 0),
-            exp.get("volatility_z", 0), exp.get("quality_z", 0), exp.get("leverage_z", 0),
-        ])
-        X = build_exposure_vector(style_values, sector, factor_names)
-        stock_vectors.append(X)
-        valid_mask.append(True)
 
-    if not any(valid_mask):
+def factor_risk_from_snapshot(
+    snapshot: RiskSnapshot,
+    stock_ids: list[int],
+    weights: np.ndarray,
+) -> dict | None:
+    """
+    Factor exposure, beta and variance split of the given weights, gathering
+    only their rows from the snapshot. Stocks absent from it (or with an
+    incomplete exposure) are left out with their weight; None if none remain.
+    """
+    cov, exposures = snapshot.covariance, snapshot.exposures
+    factor_names, cov_matrix = cov.factor_names, cov.matrix
+
+    pos = exposures.positions(stock_ids)
+    valid_mask = pos >= 0
+    valid_mask[valid_mask] = ~np.isnan(exposures.styles[pos[valid_mask]]).any(axis=1)
+    if not valid_mask.any():
         return None
 
-    X_p = sum(w * X for w, X, v in zip(weights, stock_vectors, valid_mask) if v)
+    rows = pos[valid_mask]
+    X = build_exposure_matrix(
+        exposures.styles[rows], exposures.sector_codes[rows], exposures.sector_names, factor_names,
+    )
+    valid_weights = np.asarray(weights, dtype=np.float64)[valid_mask]
+    X_p = valid_weights @ X
 
-    market_idx = factor_names.index("market") if "market" in factor_names else None
+    market_idx = cov.index.get("market")
     X_m = np.zeros(len(factor_names))
     if market_idx is not None:
         X_m[market_idx] = 1.0
 
     beta = factor_beta(X_p, X_m, cov_matrix)
 
-    specific_vars = []
-    for sid, X, v in zip(stock_ids, stock_vectors, valid_mask):
-        if v:
-            factor_var = float(X @ cov_matrix @ X)
-            specific_vars.append(0.01)  # placeholder; ideally from regression residuals
-        else:
-            specific_vars.append(0.0)
-
-    weighted_specific_var = float(sum(
-        (w ** 2) * sv for w, sv, v in zip(weights, specific_vars, valid_mask) if v
-    ))
+    weighted_specific_var = float(valid_weights ** 2 @ snapshot.specific_var[rows])
 
     decomp = risk_decomposition(X_p, cov_matrix, weighted_specific_var)
 
-    valid_count = sum(valid_mask)
+    valid_count = int(valid_mask.sum())
     coverage = "FULL" if valid_count == len(stock_ids) else "PARTIAL"
 
     return {
@@ -89,6 +66,7 @@ def compute_factor_risk(
             name: round(float(val), 4) for name, val in zip(factor_names, X_p)
         },
         "coverage": coverage,
+        "as_of": snapshot.date.isoformat(),
         "valid_stocks": valid_count,
         "total_stocks": len(stock_ids),
     }
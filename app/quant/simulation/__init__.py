@@ -1,9 +1,13 @@
 from .path_generator import generate_gbm_paths, generate_bootstrap_paths
+from .common_random import NormalBlock, normal_block
 from .portfolio_path_generator import (
     generate_portfolio_bootstrap_paths,
     generate_correlated_gbm_paths,
+    expected_bootstrap_value,
+    expected_gbm_value,
 )
-from .monte_carlo import summary as simulation_summary
+from .sampling import SAMPLERS, replicate_bounds
+from .monte_carlo import summary as simulation_summary, gbm_summary, gbm_analytic_summary
 from .defaults import (
     DEFAULT_NUM_SIMULATIONS,
     DEFAULT_DAYS,
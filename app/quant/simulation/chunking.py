@@ -0,0 +1,15 @@
+import os
+from typing import Iterator
+
+# float64 working set one block of simulated paths may occupy
+_CHUNK_BYTES = int(float(os.getenv("SIMULATION_CHUNK_MB", "16")) * 2 ** 20)
+
+
+def chunk_bounds(num_rows: int, row_elements: int) -> Iterator[tuple[int, int]]:
+    """
+    [start, stop) ranges over num_rows simulations, sized so that one block of
+    row_elements float64 values per simulation stays within SIMULATION_CHUNK_MB.
+    """
+    step = max(1, _CHUNK_BYTES // (8 * max(1, row_elements)))
+    for start in range(0, num_rows, step):
+        yield start, min(start + step, num_rows)
@@ -0,0 +1,53 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .chunking import chunk_bounds
+
+# seeded blocks kept per process (each ≈ 2 × sims × days float64)
+_BLOCK_CACHE_SIZE = int(os.getenv("SIMULATION_CRN_BLOCKS", "2"))
+
+
+@dataclass(frozen=True)
+class NormalBlock:
+    """
+    Cumulative sums W of a (sims, days) standard-normal block, with every
+    day's column also sorted. A GBM price S0·exp(drift·t + vol·W) is
+    increasing in W, so its per-day order statistics are those of W.
+    """
+    sums: np.ndarray         # (sims, days), W[:, t] = z_1 + … + z_{t+1}
+    sorted_sums: np.ndarray  # (sims, days), each column ascending
+
+
+def cumulative_normals(
+    rng: np.random.Generator,
+    num_simulations: int,
+    days: int,
+    antithetic: bool = True,
+) -> np.ndarray:
+    """
+    (sims, days) cumulative sums of standard normals drawn from rng. With
+    antithetic, rows [half, 2·half) are the negated rows [0, half).
+    """
+    half = num_simulations // 2 if antithetic else num_simulations
+    sums = np.empty((2 * half if antithetic else half, days))
+    for start, stop in chunk_bounds(half, days):
+        np.cumsum(rng.standard_normal((stop - start, days)), axis=1, out=sums[start:stop])
+    if antithetic:
+        np.negative(sums[:half], out=sums[half:])
+    return sums
+
+
+@lru_cache(maxsize=_BLOCK_CACHE_SIZE)
+def normal_block(seed: int, num_simulations: int, days: int, antithetic: bool = True) -> NormalBlock:
+    """
+    The process-wide block for a seed: common random numbers shared by every
+    stock simulated with it, generated and sorted once.
+    """
+    sums = cumulative_normals(np.random.default_rng(seed), num_simulations, days, antithetic)
+    sorted_sums = np.sort(sums, axis=0)
+    sums.flags.writeable = False
+    sorted_sums.flags.writeable = False
+    return NormalBlock(sums, sorted_sums)
@@ -1,45 +1,69 @@
+import math
+from statistics import NormalDist
+
 import numpy as np
 
+from .common_random import NormalBlock
+from .path_generator import gbm_prices
+
+_STANDARD_NORMAL = NormalDist()
+
 
 def final_prices(paths: np.ndarray) -> np.ndarray:
     return paths[:, -1]
 
 
-def expected_return(paths: np.ndarray) -> float:
+def expected_return(paths: np.ndarray, weights: np.ndarray | None = None) -> float:
     initial = paths[:, 0].mean()
-    final = final_prices(paths).mean()
+    final = final_prices(paths).mean() if weights is None else weights @ final_prices(paths)
     return float((final - initial) / initial)
 
 
-def value_at_risk(paths: np.ndarray, confidence: float = 0.95) -> float:
+def value_at_risk(
+    paths: np.ndarray, confidence: float = 0.95, weights: np.ndarray | None = None,
+) -> float:
     returns = final_prices(paths) / paths[:, 0] - 1.0
-    return float(np.percentile(returns, (1 - confidence) * 100))
+    return float(_percentile(returns, (1 - confidence) * 100, weights))
 
 
-def conditional_var(paths: np.ndarray, confidence: float = 0.95) -> float:
+def conditional_var(
+    paths: np.ndarray, confidence: float = 0.95, weights: np.ndarray | None = None,
+) -> float:
     returns = final_prices(paths) / paths[:, 0] - 1.0
-    var_threshold = np.percentile(returns, (1 - confidence) * 100)
-    tail_returns = returns[returns <= var_threshold]
-    if len(tail_returns) == 0:
+    var_threshold = _percentile(returns, (1 - confidence) * 100, weights)
+    tail = returns <= var_threshold
+    if not tail.any():
         return float(var_threshold)
-    return float(tail_returns.mean())
+    if weights is not None and weights[tail].sum() > 0:
+        return float(weights[tail] @ returns[tail] / weights[tail].sum())
+    return float(returns[tail].mean())
 
 
 def price_percentiles(
     paths: np.ndarray,
     levels: tuple = (10, 25, 50, 75, 90),
+    weights: np.ndarray | None = None,
 ) -> dict[int, float]:
     finals = final_prices(paths)
-    values = np.percentile(finals, levels)
+    values = _percentile(finals, levels, weights)
     return {level: round(float(val), 2) for level, val in zip(levels, values)}
 
 
 def path_percentiles(
     paths: np.ndarray,
     levels: tuple = (10, 25, 50, 75, 90),
+    weights: np.ndarray | None = None,
 ) -> list[dict]:
-    pct = np.round(np.percentile(paths, levels, axis=0), 2)
-    days = list(range(paths.shape[1]))
+    if weights is None:
+        pct = np.percentile(paths, levels, axis=0)
+    else:
+        pct = np.stack([_percentile(paths[:, t], levels, weights) for t in range(paths.shape[1])], axis=1)
+    return _percentile_rows(pct, levels)
+
+
+def _percentile_rows(pct: np.ndarray, levels: tuple) -> list[dict]:
+    pct = np.round(pct, 2)
+    days = list(range(pct.shape[1]))
     result = [{"day": d} for d in days]
     for i, level in enumerate(levels):
         row = pct[i].tolist()
@@ -48,11 +72,151 @@ def path_percentiles(
     return result
 
 
-def summary(paths: np.ndarray, confidence: float = 0.95) -> dict:
+def control_weights(finals: np.ndarray, control_mean: float) -> np.ndarray:
+    """
+    Linear control-variate weights on the paths, with the final value as
+    the control: w_j = (1 − (c_j − c̄)(c̄ − μ_c) / s²_c) / n. They sum to 1
+    and make the weighted mean of the control exactly its analytic mean,
+    shifting every weighted statistic by the regression adjustment.
+    """
+    n = len(finals)
+    d = finals - finals.mean()
+    s2 = (d ** 2).mean()
+    if s2 == 0:
+        return np.full(n, 1.0 / n)
+    return (1.0 - d * (finals.mean() - control_mean) / s2) / n
+
+
+def standard_errors(
+    paths: np.ndarray,
+    confidence: float,
+    replicates: list[tuple[int, int]],
+    control_mean: float | None = None,
+) -> dict[str, float | None]:
+    """Standard error of expected return, VaR and CVaR from their spread over independent replicates."""
+    estimates = []
+    for start, stop in replicates:
+        block = paths[start:stop]
+        weights = None if control_mean is None else control_weights(final_prices(block), control_mean)
+        estimates.append([
+            expected_return(block, weights),
+            value_at_risk(block, confidence, weights),
+            conditional_var(block, confidence, weights),
+        ])
+    names = ("expected_return", "var", "cvar")
+    if len(estimates) < 2:
+        return dict.fromkeys(names)
+    se = np.std(estimates, axis=0, ddof=1) / np.sqrt(len(estimates))
+    return {name: round(float(v), 6) for name, v in zip(names, se)}
+
+
+def summary(
+    paths: np.ndarray,
+    confidence: float = 0.95,
+    control_mean: float | None = None,
+    replicates: list[tuple[int, int]] | None = None,
+) -> dict:
+    """
+    With control_mean (the analytic mean final value), every statistic is
+    taken over the control-variate weighted paths; with replicates (the
+    row ranges of independent replicates) a standard_error entry is added.
+    """
+    weights = None if control_mean is None else control_weights(final_prices(paths), control_mean)
+    result = {
+        "expected_return": round(expected_return(paths, weights), 6),
+        "var": round(value_at_risk(paths, confidence, weights), 6),
+        "cvar": round(conditional_var(paths, confidence, weights), 6),
+        "final_price_percentiles": price_percentiles(paths, weights=weights),
+        "path_percentiles": path_percentiles(paths, weights=weights),
+    }
+    if replicates:
+        result["standard_error"] = standard_errors(paths, confidence, replicates, control_mean)
+    return result
+
+
+def _percentile(values: np.ndarray, q, weights: np.ndarray | None = None):
+    """np.percentile, or its weighted form interpolating between weight midpoints."""
+    if weights is None:
+        return np.percentile(values, q)
+    order = np.argsort(values, kind="stable")
+    w = weights[order]
+    cdf = np.maximum.accumulate(np.cumsum(w) - 0.5 * w)  # negative weights may step back
+    return np.interp(np.asarray(q, dtype=np.float64) / 100, cdf, values[order])
+
+
+def gbm_summary(
+    current_price: float,
+    mu: float,
+    sigma: float,
+    block: NormalBlock,
+    confidence: float = 0.95,
+    levels: tuple = (10, 25, 50, 75, 90),
+) -> dict:
+    """
+    summary() of generate_gbm_paths on the same block, without building the
+    paths: prices are increasing in W, so only the final column and the
+    order statistics each per-day percentile interpolates between are priced.
+    """
+    n, days = block.sorted_sums.shape
+    finals = gbm_prices(current_price, mu, sigma, block.sorted_sums[:, -1], days)
+    ends = np.empty((n, 2))
+    ends[:, 0] = current_price
+    ends[:, 1] = finals
+
+    # np.percentile's linear method on each sorted column
+    index = np.asarray(levels, dtype=np.float64) / 100 * (n - 1)
+    lo = np.floor(index).astype(np.int64)
+    hi = np.minimum(lo + 1, n - 1)
+    gamma = (index - lo)[:, None]
+    t = np.arange(1, days + 1)
+    below = gbm_prices(current_price, mu, sigma, block.sorted_sums[lo], t)
+    above = gbm_prices(current_price, mu, sigma, block.sorted_sums[hi], t)
+    diff = above - below
+    pct = np.empty((len(levels), days + 1))
+    pct[:, 0] = current_price
+    pct[:, 1:] = np.where(gamma >= 0.5, above - diff * (1 - gamma), below + diff * gamma)
+
+    return {
+        "expected_return": round(expected_return(ends), 6),
+        "var": round(value_at_risk(ends, confidence), 6),
+        "cvar": round(conditional_var(ends, confidence), 6),
+        "final_price_percentiles": price_percentiles(ends, levels),
+        "path_percentiles": _percentile_rows(pct, levels),
+    }
+
+
+def gbm_analytic_summary(
+    current_price: float,
+    mu: float,
+    sigma: float,
+    days: int,
+    confidence: float = 0.95,
+    levels: tuple = (10, 25, 50, 75, 90),
+) -> dict:
+    """
+    summary() of generate_gbm_paths in closed form. Under that model
+    ln(S_t / S0) ~ N(m·t, σ²·t) with m = μ − σ²/2, so every statistic is a
+    log-normal moment or quantile:
+
+        E[S_T] / S0         = exp(μ·T)
+        quantile_p(S_t)     = S0·exp(m·t + σ√t·z_p)
+        E[R_T | R_T ≤ VaR]  = exp(μ·T)·Φ(z_α − σ√T) / α − 1,   α = 1 − confidence
+    """
+    m = mu - 0.5 * sigma ** 2
+    alpha = 1 - confidence
+    z_alpha = _STANDARD_NORMAL.inv_cdf(alpha)
+    vol_T = sigma * math.sqrt(days)
+
+    z = np.array([_STANDARD_NORMAL.inv_cdf(level / 100) for level in levels])
+    t = np.arange(days + 1)
+    pct = current_price * np.exp(m * t + sigma * np.sqrt(t) * z[:, None])
+
     return {
-        "expected_return": round(expected_return(paths), 6),
-        "var": round(value_at_risk(paths, confidence), 6),
-        "cvar": round(conditional_var(paths, confidence), 6),
-        "final_price_percentiles": price_percentiles(paths),
-        "path_percentiles": path_percentiles(paths),
-    }
\ No newline at end of file
+        "expected_return": round(math.expm1(mu * days), 6),
+        "var": round(math.expm1(m * days + vol_T * z_alpha), 6),
+        "cvar": round(math.exp(mu * days) * _STANDARD_NORMAL.cdf(z_alpha - vol_T) / alpha - 1.0, 6),
+        "final_price_percentiles": {
+            level: round(float(val), 2) for level, val in zip(levels, pct[:, -1])
+        },
+        "path_percentiles": _percentile_rows(pct, levels),
+    }
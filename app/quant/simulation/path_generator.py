@@ -1,5 +1,8 @@
 import numpy as np
 
+from .chunking import chunk_bounds
+from .common_random import cumulative_normals, normal_block
+
 
 def generate_gbm_paths(
     current_price: float,
@@ -8,45 +11,52 @@ def generate_gbm_paths(
     days: int,
     num_simulations: int,
     antithetic: bool = True,
+    seed: int | None = None,
 ) -> np.ndarray:
-
-    rng = np.random.default_rng()
-    dt = 1.0
-
-    if antithetic:
-        half = num_simulations // 2
-        z_half = rng.standard_normal((half, days))
-        z = np.concatenate([z_half, -z_half], axis=0)
+    """
+    With a seed, paths are an affine transform of the process-wide
+    normal_block for it (common random numbers across stocks); without
+    one, of freshly drawn normals.
+    """
+    if seed is not None:
+        sums = normal_block(seed, num_simulations, days, antithetic).sums
     else:
-        z = rng.standard_normal((num_simulations, days))
-
-    drift = (mu - 0.5 * sigma ** 2) * dt
-    diffusion = sigma * np.sqrt(dt) * z
+        sums = cumulative_normals(np.random.default_rng(), num_simulations, days, antithetic)
 
-    log_returns = drift + diffusion
-    daily_factors = np.exp(log_returns)
-
-    price_paths = np.empty((z.shape[0], days + 1))
+    price_paths = np.empty((sums.shape[0], days + 1))
     price_paths[:, 0] = current_price
-    price_paths[:, 1:] = current_price * np.cumprod(daily_factors, axis=1)
+    price_paths[:, 1:] = gbm_prices(current_price, mu, sigma, sums, np.arange(1, days + 1))
 
     return price_paths
 
 
+def gbm_prices(
+    current_price: float,
+    mu: float,
+    sigma: float,
+    sums: np.ndarray,
+    t: np.ndarray | float,
+) -> np.ndarray:
+    """S0·exp((μ − σ²/2)·t + σ·W) for cumulative normals W at day t (dt = 1)."""
+    drift = mu - 0.5 * sigma ** 2
+    return current_price * np.exp(drift * t + sigma * sums)
+
+
 def generate_bootstrap_paths(
     current_price: float,
     historical_returns: np.ndarray,
     days: int,
     num_simulations: int,
+    seed: int | None = None,
 ) -> np.ndarray:
 
-    rng = np.random.default_rng()
-
-    sampled = rng.choice(historical_returns, size=(num_simulations, days), replace=True)
-    daily_factors = 1.0 + sampled
+    rng = np.random.default_rng(seed)
 
     price_paths = np.empty((num_simulations, days + 1))
     price_paths[:, 0] = current_price
-    price_paths[:, 1:] = current_price * np.cumprod(daily_factors, axis=1)
 
-    return price_paths
\ No newline at end of file
+    for start, stop in chunk_bounds(num_simulations, days):
+        sampled = rng.choice(historical_returns, size=(stop - start, days), replace=True)
+        price_paths[start:stop, 1:] = current_price * np.cumprod(1.0 + sampled, axis=1)
+
+    return price_paths
@@ -1,6 +1,8 @@
 import numpy as np
 from numpy.linalg import LinAlgError
 
+from .sampling import index_draws, normal_draws, replicate_bounds
+
 
 def generate_portfolio_bootstrap_paths(
     current_prices: np.ndarray,
@@ -8,18 +10,28 @@ def generate_portfolio_bootstrap_paths(
     shares: np.ndarray,
     days: int,
     num_simulations: int,
+    seed: int | None = None,
+    sampler: str = "pseudo",
 ) -> np.ndarray:
-    rng = np.random.default_rng()
+    rng = np.random.default_rng(seed)
     T = historical_returns.shape[0]
+    n = len(current_prices)
+    position_values = current_prices * shares
+
+    if sampler != "pseudo":
+        # days ordered by the portfolio's return, so mirrored (antithetic) and
+        # stratified (Sobol') indices pair bad days with good ones
+        historical_returns = historical_returns[np.argsort(historical_returns @ position_values, kind="stable")]
 
-    idx = rng.integers(0, T, size=(num_simulations, days))
-    sampled = historical_returns[idx]
+    portfolio_values = np.empty((replicate_bounds(num_simulations, sampler)[-1][1], days + 1))
+    portfolio_values[:, 0] = position_values.sum()
 
-    price_paths = np.empty((num_simulations, days + 1, len(current_prices)))
-    price_paths[:, 0, :] = current_prices
-    price_paths[:, 1:, :] = current_prices * np.cumprod(1.0 + sampled, axis=1)
+    for start, idx in index_draws(rng, sampler, num_simulations, days, T, days * n):
+        growth = historical_returns[idx]
+        growth += 1.0
+        np.cumprod(growth, axis=1, out=growth)
+        portfolio_values[start:start + len(idx), 1:] = growth @ position_values
 
-    portfolio_values = (price_paths * shares).sum(axis=2)
     return portfolio_values
 
 
@@ -31,9 +43,11 @@ def generate_correlated_gbm_paths(
     shares: np.ndarray,
     days: int,
     num_simulations: int,
+    seed: int | None = None,
+    sampler: str = "pseudo",
 ) -> np.ndarray:
     n = len(current_prices)
-    rng = np.random.default_rng()
+    rng = np.random.default_rng(seed)
 
     try:
         L = np.linalg.cholesky(correlation)
@@ -41,22 +55,41 @@ def generate_correlated_gbm_paths(
         correlation = _nearest_positive_definite(correlation)
         L = np.linalg.cholesky(correlation)
 
-    z = rng.standard_normal((num_simulations, days, n))
-    correlated_z = z @ L.T
-
     dt = 1.0
     drift = (mu - 0.5 * sigma ** 2) * dt
-    diffusion = sigma * np.sqrt(dt) * correlated_z
-    log_returns = drift + diffusion
+    vol = sigma * np.sqrt(dt)
+    position_values = current_prices * shares
+
+    portfolio_values = np.empty((replicate_bounds(num_simulations, sampler)[-1][1], days + 1))
+    portfolio_values[:, 0] = position_values.sum()
 
-    price_paths = np.empty((num_simulations, days + 1, n))
-    price_paths[:, 0, :] = current_prices
-    price_paths[:, 1:, :] = current_prices * np.cumprod(np.exp(log_returns), axis=1)
+    for start, z in normal_draws(rng, sampler, num_simulations, days, n):
+        # in place: correlated z → log return → growth factor → cumulative growth
+        growth = z @ L.T
+        growth *= vol
+        growth += drift
+        np.exp(growth, out=growth)
+        np.cumprod(growth, axis=1, out=growth)
+        portfolio_values[start:start + len(growth), 1:] = growth @ position_values
 
-    portfolio_values = (price_paths * shares).sum(axis=2)
     return portfolio_values
 
 
+def expected_bootstrap_value(
+    current_prices: np.ndarray, historical_returns: np.ndarray, shares: np.ndarray, days: int,
+) -> float:
+    """E[V_T] under day resampling: every holding compounds its mean daily return."""
+    growth = (1.0 + historical_returns.mean(axis=0)) ** days
+    return float((current_prices * shares * growth).sum())
+
+
+def expected_gbm_value(
+    current_prices: np.ndarray, mu: np.ndarray, shares: np.ndarray, days: int,
+) -> float:
+    """E[V_T] under correlated GBM: E[S_T] = S0·exp(μ·T) per holding."""
+    return float((current_prices * shares * np.exp(mu * days)).sum())
+
+
 def _nearest_positive_definite(A: np.ndarray) -> np.ndarray:
     B = (A + A.T) / 2
     eigvals, eigvecs = np.linalg.eigh(B)
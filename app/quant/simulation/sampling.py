@@ -0,0 +1,141 @@
+import math
+from typing import Iterator
+
+import numpy as np
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+from .chunking import chunk_bounds
+
+SAMPLERS = ("pseudo", "antithetic", "sobol")
+
+# independent replicates the simulations are split into, for the standard error
+REPLICATES = 16
+
+# direction numbers shipped with scipy's Sobol' engine
+_SOBOL_MAX_DIM = 21201
+
+_SOBOL_BITS = 30
+
+
+def replicate_bounds(num_simulations: int, sampler: str) -> list[tuple[int, int]]:
+    """
+    Contiguous [start, stop) rows of the independent replicates paths are
+    drawn in. Antithetic replicates hold whole (z, −z) pairs; Sobol'
+    replicates are separately scrambled 2^m-point sets, so their total may
+    exceed num_simulations.
+    """
+    k = max(1, min(REPLICATES, num_simulations // 2))
+    if sampler == "sobol":
+        sizes = [1 << math.ceil(math.log2(math.ceil(num_simulations / k)))] * k
+    elif sampler == "antithetic":
+        sizes = [2 * len(part) for part in np.array_split(np.arange(num_simulations // 2), k)]
+    else:
+        sizes = [len(part) for part in np.array_split(np.arange(num_simulations), k)]
+    ends = np.cumsum(sizes).tolist()
+    return list(zip([0] + ends[:-1], ends))
+
+
+def normal_draws(
+    rng: np.random.Generator, sampler: str, num_simulations: int, days: int, n: int,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """(first row, (rows, days, n) standard normals) blocks covering every replicate."""
+    if sampler == "sobol":
+        bridge = _bridge_schedule(days)
+        for start, uniforms in _sobol_draws(rng, num_simulations, days * n, days * n):
+            yield start, _bridge_increments(ndtri(uniforms).reshape(-1, days, n), bridge)
+        return
+    for start, stop in replicate_bounds(num_simulations, sampler):
+        if sampler == "antithetic":
+            half = (stop - start) // 2
+            for a, b in chunk_bounds(half, days * n):
+                z = rng.standard_normal((b - a, days, n))
+                yield start + a, z
+                yield start + half + a, -z
+        else:
+            for a, b in chunk_bounds(stop - start, days * n):
+                yield start + a, rng.standard_normal((b - a, days, n))
+
+
+def index_draws(
+    rng: np.random.Generator, sampler: str, num_simulations: int, days: int, T: int,
+    row_elements: int,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    (first row, (rows, days) indices into T historical days) blocks covering
+    every replicate. Antithetic pairs index i with T − 1 − i, so callers
+    should order the days for the mirror to mean something.
+    """
+    if sampler == "sobol":
+        for start, uniforms in _sobol_draws(rng, num_simulations, days, row_elements):
+            yield start, np.minimum((uniforms * T).astype(np.int64), T - 1)
+        return
+    for start, stop in replicate_bounds(num_simulations, sampler):
+        if sampler == "antithetic":
+            half = (stop - start) // 2
+            for a, b in chunk_bounds(half, row_elements):
+                idx = rng.integers(0, T, size=(b - a, days))
+                yield start + a, idx
+                yield start + half + a, T - 1 - idx
+        else:
+            for a, b in chunk_bounds(stop - start, row_elements):
+                yield start + a, rng.integers(0, T, size=(b - a, days))
+
+
+def _sobol_draws(
+    rng: np.random.Generator, num_simulations: int, dim: int, row_elements: int,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    The same 2^m-point Sobol' set for every replicate, each under its own
+    random digital shift (XOR of a random 30-bit word per dimension), in
+    power-of-two chunks. Owen scrambling would randomize as well but costs
+    ~0.3 s per set at 60 days × 30 holdings; the shift is free. Points are
+    taken at the centre of their 2^-30 cell, so they never reach 0 or 1.
+    """
+    if dim > _SOBOL_MAX_DIM:
+        raise ValueError(f"sobol sampler supports at most {_SOBOL_MAX_DIM} dimensions, got {dim}")
+    engine = qmc.Sobol(dim, scramble=False, bits=_SOBOL_BITS)
+    scale = float(1 << _SOBOL_BITS)
+    for start, stop in replicate_bounds(num_simulations, "sobol"):
+        engine.reset()
+        shift = rng.integers(0, 1 << _SOBOL_BITS, size=dim)
+        step = next(chunk_bounds(stop - start, row_elements))[1]
+        step = 1 << (step.bit_length() - 1)  # keeps every draw a power of two
+        for a in range(0, stop - start, step):
+            digits = (engine.random(step) * scale).astype(np.int64) ^ shift
+            yield start + a, (digits + 0.5) / scale
+
+
+def _bridge_schedule(days: int) -> list[tuple[int, int, int, float, float, float]]:
+    """
+    Brownian-bridge fill order after W_days: (mid, left, right, left weight,
+    right weight, sd) per step, coarsest intervals first.
+    """
+    schedule, intervals = [], [(0, days)]
+    while intervals:
+        left, right = intervals.pop(0)
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        span = right - left
+        schedule.append((
+            mid, left, right, (right - mid) / span, (mid - left) / span,
+            math.sqrt((mid - left) * (right - mid) / span),
+        ))
+        intervals += [(left, mid), (mid, right)]
+    return schedule
+
+
+def _bridge_increments(z: np.ndarray, schedule: list) -> np.ndarray:
+    """
+    Daily increments of Brownian paths built from z by a Brownian bridge:
+    z[:, 0] sets the final value and later days only fill in between, so the
+    leading Sobol' coordinates drive what the tail statistics depend on most.
+    The increments are again iid standard normals.
+    """
+    rows, days, n = z.shape
+    W = np.zeros((rows, days + 1, n))
+    W[:, days] = math.sqrt(days) * z[:, 0]
+    for k, (mid, left, right, wl, wr, sd) in enumerate(schedule, start=1):
+        W[:, mid] = wl * W[:, left] + wr * W[:, right] + sd * z[:, k]
+    return np.diff(W, axis=1)
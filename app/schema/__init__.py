@@ -1,4 +1,4 @@
-from .dto import BenchmarkPrice, DailyPrice, FinancialStatement, OHLCV, PipelineMetadata, RiskFreeRate, StepResult, StockInfo
+from .dto import BenchmarkPrice, CovarianceState, DailyPrice, FactorCovariance, FactorExposures, FactorRegression, FinancialStatement, OHLCV, PipelineMetadata, PriceStore, RiskFreeRate, RiskSnapshot, StepResult, StockInfo
 from .enums import (
     Benchmark,
     Country,
@@ -15,16 +15,22 @@ __all__ = [
     "Benchmark",
     "BenchmarkPrice",
     "Country",
+    "CovarianceState",
     "DailyPrice",
     "DataCoverage",
     "DataSource",
+    "FactorCovariance",
+    "FactorExposures",
+    "FactorRegression",
     "FinancialStatement",
     "Market",
     "Maturity",
     "OHLCV",
     "PipelineMetadata",
+    "PriceStore",
     "ReportType",
     "RiskFreeRate",
+    "RiskSnapshot",
     "StepResult",
     "StockInfo",
     "market_to_benchmark",
@@ -1,16 +1,27 @@
+from .factor_covariance import CovarianceState, FactorCovariance
+from .factor_exposures import FactorExposures
+from .factor_regression import FactorRegression
 from .financial_statement import FinancialStatement
 from .pipeline_metadata import PipelineMetadata, StepResult
 from .price import BenchmarkPrice, DailyPrice, OHLCV
+from .price_store import PriceStore
 from .risk import RiskFreeRate
+from .risk_snapshot import RiskSnapshot
 from .stock import StockInfo
 
 __all__ = [
     "BenchmarkPrice",
+    "CovarianceState",
     "DailyPrice",
+    "FactorCovariance",
+    "FactorExposures",
+    "FactorRegression",
     "FinancialStatement",
     "OHLCV",
     "PipelineMetadata",
+    "PriceStore",
     "RiskFreeRate",
+    "RiskSnapshot",
     "StepResult",
     "StockInfo",
 ]
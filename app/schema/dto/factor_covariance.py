@@ -0,0 +1,41 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FactorCovariance:
+    """One published K×K factor covariance; rows/columns follow factor_names."""
+    date: date
+    factor_names: list[str]
+    matrix: np.ndarray      # (K, K) float64, read-only
+    index: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.matrix.flags.writeable = False
+        object.__setattr__(self, "index", {n: i for i, n in enumerate(self.factor_names)})
+
+    def to_bytes(self) -> bytes:
+        return np.ascontiguousarray(self.matrix, dtype="<f8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, dt: date, factor_names: list[str], blob) -> "FactorCovariance":
+        k = len(factor_names)
+        matrix = np.frombuffer(bytes(blob), dtype="<f8").reshape(k, k)
+        return cls(dt, list(factor_names), matrix)
+
+
+@dataclass
+class CovarianceState:
+    """
+    Decayed moments behind a published covariance, for advancing it by new
+    dates instead of recomputing the whole window.
+    """
+    factor_names: list[str]
+    window_start: date      # oldest and newest factor-return dates in the window
+    window_end: date
+    window_dates: int
+    weighted_sum: np.ndarray    # (K,)   Σ λ^age r
+    weighted_outer: np.ndarray  # (K, K) Σ λ^age r r'
+    rebuilt_on: date            # last full recomputation
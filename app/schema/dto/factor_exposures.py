@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FactorExposures:
+    """
+    One market's latest style z-scores (STYLE_FACTORS order) with each
+    stock's industry as a code into sector_names. stock_ids is ascending,
+    so lookups are a binary search.
+    """
+    date: date
+    stock_ids: np.ndarray       # (N,) int64
+    styles: np.ndarray          # (N, 6) float64, NaN where missing
+    sector_codes: np.ndarray    # (N,) int64, -1 for no sector / "N/A"
+    sector_names: np.ndarray    # (I,) sorted
+
+    @classmethod
+    def from_rows(cls, dt: date, rows: list[tuple]) -> "FactorExposures":
+        """(stock_id, sector, size_z, value_z, momentum_z, volatility_z, quality_z, leverage_z) rows."""
+        rows = sorted(rows, key=lambda r: r[0])
+        stock_ids = np.array([r[0] for r in rows], dtype=np.int64)
+        styles = np.array(
+            [[float(v) if v is not None else np.nan for v in r[2:8]] for r in rows], dtype=np.float64,
+        ).reshape(len(rows), 6)
+        sectors = np.array([r[1] for r in rows], dtype=object)
+        known = np.array([s is not None and s != "N/A" for s in sectors], dtype=bool)
+        codes = np.full(len(rows), -1, dtype=np.int64)
+        names, codes[known] = np.unique(sectors[known].astype(str), return_inverse=True)
+        return cls(dt, stock_ids, styles, codes, names)
+
+    def __len__(self) -> int:
+        return len(self.stock_ids)
+
+    def positions(self, stock_ids) -> np.ndarray:
+        """Positions of the given ids; -1 where the stock has no exposures."""
+        ids = np.asarray(stock_ids, dtype=np.int64)
+        if len(self.stock_ids) == 0:
+            return np.full(len(ids), -1)
+        pos = np.clip(np.searchsorted(self.stock_ids, ids), 0, len(self.stock_ids) - 1)
+        return np.where(self.stock_ids[pos] == ids, pos, -1)
+
+    def complete(self) -> np.ndarray:
+        """(N,) True where every style z-score is present."""
+        return ~np.isnan(self.styles).any(axis=1)
+
+    def style_by_stock(self, column: int) -> dict[int, float | None]:
+        """{stock_id: z} for one style column, None where missing."""
+        values = self.styles[:, column]
+        return {
+            sid: None if np.isnan(v) else v
+            for sid, v in zip(self.stock_ids.tolist(), values.tolist())
+        }
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from app.schema.enums import Market
+
+
+@dataclass
+class FactorRegression:
+    """One market's daily cross-section, solved but not yet stored."""
+    market: Market
+    date: date
+    stock_ids: np.ndarray       # (N,) eligible stocks
+    style_exp: np.ndarray       # (N, 6) style z-scores, NaN where missing
+    specific: np.ndarray        # (N,) regression residuals, NaN outside the regression
+    factor_names: list[str]
+    factor_returns: np.ndarray  # (K,) in factor_names order
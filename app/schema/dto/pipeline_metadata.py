@@ -8,6 +8,8 @@ class StepResult:
     success: bool
     duration_ms: int
     error: Optional[str] = None
+    started_ms: Optional[int] = None  # offset from the start of the compute DAG
+    resumed: bool = False  # reused from a checkpoint instead of run
 
 
 @dataclass
@@ -24,9 +26,10 @@ class PipelineMetadata:
             "steps": [
                 {
                     "name": s.name,
-                    "status": "success" if s.success else "failed",
+                    "status": "resumed" if s.resumed else "success" if s.success else "failed",
                     "duration_ms": s.duration_ms,
                     **({"error": s.error} if s.error else {}),
+                    **({"started_ms": s.started_ms} if s.started_ms is not None else {}),
                 }
                 for s in self.steps
             ],
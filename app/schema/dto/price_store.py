@@ -0,0 +1,174 @@
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Iterable
+
+import numpy as np
+
+
+@dataclass
+class PriceStore:
+    """
+    Columnar daily prices for many stocks, CSR-indexed by stock.
+
+    Bars of stock i occupy [offsets[i], offsets[i + 1]) of every column,
+    in date order. stock_ids is ascending, so lookups are a binary search.
+    """
+    stock_ids: np.ndarray   # (N,) int64
+    offsets: np.ndarray     # (N + 1,) int64
+    dates: np.ndarray       # (R,) int32 day ordinals
+    open: np.ndarray        # (R,) float64
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray      # (R,) int64
+
+    @classmethod
+    def empty(cls) -> "PriceStore":
+        f = np.empty(0)
+        return cls.from_columns(np.empty(0, np.int64), np.empty(0, np.int32), f, f, f, f, np.empty(0, np.int64))
+
+    @classmethod
+    def from_columns(
+        cls,
+        stock_id: np.ndarray, dates: np.ndarray,
+        open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+        volume: np.ndarray,
+    ) -> "PriceStore":
+        """Per-bar columns sorted by (stock_id, date)."""
+        if len(stock_id) == 0:
+            offsets = np.zeros(1, dtype=np.int64)
+        else:
+            starts = np.flatnonzero(np.diff(stock_id)) + 1
+            offsets = np.concatenate([[0], starts, [len(stock_id)]]).astype(np.int64)
+        return cls(
+            stock_ids=np.asarray(stock_id[offsets[:-1]], dtype=np.int64),
+            offsets=offsets,
+            dates=np.asarray(dates, dtype=np.int32),
+            open=np.asarray(open_, dtype=np.float64),
+            high=np.asarray(high, dtype=np.float64),
+            low=np.asarray(low, dtype=np.float64),
+            close=np.asarray(close, dtype=np.float64),
+            volume=np.asarray(volume, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "PriceStore":
+        """(stock_id, date, open, high, low, close, volume) rows sorted by (stock_id, date)."""
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        sid, dt, o, h, l, c, v = zip(*rows)
+        return cls.from_columns(
+            np.array(sid, dtype=np.int64),
+            np.fromiter((d.toordinal() for d in dt), dtype=np.int32, count=len(dt)),
+            np.array(o, dtype=np.float64), np.array(h, dtype=np.float64),
+            np.array(l, dtype=np.float64), np.array(c, dtype=np.float64),
+            np.array(v, dtype=np.int64),
+        )
+
+    # ── lookups (zero-copy) ──
+
+    def __len__(self) -> int:
+        return len(self.stock_ids)
+
+    def __contains__(self, stock_id: int) -> bool:
+        return self.position(stock_id) is not None
+
+    def position(self, stock_id: int) -> int | None:
+        i = int(np.searchsorted(self.stock_ids, stock_id))
+        return i if i < len(self.stock_ids) and self.stock_ids[i] == stock_id else None
+
+    def positions(self, stock_ids) -> np.ndarray:
+        """Positions of the given ids; -1 where the stock is absent."""
+        ids = np.asarray(stock_ids, dtype=np.int64)
+        if len(self.stock_ids) == 0:
+            return np.full(len(ids), -1)
+        pos = np.clip(np.searchsorted(self.stock_ids, ids), 0, len(self.stock_ids) - 1)
+        return np.where(self.stock_ids[pos] == ids, pos, -1)
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def bars(self, stock_id: int) -> slice:
+        i = self.position(stock_id)
+        if i is None:
+            return slice(0, 0)
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def last_close(self) -> np.ndarray:
+        return self.close[self.offsets[1:] - 1]
+
+    def last_dates(self) -> list[date]:
+        return [date.fromordinal(d) for d in self.dates[self.offsets[1:] - 1].tolist()]
+
+    def slice(self, start: int, end: int) -> "PriceStore":
+        """Stocks [start, end) as views into this store."""
+        lo, hi = int(self.offsets[start]), int(self.offsets[end])
+        return PriceStore(
+            stock_ids=self.stock_ids[start:end],
+            offsets=self.offsets[start:end + 1] - lo,
+            **{name: getattr(self, name)[lo:hi] for name in _BAR_COLUMNS},
+        )
+
+    # ── copies ──
+
+    def take(self, stock_ids) -> "PriceStore":
+        """A new store holding only the given stocks that are present."""
+        pos = self.positions(stock_ids)
+        pos = np.unique(pos[pos >= 0])
+        lengths = self.lengths()[pos]
+        idx = np.repeat(self.offsets[pos], lengths) + _ranks(lengths)
+        return PriceStore(
+            stock_ids=self.stock_ids[pos],
+            offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            **{name: getattr(self, name)[idx] for name in _BAR_COLUMNS},
+        )
+
+    def as_of(self, day: int, limit: int | None = None) -> "PriceStore":
+        """
+        A new store as it looked on day ordinal `day`: each stock's bars up to
+        and including that day, at most the last `limit`. Stocks with no bar
+        by then are left out.
+        """
+        seen = np.concatenate([[0], np.cumsum(self.dates <= day)])
+        starts = self.offsets[:-1]
+        ends = starts + seen[self.offsets[1:]] - seen[starts]
+        if limit is not None:
+            starts = np.maximum(starts, ends - limit)
+        keep = ends > starts
+        lengths = (ends - starts)[keep]
+        idx = np.repeat(starts[keep], lengths) + _ranks(lengths)
+        return PriceStore(
+            stock_ids=self.stock_ids[keep],
+            offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            **{name: getattr(self, name)[idx] for name in _BAR_COLUMNS},
+        )
+
+    def padded(self, column: str, positions: np.ndarray, width: int | None = None) -> np.ndarray:
+        """
+        (len(positions), width) matrix of `column`, right-aligned on each stock's
+        latest bar and padded on the left (NaN for floats, 0 for integers).
+        """
+        lengths = self.lengths()[positions]
+        width = int(lengths.max(initial=0)) if width is None else width
+        lengths = np.minimum(lengths, width)
+        values = getattr(self, column)
+        if values.dtype.kind in "iu":
+            out = np.zeros((len(positions), width), dtype=values.dtype)
+        else:
+            out = np.full((len(positions), width), np.nan)
+
+        rank = _ranks(lengths)
+        rows = np.repeat(np.arange(len(positions)), lengths)
+        src = np.repeat(self.offsets[positions + 1] - lengths, lengths) + rank
+        out[rows, width - np.repeat(lengths, lengths) + rank] = values[src]
+        return out
+
+
+_BAR_COLUMNS = [f.name for f in fields(PriceStore)][2:]
+
+
+def _ranks(lengths: np.ndarray) -> np.ndarray:
+    """0..len-1 for each run of the given lengths, concatenated."""
+    total = int(lengths.sum())
+    return np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
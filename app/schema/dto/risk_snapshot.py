@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from .factor_covariance import FactorCovariance
+from .factor_exposures import FactorExposures
+
+
+@dataclass(frozen=True)
+class RiskSnapshot:
+    """
+    Everything a portfolio's factor risk needs for one market, published by
+    the factor pipeline: the latest exposures, the covariance they are
+    read against, and a specific variance per exposed stock.
+    """
+    date: date
+    covariance: FactorCovariance
+    exposures: FactorExposures
+    specific_var: np.ndarray    # (N,) float64 aligned on exposures.stock_ids
+
+    def __post_init__(self):
+        for array in (
+            self.exposures.stock_ids, self.exposures.styles, self.exposures.sector_codes, self.specific_var,
+        ):
+            array.flags.writeable = False
@@ -1,4 +1,5 @@
 import logging
+import os
 from datetime import date
 
 import numpy as np
@@ -11,29 +12,107 @@ from app.db import (
     FundamentalRepository,
     StockRepository,
 )
-from app.schema import Market
+from app.schema import CovarianceState, FactorCovariance, FactorRegression, Market, PriceStore, RiskSnapshot
 from app.schema.enums.market import market_to_country
-from app.utils import load_risk_free_rates
+from app.utils import (
+    invalidate_factor_covariance,
+    invalidate_risk_snapshot,
+    load_factor_covariance,
+    load_risk_free_rates,
+)
 from app.quant.factor_model.exposure import (
-    STYLE_FACTORS,
-    compute_exposures,
     build_design_matrix,
+    compute_exposures,
+    sector_codes,
 )
 from app.quant.factor_model.regression import constrained_wls
-from app.quant.factor_model.covariance import ewm_factor_covariance
-from app.quant.factor_model.beta import factor_beta, build_exposure_vector
+from app.quant.factor_model.covariance import (
+    advance_ewm_moments,
+    advance_ewm_variance,
+    covariance_from_moments,
+    ewm_moments,
+)
+from app.quant.factor_model.beta import build_exposure_matrix, factor_betas
 
 logger = logging.getLogger(__name__)
 
-_MIN_COVARIANCE_DAYS = 90
-_PRICE_LIMIT = 300
+MIN_COVARIANCE_DAYS = 90
+PRICE_LIMIT = 300
+
+_COVARIANCE_WINDOW = 252
+_COVARIANCE_HALFLIFE = 90
+# recompute the covariance window from factor_returns at least this often (days)
+_COVARIANCE_REBUILD_DAYS = int(os.getenv("FACTOR_COVARIANCE_REBUILD_DAYS", "30"))
+_SPECIFIC_HALFLIFE = 42
+# residual observations before a stock's own specific variance is used
+_MIN_SPECIFIC_OBS = 20
+
+
+def compute_price_features(
+    stock_ids: np.ndarray, store: PriceStore
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(close, return today, 252d return, 21d return, EWM vol) aligned on stock_ids, NaN where short."""
+    close, ret_today, ret_252, ret_21, ewm_vol = np.full((5, len(stock_ids)), np.nan)
+
+    pos = store.positions(stock_ids)
+    lengths = np.append(store.lengths(), 0)[pos]  # absent stocks (-1) read the trailing 0
+
+    # equal-length groups, so each group is one dense matrix
+    for length in np.unique(lengths[lengths >= 2]).tolist():
+        rows = np.flatnonzero(lengths == length)
+        arr = store.close[store.offsets[pos[rows]][:, None] + np.arange(length)]
+
+        close[rows] = arr[:, -1]
+        ret_today[rows] = arr[:, -1] / arr[:, -2] - 1
+
+        if length >= 252:
+            ret_252[rows] = arr[:, -1] / arr[:, -252] - 1
+        if length >= 21:
+            ret_21[rows] = arr[:, -1] / arr[:, -21] - 1
+        if length >= 43:
+            rets_df = pd.DataFrame(arr.T).pct_change().iloc[1:]
+            ewm_vol[rows] = rets_df.ewm(halflife=42).std().iloc[-1].values
+
+    return close, ret_today, ret_252, ret_21, ewm_vol
+
+
+def exposure_rows(
+    stock_ids: np.ndarray, dt: date, style_exp: np.ndarray, specific: np.ndarray | None = None,
+) -> list[tuple]:
+    """
+    factor_exposures rows for every stock with at least one style exposure.
+    specific holds the regression residuals aligned on stock_ids, NaN for
+    stocks left out of the regression.
+    """
+    if specific is None:
+        specific = np.full(len(stock_ids), np.nan)
+    return [
+        (int(sid), dt, *(_to_db(v) for v in row), _to_db(e, 8))
+        for sid, row, e in zip(stock_ids.tolist(), style_exp.tolist(), specific.tolist())
+        if not all(np.isnan(v) for v in row)
+    ]
+
+
+def _specific_risk_rows(ids, dates, n_obs, weight, mean, var) -> list[tuple]:
+    return [
+        (sid, dt, int(n), w, m, v)
+        for sid, dt, n, w, m, v in zip(ids, dates, np.asarray(n_obs).tolist(), weight.tolist(), mean.tolist(), var.tolist())
+    ]
+
+
+def _to_db(val, digits: int = 4) -> float | None:
+    if val is None or (isinstance(val, float) and np.isnan(val)):
+        return None
+    return round(float(val), digits)
 
 
 class FactorModelService:
     """
     Daily factor model pipeline per market.
 
-    run()        — daily pipeline: compute + store exposures, factor returns, covariance
+    run()        — daily pipeline: regress() then persist()
+    regress()    — compute exposures + factor returns (reads only)
+    persist()    — store them, update covariance, specific risk and risk snapshot
     get_betas()  — load stored data, return {stock_id: factor_beta} for indicator computation
     """
 
@@ -44,7 +123,17 @@ class FactorModelService:
         self._factor_repo = FactorRepository(conn)
         self._fund_repo = FundamentalRepository(conn)
 
-    def run(self, market: Market, price_map: dict[int, list[tuple]] | None = None) -> dict:
+    def run(self, market: Market, store: PriceStore | None = None) -> dict:
+        regression = self.regress(market, store)
+        if regression is None:
+            return {"market": market.value, "status": "skipped"}
+        return self.persist(regression)
+
+    def regress(self, market: Market, store: PriceStore | None = None) -> FactorRegression | None:
+        """
+        Today's exposures and cross-sectional regression, reading but not
+        writing; None when the market has too few usable stocks.
+        """
         today = date.today()
         rf_rates = load_risk_free_rates(self._conn, [market])
         rf_daily = rf_rates.get(market_to_country(market), 3.0) / 100 / 252
@@ -53,95 +142,83 @@ class FactorModelService:
         stocks = self._load_eligible_stocks(market)
         if len(stocks) < 30:
             logger.warning(f"[FactorModel] {market.value}: only {len(stocks)} eligible stocks, skipping")
-            return {"market": market.value, "status": "skipped", "reason": "insufficient_stocks"}
+            return None
 
         stock_ids = np.array([s[0] for s in stocks])
-        sectors = pd.Series({s[0]: s[2] for s in stocks})
+        codes, industry_names = sector_codes(np.array([s[2] for s in stocks], dtype=object))
 
         # 2. price features
-        if price_map is None:
-            price_map = self._price_repo.get_prices_by_market(market, limit_per_stock=_PRICE_LIMIT)
-        close_series, returns_today, returns_252, returns_21, ewm_vol = (
-            self._compute_price_features(stock_ids, price_map)
+        if store is None:
+            store = self._price_repo.get_prices_by_market(market, limit_per_stock=PRICE_LIMIT)
+        close, returns_today, returns_252, returns_21, ewm_vol = (
+            compute_price_features(stock_ids, store)
         )
 
         # 3. fundamentals
         shares, pbr, roe, opm, debt = self._load_fundamentals(stock_ids)
 
         # 4. exposures
-        style_exp, industry_dummies = compute_exposures(
-            stock_ids, close_series, shares, pbr, roe, opm, debt,
-            returns_252, returns_21, ewm_vol, sectors,
+        style_exp = compute_exposures(
+            shares * close, pbr, roe, opm, debt, returns_252, returns_21, ewm_vol,
         )
 
         # 5. cross-sectional regression
-        X_df = build_design_matrix(style_exp, industry_dummies)
-        valid_ids = X_df.index.values
-        excess_returns = returns_today.reindex(valid_ids) - rf_daily
-        valid_mask = excess_returns.notna()
-        valid_ids = valid_ids[valid_mask.values]
-        if len(valid_ids) < 30:
-            logger.warning(f"[FactorModel] {market.value}: only {len(valid_ids)} valid rows after filter")
-            return {"market": market.value, "status": "skipped", "reason": "insufficient_valid"}
-
-        X_sub = X_df.loc[valid_ids]
-        y = excess_returns.loc[valid_ids].values
-
-        # re-drop zero-variance columns after excess-return filtering
-        zero_cols = X_sub.columns[(X_sub == 0).all()]
-        if len(zero_cols) > 0:
-            X_sub = X_sub.drop(columns=zero_cols)
-
-        X = X_sub.values
-        factor_names = list(X_sub.columns)
-        style_set = set(STYLE_FACTORS)
-        n_styles = sum(1 for c in factor_names if c in style_set)
-        industry_cols = [c for c in factor_names if c != "market" and c not in style_set]
-
-        mcap = shares.reindex(valid_ids).fillna(0) * close_series.reindex(valid_ids).fillna(0)
-        w = np.sqrt(mcap.values.astype(float).clip(min=0))
+        excess_returns = returns_today - rf_daily
+        valid = ~np.isnan(style_exp).any(axis=1) & ~np.isnan(excess_returns)
+        if valid.sum() < 30:
+            logger.warning(f"[FactorModel] {market.value}: only {valid.sum()} valid rows after filter")
+            return None
+
+        X, factor_names, n_styles, industries = build_design_matrix(
+            style_exp[valid], codes[valid], industry_names,
+        )
+        y = excess_returns[valid]
+
+        mcap = np.nan_to_num(shares[valid]) * np.nan_to_num(close[valid])
+        w = np.sqrt(mcap.clip(min=0))
         w = np.where(np.isnan(w) | (w == 0), 1.0, w)
 
-        industry_mcap = np.array([
-            mcap.reindex(valid_ids)[sectors.reindex(valid_ids) == col].sum()
-            for col in industry_cols
-        ], dtype=float)
+        valid_codes = codes[valid]
+        classified = valid_codes >= 0
+        industry_mcap = np.bincount(
+            valid_codes[classified], weights=mcap[classified], minlength=len(industry_names),
+        )[industries]
         total_mcap = industry_mcap.sum()
         industry_mcap_weights = (
             industry_mcap / total_mcap if total_mcap > 0
-            else np.ones(len(industry_cols)) / max(len(industry_cols), 1)
+            else np.ones(len(industries)) / max(len(industries), 1)
         )
 
-        factor_ret, _ = constrained_wls(y, X, w, industry_mcap_weights, n_styles)
-
-        # 6. save exposures
-        exp_rows = []
-        for sid in stock_ids:
-            row_data = style_exp.loc[sid] if sid in style_exp.index else pd.Series(dtype=float)
-            if row_data.isna().all():
-                continue
-            exp_rows.append((
-                int(sid), today,
-                self._to_db(row_data.get("size")),
-                self._to_db(row_data.get("value")),
-                self._to_db(row_data.get("momentum")),
-                self._to_db(row_data.get("volatility")),
-                self._to_db(row_data.get("quality")),
-                self._to_db(row_data.get("leverage")),
-            ))
+        factor_ret, specific_ret = constrained_wls(y, X, w, industry_mcap_weights, n_styles)
+
+        specific = np.full(len(stock_ids), np.nan)
+        specific[valid] = specific_ret
+        return FactorRegression(market, today, stock_ids, style_exp, specific, factor_names, factor_ret)
+
+    def persist(self, regression: FactorRegression) -> dict:
+        """Store a regression and bring the covariance and risk snapshot up to date; no commit."""
+        market, today = regression.market, regression.date
+        regressed = ~np.isnan(regression.specific)
+
+        # 6. save exposures + specific returns
+        exp_rows = exposure_rows(regression.stock_ids, today, regression.style_exp, regression.specific)
         self._factor_repo.upsert_exposures(exp_rows)
+        self.update_specific_risk(regression.stock_ids[regressed], today, regression.specific[regressed])
 
         # 7. save factor returns
         fr_rows = [
-            (market.value, today, factor_names[i], float(factor_ret[i]))
-            for i in range(len(factor_names))
+            (market.value, today, name, float(value))
+            for name, value in zip(regression.factor_names, regression.factor_returns)
         ]
         self._factor_repo.upsert_factor_returns(fr_rows)
 
         # 8. covariance (if enough history)
         n_dates = self._factor_repo.count_factor_return_dates(market)
-        if n_dates >= _MIN_COVARIANCE_DAYS:
-            self._update_covariance(market, today)
+        if n_dates >= MIN_COVARIANCE_DAYS:
+            self.update_covariance(market, today)
+
+        # 9. portfolio risk snapshot
+        self.publish_risk_snapshot(market)
 
         logger.info(
             f"[FactorModel] {market.value}: exposures={len(exp_rows)}, "
@@ -158,48 +235,145 @@ class FactorModelService:
         Load stored covariance + exposures → compute factor betas.
         Returns empty dict if < 90 days history (ols_beta used as fallback).
         """
-        cov_data = self._factor_repo.get_latest_covariance(market)
-        if cov_data is None:
+        cov = load_factor_covariance(self._conn, market)
+        if cov is None:
             return {}
 
-        _, matrix_json = cov_data
-        cov_matrix = np.array(matrix_json)
-
-        exposures = self._factor_repo.get_latest_exposures(market)
-        if not exposures:
+        exposures = self._factor_repo.get_latest_exposure_matrix(market)
+        if exposures is None:
             return {}
 
-        history = self._factor_repo.get_factor_returns_history(market, limit=1)
-        if not history:
-            return {}
-        factor_names = sorted(set(r[1] for r in history))
+        X_m = np.zeros(len(cov.factor_names))
+        if "market" in cov.index:
+            X_m[cov.index["market"]] = 1.0
 
-        if cov_matrix.shape[0] != len(factor_names):
-            return {}
+        rows = exposures.complete()
+        X = build_exposure_matrix(
+            exposures.styles[rows], exposures.sector_codes[rows], exposures.sector_names, cov.factor_names,
+        )
+        return dict(zip(exposures.stock_ids[rows].tolist(), factor_betas(X, X_m, cov.matrix).tolist()))
 
-        sectors = self._stock_repo.get_sectors_by_market(market)
+    def update_specific_risk(self, stock_ids: np.ndarray, dt: date, specific_returns: np.ndarray) -> None:
+        """
+        Advance each stock's running EWM specific variance by its residual
+        on `dt`. Stocks already advanced on or after `dt` are left alone, so
+        a re-run of the same day does not count it twice.
+        """
+        state = {r[0]: r for r in self._factor_repo.get_specific_risk_state(stock_ids.tolist())}
+        fresh = np.array([sid not in state or state[sid][1] < dt for sid in stock_ids.tolist()], dtype=bool)
+        ids = stock_ids[fresh].tolist()
+        n_obs, weight, mean, var = np.array(
+            [state[sid][2:] if sid in state else (0, 0.0, 0.0, 0.0) for sid in ids], dtype=np.float64,
+        ).reshape(len(ids), 4).T
+
+        weight, mean, var = advance_ewm_variance(
+            weight, mean, var, specific_returns[fresh], halflife=_SPECIFIC_HALFLIFE,
+        )
+        self._factor_repo.upsert_specific_risk(_specific_risk_rows(ids, [dt] * len(ids), n_obs + 1, weight, mean, var))
 
-        name_idx = {n: i for i, n in enumerate(factor_names)}
-        X_m = np.zeros(len(factor_names))
-        if "market" in name_idx:
-            X_m[name_idx["market"]] = 1.0
-
-        betas: dict[int, float] = {}
-        for row in exposures:
-            sid = row[0]
-            style_vals = np.array([float(v) if v is not None else np.nan for v in row[1:]])
-            if np.isnan(style_vals).any():
-                continue
-            X_i = build_exposure_vector(style_vals, sectors.get(sid), factor_names)
-            betas[sid] = factor_beta(X_i, X_m, cov_matrix)
-
-        return betas
-
-    def _update_covariance(self, market: Market, today: date) -> None:
-        history = self._factor_repo.get_factor_returns_history(market, limit=252)
+    def rebuild_specific_risk(self, market: Market) -> int:
+        """Recompute every stock's specific variance from its stored specific-return history."""
+        history = self._factor_repo.get_specific_return_history(market)
         if not history:
+            return 0
+        days, sids, values = zip(*history)
+        ids, pos = np.unique(np.array(sids, dtype=np.int64), return_inverse=True)
+        values = np.array(values, dtype=np.float64)
+        ordinals = np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(days))
+
+        weight, mean, var = np.zeros((3, len(ids)))
+        # rows are date-ordered; advance the stocks of each date together
+        bounds = [0, *(np.flatnonzero(np.diff(ordinals)) + 1).tolist(), len(days)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            p = pos[start:end]
+            weight[p], mean[p], var[p] = advance_ewm_variance(
+                weight[p], mean[p], var[p], values[start:end], halflife=_SPECIFIC_HALFLIFE,
+            )
+
+        last_row = np.zeros(len(ids), dtype=np.int64)
+        np.maximum.at(last_row, pos, np.arange(len(pos)))
+        last = [days[i] for i in last_row.tolist()]
+        n_obs = np.bincount(pos, minlength=len(ids))
+        return self._factor_repo.upsert_specific_risk(
+            _specific_risk_rows(ids.tolist(), last, n_obs, weight, mean, var)
+        )
+
+    def publish_risk_snapshot(self, market: Market) -> None:
+        """
+        Publish the latest exposures, covariance and specific variances as
+        one snapshot row, so a portfolio request gathers its stocks from a
+        cached copy instead of scanning the market. Stocks without enough
+        residual history carry the market's median specific variance.
+        """
+        cov = self._factor_repo.get_latest_covariance(market)
+        exposures = self._factor_repo.get_latest_exposure_matrix(market)
+        if cov is None or exposures is None:
             return
 
+        specific = self._factor_repo.get_specific_variances_by_market(market, _MIN_SPECIFIC_OBS)
+        specific_var = np.array([specific.get(sid, np.nan) for sid in exposures.stock_ids.tolist()], dtype=np.float64)
+        known = ~np.isnan(specific_var)
+        specific_var[~known] = np.median(specific_var[known]) if known.any() else 0.0
+
+        self._factor_repo.upsert_risk_snapshot(market, RiskSnapshot(exposures.date, cov, exposures, specific_var))
+        invalidate_risk_snapshot(market)
+        logger.info(
+            f"[FactorModel] {market.value}: risk snapshot {exposures.date} "
+            f"({len(exposures)} stocks, {known.sum()} with specific history)"
+        )
+
+    def update_covariance(self, market: Market, today: date) -> None:
+        """
+        Publish today's covariance over the latest _COVARIANCE_WINDOW factor-return
+        dates. The stored decayed moments are advanced by the dates that
+        entered and left the window since; the window is recomputed from
+        factor_returns when there is no usable state or a rebuild is due.
+        """
+        dates = self._factor_repo.get_factor_return_dates(market, limit=2 * _COVARIANCE_WINDOW)
+        if not dates:
+            return
+
+        state = self._factor_repo.get_covariance_state(market)
+        plan = self._covariance_plan(state, dates, today)
+        if plan is None:
+            state = self._rebuild_covariance_state(market, today)
+            mode = "rebuilt"
+        else:
+            state = self._advance_covariance_state(market, state, dates, *plan)
+            mode = f"advanced +{len(plan[0])}/-{len(plan[1])} dates"
+
+        cov_matrix = covariance_from_moments(
+            (state.weighted_sum, state.weighted_outer), state.window_dates, halflife=_COVARIANCE_HALFLIFE,
+        )
+        self._factor_repo.upsert_covariance(market, FactorCovariance(today, state.factor_names, cov_matrix), state)
+        invalidate_factor_covariance(market)
+        logger.info(
+            f"[FactorModel] {market.value}: covariance {mode} "
+            f"({len(state.factor_names)} factors, {state.window_dates} dates)"
+        )
+
+    @staticmethod
+    def _covariance_plan(
+        state: CovarianceState | None, dates: list[date], today: date,
+    ) -> tuple[list[date], list[date]] | None:
+        """
+        (entering, leaving) dates that move the stored window onto the latest
+        one, or None when it has to be rebuilt: no state, rebuild due, dates
+        were added inside the stored window, or the newest date was re-run
+        (its stored returns may have been overwritten).
+        """
+        if state is None or (today - state.rebuilt_on).days >= _COVARIANCE_REBUILD_DAYS:
+            return None
+        rank = {d: i for i, d in enumerate(dates)}  # newest first, so rank = age
+        end, start = rank.get(state.window_end), rank.get(state.window_start)
+        if not end or start is None or start - end + 1 != state.window_dates:
+            return None
+        old, new = set(dates[end:start + 1]), set(dates[:_COVARIANCE_WINDOW])
+        return sorted(new - old), sorted(old - new)
+
+    def _rebuild_covariance_state(self, market: Market, today: date) -> CovarianceState:
+        history = self._factor_repo.get_factor_returns_history(market, limit=_COVARIANCE_WINDOW)
+
         dates_sorted = sorted(set(r[0] for r in history))
         factor_names = sorted(set(r[1] for r in history))
 
@@ -209,66 +383,62 @@ class FactorModelService:
         for dt, fn, val in history:
             fr_matrix[date_idx[dt], name_idx[fn]] = float(val)
 
-        cov_matrix = ewm_factor_covariance(fr_matrix, halflife=90)
-        self._factor_repo.upsert_covariance(market, today, cov_matrix.tolist())
+        total, outer = ewm_moments(fr_matrix, halflife=_COVARIANCE_HALFLIFE)
+        return CovarianceState(
+            factor_names, dates_sorted[0], dates_sorted[-1], len(dates_sorted), total, outer, today,
+        )
+
+    def _advance_covariance_state(
+        self,
+        market: Market,
+        state: CovarianceState,
+        dates: list[date],
+        entering: list[date],
+        leaving: list[date],
+    ) -> CovarianceState:
+        rows = self._factor_repo.get_factor_returns_on(market, entering + leaving)
+
+        # industries first seen in the entering dates join with zero history,
+        # as they would in a rebuild
+        factor_names = sorted(set(state.factor_names) | {r[1] for r in rows})
+        name_idx = {n: i for i, n in enumerate(factor_names)}
+        old = np.array([name_idx[n] for n in state.factor_names], dtype=np.int64)
+        total = np.zeros(len(factor_names))
+        total[old] = state.weighted_sum
+        outer = np.zeros((len(factor_names), len(factor_names)))
+        outer[np.ix_(old, old)] = state.weighted_outer
+
+        row_of = {d: i for i, d in enumerate(entering + leaving)}
+        fr_matrix = np.zeros((len(row_of), len(factor_names)))
+        for dt, fn, val in rows:
+            fr_matrix[row_of[dt], name_idx[fn]] = float(val)
+
+        rank = {d: i for i, d in enumerate(dates)}
+        total, outer = advance_ewm_moments(
+            (total, outer),
+            steps=rank[state.window_end],
+            entering=fr_matrix[:len(entering)], entering_ages=[rank[d] for d in entering],
+            leaving=fr_matrix[len(entering):], leaving_ages=[rank[d] for d in leaving],
+            halflife=_COVARIANCE_HALFLIFE,
+        )
+        window = dates[:_COVARIANCE_WINDOW]
+        return CovarianceState(
+            factor_names, window[-1], window[0], len(window), total, outer, state.rebuilt_on,
+        )
 
     def _load_eligible_stocks(self, market: Market) -> list[tuple]:
         return self._stock_repo.get_eligible_for_factors(market)
 
-    def _compute_price_features(
-        self, stock_ids: np.ndarray, price_map: dict
-    ) -> tuple[pd.Series, pd.Series, pd.Series, pd.Series, pd.Series]:
-        length_groups: dict[int, tuple[list[int], list[list[float]]]] = {}
-        for sid in stock_ids:
-            prices = price_map.get(int(sid))
-            if not prices or len(prices) < 2:
-                continue
-            closes = [float(p[4]) for p in prices]
-            n = len(closes)
-            if n not in length_groups:
-                length_groups[n] = ([], [])
-            length_groups[n][0].append(sid)
-            length_groups[n][1].append(closes)
-
-        close_dict, ret_today, ret_252, ret_21, vol_dict = {}, {}, {}, {}, {}
-
-        for length, (sids, close_lists) in length_groups.items():
-            arr = np.array(close_lists)
-            sid_arr = np.array(sids)
-
-            close_dict.update(zip(sid_arr, arr[:, -1]))
-            ret_today.update(zip(sid_arr, arr[:, -1] / arr[:, -2] - 1))
-
-            if length >= 252:
-                ret_252.update(zip(sid_arr, arr[:, -1] / arr[:, -252] - 1))
-            if length >= 21:
-                ret_21.update(zip(sid_arr, arr[:, -1] / arr[:, -21] - 1))
-            if length >= 43:
-                rets_df = pd.DataFrame(arr.T).pct_change().iloc[1:]
-                ewm_std = rets_df.ewm(halflife=42).std().iloc[-1].values
-                vol_dict.update(zip(sid_arr, ewm_std))
-
-        return (
-            pd.Series(close_dict), pd.Series(ret_today),
-            pd.Series(ret_252), pd.Series(ret_21), pd.Series(vol_dict),
-        )
-
     def _load_fundamentals(self, stock_ids: np.ndarray):
+        """(shares, pbr, roe, operating margin, debt ratio) aligned on stock_ids, NaN where missing."""
         rows = self._fund_repo.get_with_shares(stock_ids.tolist())
 
-        shares, pbr, roe, opm, debt = {}, {}, {}, {}, {}
+        pos = {sid: i for i, sid in enumerate(stock_ids.tolist())}
+        shares, pbr, roe, opm, debt = np.full((5, len(stock_ids)), np.nan)
         for r in rows:
-            sid = r[0]
-            pbr[sid] = float(r[1]) if r[1] is not None else np.nan
-            roe[sid] = float(r[2]) if r[2] is not None else np.nan
-            opm[sid] = float(r[3]) if r[3] is not None else np.nan
-            debt[sid] = float(r[4]) if r[4] is not None else np.nan
-            shares[sid] = float(r[5]) if r[5] is not None else np.nan
-
-        return pd.Series(shares), pd.Series(pbr), pd.Series(roe), pd.Series(opm), pd.Series(debt)
+            i = pos[r[0]]
+            pbr[i], roe[i], opm[i], debt[i], shares[i] = (
+                float(v) if v is not None else np.nan for v in r[1:6]
+            )
 
-    @staticmethod
-    def _to_db(val) -> float | None:
-        if val is None or (isinstance(val, float) and np.isnan(val)):
-            return None
-        return round(float(val), 4)
+        return shares, pbr, roe, opm, debt
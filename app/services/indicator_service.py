@@ -1,7 +1,12 @@
 import warnings
+from dataclasses import dataclass
+from datetime import date
 
+import numpy as np
 import pandas as pd
 
+from app.quant.indicators import batch, streaming
+from app.quant.indicators.streaming import IndicatorState
 from app.quant.indicators import (
     sma, ema, wma,
     rsi, macd, stochastic,
@@ -11,9 +16,19 @@ from app.quant.indicators import (
     daily_returns, alpha, sharpe_ratio,
 )
 from app.quant.factor_model.beta import ols_beta
+from app.schema import PriceStore
 
 MIN_ROWS = 60
 
+_VALUE_COLUMNS = [
+    "sma_20", "ema_20", "wma_20", "rsi_14",
+    "macd", "macd_signal", "macd_hist", "stoch_k", "stoch_d",
+    "bb_upper", "bb_middle", "bb_lower",
+    "atr_14", "adx_14", "plus_di", "minus_di",
+    "obv", "vma_20", "sar",
+]
+_INT_COLUMNS = {"obv", "vma_20"}
+
 
 def _safe_last(series: pd.Series):
     val = series.iloc[-1]
@@ -25,6 +40,26 @@ def _safe_int_last(series: pd.Series):
     return int(val) if not pd.isna(val) else None
 
 
+def _round_or_none(values: np.ndarray) -> list:
+    return [round(v, 4) if v == v else None for v in values.tolist()]
+
+
+def _int_or_none(values: np.ndarray) -> list:
+    return [int(v) if v == v else None for v in values.tolist()]
+
+
+@dataclass
+class PriceMatrix:
+    """(N, T) OHLCV matrices, right-aligned on each stock's latest bar, NaN-padded left."""
+    stock_ids: list[int]
+    last_dates: list[date]
+    dates: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+
 class IndicatorService:
     @staticmethod
     def build_dataframe(raw_prices: list[tuple]) -> pd.DataFrame | None:
@@ -35,6 +70,23 @@ class IndicatorService:
         df.set_index("date", inplace=True)
         return df
 
+    @staticmethod
+    def build_matrices(store: PriceStore, min_rows: int = MIN_ROWS) -> PriceMatrix | None:
+        pos = np.flatnonzero(store.lengths() >= max(min_rows, 1))
+        if len(pos) == 0:
+            return None
+
+        dates = store.padded("dates", pos).astype(np.int64)
+        return PriceMatrix(
+            stock_ids=store.stock_ids[pos].tolist(),
+            last_dates=[date.fromordinal(d) for d in dates[:, -1].tolist()],
+            dates=dates,
+            high=store.padded("high", pos),
+            low=store.padded("low", pos),
+            close=store.padded("close", pos),
+            volume=np.where(dates > 0, store.padded("volume", pos), np.nan),
+        )
+
     @staticmethod
     def compute(
         stock_id: int,
@@ -79,6 +131,124 @@ class IndicatorService:
             beta_val, alpha_val, sharpe_val,
         )
 
+    @staticmethod
+    def compute_batch(
+        pm: PriceMatrix,
+        benchmark_returns: pd.Series | None,
+        risk_free_rate: float,
+        factor_betas: dict[int, float] | None = None,
+    ) -> list[tuple]:
+        """Columnar equivalent of compute() for every stock in the matrix at once."""
+        high, low, close, volume = pm.high, pm.low, pm.close, pm.volume
+
+        macd_line, signal_line, histogram = batch.macd_last(close)
+        k, d = batch.stochastic_last(high, low, close)
+        bb_u, bb_m, bb_l = batch.bollinger_last(close)
+        p_di, m_di, adx_val = batch.adx_last(high, low, close)
+
+        values = {
+            "sma_20": batch.sma_last(close),
+            "ema_20": batch.ema_last(close),
+            "wma_20": batch.wma_last(close),
+            "rsi_14": batch.rsi_last(close),
+            "macd": macd_line,
+            "macd_signal": signal_line,
+            "macd_hist": histogram,
+            "stoch_k": k,
+            "stoch_d": d,
+            "bb_upper": bb_u,
+            "bb_middle": bb_m,
+            "bb_lower": bb_l,
+            "atr_14": batch.atr_last(high, low, close),
+            "adx_14": adx_val,
+            "plus_di": p_di,
+            "minus_di": m_di,
+            "obv": batch.obv_last(close, volume),
+            "vma_20": batch.vma_last(volume),
+            "sar": batch.parabolic_sar_last(high, low),
+        }
+        return IndicatorService._assemble_rows(
+            pm.stock_ids, pm.last_dates, pm.dates, close, values,
+            benchmark_returns, risk_free_rate, factor_betas or {},
+        )
+
+    @staticmethod
+    def compute_from_state(
+        state: IndicatorState,
+        benchmark_returns: pd.Series | None,
+        risk_free_rate: float,
+        factor_betas: dict[int, float] | None = None,
+    ) -> list[tuple]:
+        """Same rows as compute_batch(), read off streaming state instead of history."""
+        keep = np.flatnonzero((state.dates != 0).sum(axis=1) >= MIN_ROWS)
+        if len(keep) == 0:
+            return []
+        st = state.take(keep)
+        values = streaming.latest(st)
+        return IndicatorService._assemble_rows(
+            st.stock_ids.tolist(),
+            [date.fromordinal(d) for d in st.last_dates().tolist()],
+            st.dates, st.close, values,
+            benchmark_returns, risk_free_rate, factor_betas or {},
+        )
+
+    @staticmethod
+    def _assemble_rows(
+        stock_ids: list[int],
+        last_dates: list[date],
+        dates: np.ndarray,
+        close: np.ndarray,
+        values: dict[str, np.ndarray],
+        benchmark_returns: pd.Series | None,
+        risk_free_rate: float,
+        factor_betas: dict[int, float],
+    ) -> list[tuple]:
+        columns = [
+            _int_or_none(values[name]) if name in _INT_COLUMNS else _round_or_none(values[name])
+            for name in _VALUE_COLUMNS
+        ]
+        columns.extend(IndicatorService._compute_risk_batch(
+            stock_ids, dates, close, benchmark_returns, risk_free_rate, factor_betas,
+        ))
+        return [
+            (sid, dt, *row)
+            for sid, dt, row in zip(stock_ids, last_dates, zip(*columns))
+        ]
+
+    @staticmethod
+    def _compute_risk_batch(
+        stock_ids: list[int],
+        dates: np.ndarray,
+        close: np.ndarray,
+        benchmark_ret: pd.Series | None,
+        rf_rate: float,
+        factor_betas: dict[int, float],
+    ) -> tuple[list, list, list]:
+        N = len(stock_ids)
+        stock_ret = batch.daily_returns(close)
+        eligible = (~np.isnan(stock_ret)).sum(axis=1) >= MIN_ROWS
+
+        sharpe_val = batch.sharpe_ratio(stock_ret, rf_rate)
+        sharpe_out = [round(v, 4) if ok else None for v, ok in zip(sharpe_val.tolist(), eligible)]
+
+        if benchmark_ret is None:
+            return [None] * N, [None] * N, sharpe_out
+
+        bench = benchmark_ret.sort_index()
+        bench_dates = np.array([d.toordinal() for d in bench.index], dtype=np.int64)
+        market_ret = batch.align_benchmark(dates, bench_dates, bench.values.astype(float))
+
+        ols = batch.ols_beta(stock_ret, market_ret).tolist()
+        beta_out = [
+            round(factor_betas[sid], 4) if sid in factor_betas else round(b, 4)
+            for sid, b in zip(stock_ids, ols)
+        ]
+        alpha_val = batch.alpha(stock_ret, market_ret, rf_rate, np.array(beta_out, dtype=float))
+
+        beta_out = [b if ok else None for b, ok in zip(beta_out, eligible)]
+        alpha_out = [round(v, 4) if ok else None for v, ok in zip(alpha_val.tolist(), eligible)]
+        return beta_out, alpha_out, sharpe_out
+
     @staticmethod
     def _compute_risk(
         stock_ret: pd.Series,
@@ -54,6 +54,18 @@ class PortfolioAnalysisService:
                 all_series, stock_ids, weights, bench_prices, benchmark_name),
         }
 
+    @staticmethod
+    def what_if(holdings: list[tuple[int, float]], market_group: str) -> dict:
+        """
+        Factor risk of arbitrary (stock_id, weight) pairs, served from the
+        cached risk snapshots alone: no portfolio lookup, no market scan.
+        """
+        if market_group not in MARKET_GROUP_TO_MARKETS:
+            raise ValueError(f"Unknown market_group: {market_group}")
+        stock_ids, weights = _what_if_weights(holdings)
+        fr = PortfolioAnalysisService._factor_risk(stock_ids, weights, market_group)
+        return fr or {"error": "No factor data for the given stocks"}
+
     # ── sub-analyses (all operate on pre-loaded data) ──
 
     @staticmethod
@@ -94,11 +106,9 @@ class PortfolioAnalysisService:
             "stock_contributions": stock_contributions,
         }
 
-        for m in MARKET_GROUP_TO_MARKETS.get(market_group, []):
-            fr = compute_factor_risk(stock_ids, weights, m)
-            if fr:
-                result["factor_analysis"] = fr
-                break
+        fr = PortfolioAnalysisService._factor_risk(stock_ids, weights, market_group)
+        if fr:
+            result["factor_analysis"] = fr
 
         return result
 
@@ -195,6 +205,14 @@ class PortfolioAnalysisService:
             market_group = repo.get_portfolio_market_group(portfolio_id) or "UNKNOWN"
         return holdings, market_group
 
+    @staticmethod
+    def _factor_risk(stock_ids, weights, market_group) -> dict | None:
+        for m in MARKET_GROUP_TO_MARKETS.get(market_group, []):
+            fr = compute_factor_risk(stock_ids, weights, m)
+            if fr:
+                return fr
+        return None
+
     @staticmethod
     def _compute_weights(holdings) -> tuple[list[int], np.ndarray]:
         stock_ids = [h.stock_id for h in holdings]
@@ -215,6 +233,20 @@ def _benchmark_vol_from_prices(bench_prices, lookback: int) -> float | None:
     return float(np.std(returns, ddof=1) * np.sqrt(252))
 
 
+def _what_if_weights(holdings: list[tuple[int, float]]) -> tuple[list[int], np.ndarray]:
+    """Weights per distinct stock (repeats summed), scaled to sum to 1."""
+    merged: dict[int, float] = {}
+    for sid, w in holdings:
+        merged[sid] = merged.get(sid, 0.0) + w
+    weights = np.array(list(merged.values()), dtype=np.float64)
+    if not len(weights) or not np.isfinite(weights).all():
+        raise ValueError("holdings must be non-empty with finite weights")
+    total = weights.sum()
+    if total <= 0:
+        raise ValueError("holdings weights must sum to a positive value")
+    return list(merged), weights / total
+
+
 def _build_returns_matrix(all_series: dict, stock_ids: list[int]):
     date_sets = [set(all_series.get(sid, {}).keys()) for sid in stock_ids]
     if not date_sets or any(not ds for ds in date_sets):
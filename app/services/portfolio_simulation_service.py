@@ -1,16 +1,22 @@
+import hashlib
 import logging
 import numpy as np
 
 from app.db import get_connection, DailyPriceRepository, PortfolioRepository, StockRepository
 from app.quant.simulation import (
+    SAMPLERS,
     generate_portfolio_bootstrap_paths,
     generate_correlated_gbm_paths,
+    expected_bootstrap_value,
+    expected_gbm_value,
+    replicate_bounds,
     simulation_summary,
 )
 from app.quant.simulation.defaults import (
     DEFAULT_DAYS, DEFAULT_NUM_SIMULATIONS, DEFAULT_CONFIDENCE,
     DEFAULT_LOOKBACK,
 )
+from app.utils import cache_simulation, get_cached_simulation
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +33,27 @@ class PortfolioSimulationService:
         confidence: float = DEFAULT_CONFIDENCE,
         lookback: int = DEFAULT_LOOKBACK,
         method: str = "bootstrap",
+        seed: int | None = None,
+        sampler: str = "pseudo",
+        control_variate: bool = False,
     ) -> dict:
         if method not in METHODS:
             raise ValueError(f"method must be one of {METHODS}")
+        if sampler not in SAMPLERS:
+            raise ValueError(f"sampler must be one of {SAMPLERS}")
 
-        holdings, stock_info = PortfolioSimulationService._load_holdings(portfolio_id)
+        holdings, last_dates = PortfolioSimulationService._load_holdings(portfolio_id)
         if not holdings:
             raise ValueError("Portfolio has no holdings")
 
+        cache_key = (
+            "portfolio", portfolio_id, _holdings_digest(holdings, last_dates),
+            method, days, num_simulations, confidence, lookback, seed, sampler, control_variate,
+        )
+        cached = get_cached_simulation(cache_key)
+        if cached is not None:
+            return cached
+
         stock_ids = [h.stock_id for h in holdings]
         shares_arr = np.array([float(h.shares) for h in holdings])
 
@@ -55,7 +74,9 @@ class PortfolioSimulationService:
         if method == "bootstrap":
             paths = generate_portfolio_bootstrap_paths(
                 active_current, returns_matrix, active_shares, days, num_simulations,
+                seed=seed, sampler=sampler,
             )
+            control_mean = expected_bootstrap_value(active_current, returns_matrix, active_shares, days)
         else:
             log_returns = np.log(1.0 + returns_matrix)
             mu = log_returns.mean(axis=0)
@@ -63,19 +84,26 @@ class PortfolioSimulationService:
             corr = np.corrcoef(returns_matrix.T)
             paths = generate_correlated_gbm_paths(
                 active_current, mu, sigma, corr, active_shares, days, num_simulations,
+                seed=seed, sampler=sampler,
             )
+            control_mean = expected_gbm_value(active_current, mu, active_shares, days)
 
-        stats = simulation_summary(paths, confidence)
+        stats = simulation_summary(
+            paths, confidence,
+            control_mean=control_mean if control_variate else None,
+            replicates=replicate_bounds(num_simulations, sampler),
+        )
         market_group = PortfolioSimulationService._get_market_group(portfolio_id)
         current_value = float((active_current * active_shares).sum())
 
         active_stock_ids = [sid for sid in stock_ids if sid not in excluded]
+        stock_info = PortfolioSimulationService._load_stock_info(list(excluded))
         excluded_info = [
             {"stock_id": sid, "symbol": stock_info.get(sid, {}).get("symbol", "?")}
             for sid in excluded
         ]
 
-        return {
+        result = {
             "target": {
                 "type": "portfolio",
                 "portfolio_id": portfolio_id,
@@ -84,8 +112,11 @@ class PortfolioSimulationService:
                 "current_value": round(current_value, 2),
             },
             "simulation_days": days,
-            "num_simulations": num_simulations,
+            "num_simulations": len(paths),
             "method": method,
+            "seed": seed,
+            "sampler": sampler,
+            "control_variate": control_variate,
             "confidence": confidence,
             "results": {
                 "expected_return": stats["expected_return"],
@@ -93,6 +124,7 @@ class PortfolioSimulationService:
                 "cvar": stats["cvar"],
                 "final_value_percentiles": stats["final_price_percentiles"],
                 "path_percentiles": stats["path_percentiles"],
+                "standard_error": stats["standard_error"],
             },
             "parameters": {
                 "lookback_days": lookback,
@@ -102,19 +134,23 @@ class PortfolioSimulationService:
             "data_coverage": "PARTIAL" if excluded else "FULL",
             "excluded_stocks": excluded_info,
         }
+        cache_simulation(cache_key, result)
+        return result
 
     @staticmethod
     def _load_holdings(portfolio_id: int):
         with get_connection() as conn:
             repo = PortfolioRepository(conn)
             holdings = repo.get_holdings(portfolio_id)
-            stock_repo = StockRepository(conn)
-            stock_info = {}
-            for h in holdings:
-                info = stock_repo.find_by_id(h.stock_id)
-                if info:
-                    stock_info[h.stock_id] = info
-        return holdings, stock_info
+            last_dates = DailyPriceRepository(conn).get_latest_dates([h.stock_id for h in holdings])
+        return holdings, last_dates
+
+    @staticmethod
+    def _load_stock_info(stock_ids: list[int]) -> dict[int, dict]:
+        if not stock_ids:
+            return {}
+        with get_connection() as conn:
+            return StockRepository(conn).find_by_ids(stock_ids)
 
     @staticmethod
     def _build_returns_matrix(stock_ids: list[int], lookback: int):
@@ -167,3 +203,9 @@ class PortfolioSimulationService:
             repo = PortfolioRepository(conn)
             mg = repo.get_portfolio_market_group(portfolio_id)
         return mg or "UNKNOWN"
+
+
+def _holdings_digest(holdings, last_dates: dict) -> str:
+    """Identity of what the simulation reads: each holding's shares and last price date."""
+    parts = [f"{h.stock_id}:{h.shares}:{last_dates.get(h.stock_id)}" for h in holdings]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
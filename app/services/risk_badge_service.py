@@ -9,6 +9,7 @@ from app.db.repositories.factor import FactorRepository
 from app.db.repositories.fundamental import FundamentalRepository
 from app.db.repositories.indicator import IndicatorRepository
 from app.db.repositories.risk_badge import RiskBadgeRepository
+from app.quant.factor_model.exposure import STYLE_FACTORS
 from app.quant.risk_badge import (
     dimension_company_health as company_health,
     composite_badge as composite,
@@ -22,6 +23,8 @@ from app.schema import Market
 
 logger = logging.getLogger(__name__)
 
+_VOLATILITY = STYLE_FACTORS.index("volatility")
+
 
 class RiskBadgeService:
     def __init__(self, conn: connection):
@@ -51,7 +54,8 @@ class RiskBadgeService:
         if indicators is None:
             indicators = self._ind_repo.get_all_by_market(market)
         fundamentals = self._fund_repo.get_all_by_market(market)
-        exposures = self._factor_repo.get_all_exposures_by_market(market)
+        exposures = self._factor_repo.get_latest_exposure_matrix(market)
+        vol_by_stock = exposures.style_by_stock(_VOLATILITY) if exposures is not None else {}
         sector_aggs = self._factor_repo.get_all_sector_aggregates(market)
 
         mkt_agg = _compute_market_aggregate(fundamentals)
@@ -59,7 +63,7 @@ class RiskBadgeService:
         results = []
         for stock_id, ind in indicators.items():
             fund = fundamentals.get(stock_id)
-            vol_z = exposures.get(stock_id)
+            vol_z = vol_by_stock.get(stock_id)
             sector = (fund or ind).get("sector")
             sec_agg = sector_aggs.get(sector) if sector else None
 
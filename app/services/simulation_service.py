@@ -5,14 +5,18 @@ from app.schema import Market
 from app.quant.simulation import (
     generate_gbm_paths,
     generate_bootstrap_paths,
+    gbm_analytic_summary,
+    gbm_summary,
+    normal_block,
     simulation_summary,
 )
 from app.quant.simulation.defaults import (
     DEFAULT_DAYS, DEFAULT_NUM_SIMULATIONS, DEFAULT_CONFIDENCE,
     DEFAULT_LOOKBACK,
 )
+from app.utils import cache_simulation, get_cached_simulation
 
-METHODS = {"gbm", "bootstrap"}
+METHODS = {"gbm", "bootstrap", "analytic"}
 MIN_DATA_POINTS = 60
 
 
@@ -26,12 +30,22 @@ class SimulationService:
         confidence: float = DEFAULT_CONFIDENCE,
         lookback: int = DEFAULT_LOOKBACK,
         method: str = "gbm",
+        seed: int | None = None,
     ) -> dict:
         if method not in METHODS:
             raise ValueError(f"method must be one of {METHODS}")
+        if method == "analytic":
+            num_simulations, seed = 0, None  # closed form: nothing is sampled
 
-        stock, prices = SimulationService._load_data(symbol, market, lookback)
+        stock, last_date = SimulationService._load_stock(symbol, market)
         stock_id, _, name, _ = stock
+
+        cache_key = ("stock", stock_id, method, days, num_simulations, confidence, lookback, seed, last_date)
+        cached = get_cached_simulation(cache_key)
+        if cached is not None:
+            return cached
+
+        prices = SimulationService._load_prices(stock_id, lookback)
         close_prices = np.array([float(p.close) for p in prices])
 
         if len(close_prices) < MIN_DATA_POINTS:
@@ -42,27 +56,34 @@ class SimulationService:
         current_price = float(close_prices[0])  # prices are DESC ordered
         returns = SimulationService._compute_log_returns(close_prices)
 
-        if method == "gbm":
+        if method == "analytic":
             mu, sigma = SimulationService._estimate_gbm_params(returns)
-            paths = generate_gbm_paths(
-                current_price, mu, sigma, days, num_simulations
-            )
+            stats = gbm_analytic_summary(current_price, mu, sigma, days, confidence)
+        elif method == "gbm":
+            mu, sigma = SimulationService._estimate_gbm_params(returns)
+            if seed is not None:
+                # common random numbers: priced straight off the shared block
+                block = normal_block(seed, num_simulations, days)
+                stats = gbm_summary(current_price, mu, sigma, block, confidence)
+            else:
+                paths = generate_gbm_paths(current_price, mu, sigma, days, num_simulations)
+                stats = simulation_summary(paths, confidence)
         else:
             simple_returns = SimulationService._compute_simple_returns(close_prices)
             paths = generate_bootstrap_paths(
-                current_price, simple_returns, days, num_simulations
+                current_price, simple_returns, days, num_simulations, seed=seed,
             )
             mu, sigma = SimulationService._estimate_gbm_params(returns)
+            stats = simulation_summary(paths, confidence)
 
-        stats = simulation_summary(paths, confidence)
-
-        return {
+        result = {
             "symbol": symbol,
             "name": name,
             "current_price": current_price,
             "simulation_days": days,
             "num_simulations": num_simulations,
             "method": method,
+            "seed": seed,
             "confidence": confidence,
             **stats,
             "parameters": {
@@ -71,20 +92,25 @@ class SimulationService:
                 "lookback_days": len(close_prices),
             },
         }
+        cache_simulation(cache_key, result)
+        return result
 
     @staticmethod
-    def _load_data(symbol: str, market: Market, lookback: int):
+    def _load_stock(symbol: str, market: Market):
         with get_connection() as conn:
             stock_repo = StockRepository(conn)
             stock = stock_repo.get_by_symbol(symbol, market)
             if stock is None:
                 raise ValueError(f"Stock not found: {symbol}")
 
-            stock_id = stock[0]
-            price_repo = DailyPriceRepository(conn)
-            prices = price_repo.get_prices(stock_id, limit=lookback)
+            last_date = DailyPriceRepository(conn).get_latest_date(stock[0])
+
+        return stock, last_date
 
-        return stock, prices
+    @staticmethod
+    def _load_prices(stock_id: int, lookback: int):
+        with get_connection() as conn:
+            return DailyPriceRepository(conn).get_prices(stock_id, limit=lookback)
 
     @staticmethod
     def _compute_log_returns(close_prices: np.ndarray) -> np.ndarray:
@@ -2,7 +2,11 @@ from .system import (
     APIError, NotFoundError, InsufficientDataError,
     register_error_handlers, retry_with_backoff, setup_logging,
 )
-from .quant import load_benchmark_returns, load_risk_free_rates
+from .quant import (
+    cache_simulation, cached_risk_snapshot, get_cached_simulation,
+    invalidate_factor_covariance, invalidate_risk_snapshot,
+    load_benchmark_returns, load_factor_covariance, load_risk_free_rates, load_risk_snapshot,
+)
 
 __all__ = [
     "APIError",
@@ -11,6 +15,13 @@ __all__ = [
     "register_error_handlers",
     "retry_with_backoff",
     "setup_logging",
+    "cache_simulation",
+    "cached_risk_snapshot",
+    "get_cached_simulation",
+    "invalidate_factor_covariance",
+    "invalidate_risk_snapshot",
     "load_benchmark_returns",
+    "load_factor_covariance",
     "load_risk_free_rates",
+    "load_risk_snapshot",
 ]
@@ -1,3 +1,22 @@
-from .market_reference_data import load_benchmark_returns, load_risk_free_rates
+from .market_reference_data import (
+    cached_risk_snapshot,
+    invalidate_factor_covariance,
+    invalidate_risk_snapshot,
+    load_benchmark_returns,
+    load_factor_covariance,
+    load_risk_free_rates,
+    load_risk_snapshot,
+)
+from .simulation_cache import cache_simulation, get_cached_simulation
 
-__all__ = ["load_benchmark_returns", "load_risk_free_rates"]
+__all__ = [
+    "cache_simulation",
+    "cached_risk_snapshot",
+    "get_cached_simulation",
+    "invalidate_factor_covariance",
+    "invalidate_risk_snapshot",
+    "load_benchmark_returns",
+    "load_factor_covariance",
+    "load_risk_free_rates",
+    "load_risk_snapshot",
+]
@@ -1,16 +1,29 @@
 import logging
+import os
+import threading
+import time
 from decimal import Decimal
 
 import pandas as pd
 from psycopg2.extensions import connection
 
-from app.db import BenchmarkRepository, RiskFreeRateRepository
-from app.schema import Market, Benchmark, Country, Maturity
+from app.db import BenchmarkRepository, FactorRepository, RiskFreeRateRepository
+from app.schema import Market, Benchmark, Country, FactorCovariance, Maturity, RiskSnapshot
 from app.schema.enums.market import market_to_benchmark, market_to_country
 from app.quant.indicators import daily_returns
 
 logger = logging.getLogger(__name__)
 
+# seconds a cached covariance is served before checking for a newer date
+_COVARIANCE_RECHECK = float(os.getenv("FACTOR_COVARIANCE_RECHECK_SECONDS", "300"))
+
+_SNAPSHOT_RECHECK = float(os.getenv("RISK_SNAPSHOT_RECHECK_SECONDS", "300"))
+
+# market → (value, monotonic time it was last confirmed latest, its (date, updated_at) version)
+_covariances: dict[Market, tuple[FactorCovariance, float, tuple]] = {}
+_snapshots: dict[Market, tuple[RiskSnapshot, float, tuple]] = {}
+_cache_lock = threading.Lock()
+
 
 def load_benchmark_returns(
     conn: connection, markets: list[Market], limit: int = 300
@@ -54,3 +67,85 @@ def load_risk_free_rates(
             result[country] = default
 
     return result
+
+
+def load_factor_covariance(conn: connection, market: Market) -> FactorCovariance | None:
+    """
+    Latest published factor covariance, cached for the whole process.
+
+    A cached entry is served as-is for FACTOR_COVARIANCE_RECHECK_SECONDS, then
+    one version probe decides whether it is still the latest; the matrix
+    itself is only fetched again when it has been republished. The version
+    is the row's updated_at, so a same-day republish (a backfill or a rerun
+    from another process) is picked up too.
+    """
+    repo = FactorRepository(conn)
+    return _load_latest(
+        _covariances, market, _COVARIANCE_RECHECK,
+        repo.get_latest_covariance_version, repo.get_latest_covariance,
+    )
+
+
+def invalidate_factor_covariance(market: Market) -> None:
+    """Drop the cached covariance after publishing a new one from this process."""
+    with _cache_lock:
+        _covariances.pop(market, None)
+
+
+def load_risk_snapshot(conn: connection, market: Market) -> RiskSnapshot | None:
+    """
+    The market's published risk snapshot, cached for the whole process the
+    same way as load_factor_covariance (RISK_SNAPSHOT_RECHECK_SECONDS).
+    """
+    repo = FactorRepository(conn)
+    return _load_latest(
+        _snapshots, market, _SNAPSHOT_RECHECK, repo.get_risk_snapshot_version, repo.get_risk_snapshot,
+    )
+
+
+def cached_risk_snapshot(market: Market) -> RiskSnapshot | None:
+    """
+    The cached snapshot while it is within its recheck window, else None;
+    never touches the database. Fall back to load_risk_snapshot on None.
+    """
+    return _peek(_snapshots, market, _SNAPSHOT_RECHECK)
+
+
+def invalidate_risk_snapshot(market: Market) -> None:
+    """Drop the cached snapshot after publishing a new one from this process."""
+    with _cache_lock:
+        _snapshots.pop(market, None)
+
+
+def _load_latest(cache: dict, market: Market, recheck: float, probe_version, fetch):
+    """Serve cache[market] for `recheck` seconds, then refetch only if probe_version moved."""
+    fresh = _peek(cache, market, recheck)
+    if fresh is not None:
+        return fresh
+
+    now = time.monotonic()
+    with _cache_lock:
+        cached = cache.get(market)
+
+    # probed before fetching: a publish in between only costs one extra fetch next time
+    version = probe_version(market)
+    if version is None:
+        return None
+    version = tuple(version)
+    if cached is not None and version == cached[2]:
+        value = cached[0]
+    else:
+        value = fetch(market)
+        if value is None:
+            return None
+    with _cache_lock:
+        cache[market] = (value, now, version)
+    return value
+
+
+def _peek(cache: dict, market: Market, recheck: float):
+    with _cache_lock:
+        cached = cache.get(market)
+    if cached is not None and time.monotonic() - cached[1] < recheck:
+        return cached[0]
+    return None
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# serialized bytes of results one worker keeps in memory
+_MEMORY_BYTES = int(float(os.getenv("SIMULATION_CACHE_MB", "64")) * 2 ** 20)
+
+# optional directory shared by every worker on the host; unset = memory only
+_DISK_DIR = os.getenv("SIMULATION_CACHE_DIR")
+_DISK_TTL = 24 * 3600
+_DISK_PRUNE_INTERVAL = 3600
+
+# digest → serialized result, least recently used first
+_entries: OrderedDict[str, bytes] = OrderedDict()
+_size = 0
+_last_prune = 0.0
+_lock = threading.Lock()
+
+
+def get_cached_simulation(key: tuple) -> dict | None:
+    """
+    A stored simulation result for key, else None. The key must carry
+    everything the result depends on, including the last price date, so a
+    newer daily_prices date simply stops matching the old entries.
+    """
+    digest = _digest(key)
+    with _lock:
+        data = _entries.get(digest)
+        if data is not None:
+            _entries.move_to_end(digest)
+    if data is None and _DISK_DIR:
+        data = _read_disk(digest)
+        if data is not None:
+            _remember(digest, data)
+    return json.loads(data) if data is not None else None
+
+
+def cache_simulation(key: tuple, result: dict) -> None:
+    digest = _digest(key)
+    data = json.dumps(result, separators=(",", ":")).encode()
+    _remember(digest, data)
+    if _DISK_DIR:
+        _write_disk(digest, data)
+
+
+def _digest(key: tuple) -> str:
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+def _remember(digest: str, data: bytes) -> None:
+    global _size
+    if len(data) > _MEMORY_BYTES:
+        return
+    with _lock:
+        old = _entries.pop(digest, None)
+        if old is not None:
+            _size -= len(old)
+        _entries[digest] = data
+        _size += len(data)
+        while _size > _MEMORY_BYTES:
+            _, evicted = _entries.popitem(last=False)
+            _size -= len(evicted)
+
+
+# ── disk store ──
+
+def _read_disk(digest: str) -> bytes | None:
+    try:
+        return (Path(_DISK_DIR) / f"{digest}.json").read_bytes()
+    except OSError:
+        return None
+
+
+def _write_disk(digest: str, data: bytes) -> None:
+    directory = Path(_DISK_DIR)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, directory / f"{digest}.json")
+    except OSError as e:
+        logger.warning(f"[SimulationCache] Disk write failed: {e}")
+        return
+    _prune_disk(directory)
+
+
+def _prune_disk(directory: Path) -> None:
+    """Entries of past price dates are never hit again; drop them by age."""
+    global _last_prune
+    now = time.time()
+    with _lock:
+        if now - _last_prune < _DISK_PRUNE_INTERVAL:
+            return
+        _last_prune = now
+    for path in directory.iterdir():
+        try:
+            if now - path.stat().st_mtime > _DISK_TTL:
+                path.unlink()
+        except OSError:
+            pass
@@ -152,8 +152,25 @@ create index if not exists risk_free_rates_country_maturity_date_idx
 create index if not exists risk_free_rates_date_idx
   on public.risk_free_rates (date desc);
 
+-- One list partition per market, swapped in whole by the daily publish;
+-- the replaced partition is kept as stock_indicators_<market>_prev.
+-- Migration: the table used to be a plain one, and create table if not exists
+-- below leaves that in place. It only holds the latest snapshot, so the plain
+-- table is dropped here and recreated partitioned; the next pipeline run
+-- refills it. Until then the pipeline publishes with replace instead of swap.
+do $$
+begin
+  if to_regclass('public.stock_indicators') is not null and not exists (
+    select 1 from pg_partitioned_table
+    where partrelid = 'public.stock_indicators'::regclass
+  ) then
+    drop table public.stock_indicators;
+  end if;
+end $$;
+
 create table if not exists public.stock_indicators (
   stock_id   bigint not null references public.stocks(id) on delete cascade,
+  market     public.market_type not null,
   date       date not null,
   sma_20     numeric(15,4),
   ema_20     numeric(15,4),
@@ -179,14 +196,54 @@ create table if not exists public.stock_indicators (
   sharpe     numeric(8,4),
   created_at timestamptz not null default now(),
   constraint stock_indicators_pkey
-    primary key (stock_id, date)
-);
+    primary key (stock_id, date, market)
+) partition by list (market);
+
+create table if not exists public.stock_indicators_kr_kospi
+  partition of public.stock_indicators for values in ('KR_KOSPI');
+create table if not exists public.stock_indicators_kr_kosdaq
+  partition of public.stock_indicators for values in ('KR_KOSDAQ');
+create table if not exists public.stock_indicators_us_nyse
+  partition of public.stock_indicators for values in ('US_NYSE');
+create table if not exists public.stock_indicators_us_nasdaq
+  partition of public.stock_indicators for values in ('US_NASDAQ');
 
 create index if not exists idx_stock_indicators_date
   on public.stock_indicators (date desc);
 create index if not exists idx_stock_indicators_stock_date
   on public.stock_indicators (stock_id, date desc);
 
+-- Streaming indicator state: recursive smoothing values plus the last
+-- 300 (dates/close/volume) and 16 (high/low) bars as little-endian arrays
+create table if not exists public.stock_indicator_state (
+  stock_id      bigint primary key references public.stocks(id) on delete cascade,
+  date          date not null,
+  bars          int not null,
+  ema_20        double precision,
+  macd_fast     double precision,
+  macd_slow     double precision,
+  macd_signal   double precision,
+  avg_gain      double precision,
+  avg_loss      double precision,
+  atr_14        double precision,
+  plus_dm       double precision,
+  minus_dm      double precision,
+  dx            double precision,
+  dx_weight     double precision not null,
+  dx_count      int not null,
+  obv           double precision not null,
+  sar           double precision,
+  sar_ep        double precision,
+  sar_af        double precision not null,
+  sar_uptrend   boolean not null,
+  window_dates  bytea not null,
+  window_close  bytea not null,
+  window_volume bytea not null,
+  window_high   bytea not null,
+  window_low    bytea not null,
+  updated_at    timestamptz not null default now()
+);
+
 create table if not exists public.financial_statements (
   id bigserial primary key,
   stock_id bigint not null references public.stocks(id) on delete cascade,
@@ -243,10 +300,15 @@ create table if not exists public.factor_exposures (
   volatility_z numeric(8,4),
   quality_z numeric(8,4),
   leverage_z numeric(8,4),
+  specific_return numeric(12,8),  -- residual of the day's factor regression
   constraint factor_exposures_pkey
     primary key (stock_id, date)
 );
 
+-- added after the table shipped; create table above is a no-op on existing databases
+alter table public.factor_exposures
+  add column if not exists specific_return numeric(12,8);
+
 create index if not exists idx_factor_exposures_date
   on public.factor_exposures (date desc);
 
@@ -262,14 +324,79 @@ create table if not exists public.factor_returns (
 create index if not exists idx_factor_returns_market_date
   on public.factor_returns (market, date desc);
 
+-- Migration: the matrix used to be stored as jsonb without factor_names, and
+-- create table if not exists below leaves that table in place. Its rows are
+-- derived data the next factor run rebuilds from factor_returns, so the old
+-- table is dropped here and recreated.
+do $$
+begin
+  if exists (
+    select 1 from information_schema.columns
+    where table_schema = 'public' and table_name = 'factor_covariance'
+      and column_name = 'matrix' and data_type = 'jsonb'
+  ) then
+    drop table public.factor_covariance;
+  end if;
+end $$;
+
 create table if not exists public.factor_covariance (
   market public.market_type not null,
   date date not null,
-  matrix jsonb not null,
+  factor_names text[] not null,
+  matrix bytea not null,  -- K×K float64, little-endian, row-major in factor_names order
+  -- decayed window moments the matrix was computed from (see covariance.py)
+  window_start date,
+  window_end date,
+  window_dates int,
+  ewm_sum bytea,
+  ewm_outer bytea,
+  rebuilt_on date,
+  updated_at timestamptz not null default now(),  -- set by every upsert; what the caches probe
   constraint factor_covariance_pkey
     primary key (market, date)
 );
 
+-- added after the table shipped; create table above is a no-op on existing databases.
+-- rows without window moments are rebuilt in full by the next factor run
+alter table public.factor_covariance
+  add column if not exists window_start date,
+  add column if not exists window_end date,
+  add column if not exists window_dates int,
+  add column if not exists ewm_sum bytea,
+  add column if not exists ewm_outer bytea,
+  add column if not exists rebuilt_on date;
+alter table public.factor_covariance
+  add column if not exists updated_at timestamptz not null default now();
+
+-- one row per market: what a portfolio's factor risk reads, published by the factor pipeline.
+-- arrays are little-endian; styles is N×6 row-major in stock_ids order
+create table if not exists public.factor_risk_snapshot (
+  market public.market_type primary key,
+  date date not null,
+  covariance_date date not null,
+  factor_names text[] not null,
+  covariance bytea not null,    -- K×K float64
+  stock_ids bytea not null,     -- N int64, ascending
+  styles bytea not null,        -- N×6 float64 z-scores, NaN where missing
+  sector_codes bytea not null,  -- N int64 into sector_names, -1 for none
+  sector_names text[] not null,
+  specific_var bytea not null,  -- N float64, daily specific variance
+  updated_at timestamptz not null default now()  -- set by every upsert; what the caches probe
+);
+
+alter table public.factor_risk_snapshot
+  add column if not exists updated_at timestamptz not null default now();
+
+-- running EWM (half-life 42) of each stock's specific returns, advanced once per regression date
+create table if not exists public.specific_risk (
+  stock_id    bigint primary key references public.stocks(id) on delete cascade,
+  date        date not null,
+  n_obs       int not null,
+  ewm_weight  double precision not null,
+  ewm_mean    double precision not null,
+  ewm_var     double precision not null
+);
+
 create table if not exists public.sector_aggregates (
   market public.market_type not null,
   sector varchar(100) not null,
@@ -0,0 +1,163 @@
+"""
+팩터 공분산 증분 갱신 동등성 테스트
+
+advance_ewm_moments로 하루씩 창을 옮긴 공분산이 같은 창을 처음부터 다시
+계산한 ewm_factor_covariance와 같은지 검증한다. 창이 가득 찬 뒤 날짜가
+빠져나가는 구간, 중간에 새 산업 팩터가 합류하는 경우, 그리고
+FactorModelService.update_covariance가 재계산으로 넘어가는 경우를 다룬다.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.quant.factor_model.covariance import (
+    advance_ewm_moments,
+    covariance_from_moments,
+    ewm_factor_covariance,
+    ewm_moments,
+)
+from app.schema import Market
+from app.services import factor_model_service
+from app.services.factor_model_service import FactorModelService
+
+WINDOW = 252
+HALFLIFE = 90
+
+
+def assert_cov_equal(actual: np.ndarray, expected: np.ndarray) -> None:
+    np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-15)
+
+
+def test_advance_one_day_at_a_time_matches_recompute():
+    returns = np.random.default_rng(0).normal(0, 0.01, size=(WINDOW + 60, 8))
+    moments = ewm_moments(returns[:1], halflife=HALFLIFE)
+
+    for t in range(1, len(returns)):
+        start = max(0, t + 1 - WINDOW)
+        leaving = returns[t - WINDOW:t - WINDOW + 1] if t >= WINDOW else returns[:0]
+        moments = advance_ewm_moments(
+            moments, steps=1,
+            entering=returns[t:t + 1], entering_ages=[0],
+            leaving=leaving, leaving_ages=[WINDOW] * len(leaving),
+            halflife=HALFLIFE,
+        )
+        window = returns[start:t + 1]
+        assert_cov_equal(
+            covariance_from_moments(moments, len(window), halflife=HALFLIFE),
+            ewm_factor_covariance(window, halflife=HALFLIFE),
+        )
+
+
+def test_advance_several_days_at_once():
+    returns = np.random.default_rng(1).normal(0, 0.01, size=(WINDOW + 10, 5))
+    moments = ewm_moments(returns[:WINDOW], halflife=HALFLIFE)
+
+    steps = 10
+    moments = advance_ewm_moments(
+        moments, steps=steps,
+        entering=returns[WINDOW:], entering_ages=np.arange(steps - 1, -1, -1),
+        leaving=returns[:steps], leaving_ages=np.arange(WINDOW + steps - 1, WINDOW - 1, -1),
+        halflife=HALFLIFE,
+    )
+    assert_cov_equal(
+        covariance_from_moments(moments, WINDOW, halflife=HALFLIFE),
+        ewm_factor_covariance(returns[steps:], halflife=HALFLIFE),
+    )
+
+
+# ── FactorModelService.update_covariance ──
+
+class InMemoryFactorRepository:
+    """The factor_returns / factor_covariance calls update_covariance makes."""
+
+    def __init__(self):
+        self.returns: dict[date, dict[str, float]] = {}
+        self.state = None
+        self.published = None
+        self.rebuilds = 0
+
+    def _rows(self, dates) -> list[tuple]:
+        return [(d, name, value) for d in sorted(dates) for name, value in self.returns[d].items()]
+
+    def get_factor_return_dates(self, market, limit):
+        return sorted(self.returns, reverse=True)[:limit]
+
+    def get_covariance_state(self, market):
+        return self.state
+
+    def get_factor_returns_history(self, market, limit=252):
+        self.rebuilds += 1
+        return self._rows(sorted(self.returns)[-limit:])
+
+    def get_factor_returns_on(self, market, dates):
+        return self._rows(dates)
+
+    def upsert_covariance(self, market, cov, state=None):
+        self.published, self.state = cov, state
+
+
+def expected_covariance(repo: InMemoryFactorRepository, names: list[str]) -> np.ndarray:
+    window = sorted(repo.returns)[-WINDOW:]
+    matrix = np.array([[repo.returns[d].get(n, 0.0) for n in names] for d in window])
+    return ewm_factor_covariance(matrix, halflife=HALFLIFE)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(factor_model_service, "invalidate_factor_covariance", lambda market: None)
+    svc = FactorModelService(None)
+    svc._factor_repo = InMemoryFactorRepository()
+    return svc
+
+
+def daily_returns(rng: np.random.Generator, day: int) -> dict[str, float]:
+    names = ["market", "size", "value", "ind_a", "ind_b"] + (["ind_new"] if day >= 200 else [])
+    return {n: float(v) for n, v in zip(names, rng.normal(0, 0.01, len(names)))}
+
+
+def test_service_advances_across_window_rollover(service, monkeypatch):
+    monkeypatch.setattr(factor_model_service, "_COVARIANCE_REBUILD_DAYS", 10 ** 6)
+    repo = service._factor_repo
+    rng = np.random.default_rng(2)
+    start = date(2025, 1, 1)
+
+    for day in range(WINDOW + 80):
+        today = start + timedelta(days=day)
+        repo.returns[today] = daily_returns(rng, day)
+        service.update_covariance(Market.KR_KOSPI, today)
+        assert_cov_equal(repo.published.matrix, expected_covariance(repo, repo.published.factor_names))
+
+    assert repo.rebuilds == 1
+    assert repo.state.window_dates == WINDOW
+    assert "ind_new" in repo.published.factor_names
+
+
+def test_service_rebuilds_when_due_or_window_changed(service, monkeypatch):
+    monkeypatch.setattr(factor_model_service, "_COVARIANCE_REBUILD_DAYS", 30)
+    repo = service._factor_repo
+    rng = np.random.default_rng(3)
+    start = date(2025, 1, 1)
+
+    for day in range(WINDOW + 20):
+        today = start + timedelta(days=2 * day)  # odd days stay free for the backfill below
+        repo.returns[today] = daily_returns(rng, day)
+        service.update_covariance(Market.KR_KOSPI, today)
+    # one rebuild at the start, then one whenever the last is 30+ days old
+    assert repo.rebuilds == 1 + (2 * (WINDOW + 19)) // 30
+    assert_cov_equal(repo.published.matrix, expected_covariance(repo, repo.published.factor_names))
+
+    monkeypatch.setattr(factor_model_service, "_COVARIANCE_REBUILD_DAYS", 10 ** 6)
+    rebuilds = repo.rebuilds
+
+    # a backfilled date inside the stored window
+    repo.returns[today - timedelta(days=101)] = daily_returns(rng, 0)
+    service.update_covariance(Market.KR_KOSPI, today)
+    assert repo.rebuilds == rebuilds + 1
+    assert_cov_equal(repo.published.matrix, expected_covariance(repo, repo.published.factor_names))
+
+    # the newest date re-run with revised returns
+    repo.returns[today] = daily_returns(rng, 0)
+    service.update_covariance(Market.KR_KOSPI, today)
+    assert repo.rebuilds == rebuilds + 2
+    assert_cov_equal(repo.published.matrix, expected_covariance(repo, repo.published.factor_names))
@@ -0,0 +1,135 @@
+"""
+컬럼형 지표 계산 동등성 테스트
+
+IndicatorService.compute_batch와 스트리밍 상태(from_history / advance)가
+종목별 pandas 구현(IndicatorService.compute)과 같은 행을 내는지 검증한다.
+합성 PriceStore는 종목마다 길이가 달라 행렬의 왼쪽이 NaN으로 채워진다.
+"""
+import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.quant.indicators import streaming
+from app.schema import PriceStore
+from app.services.indicator_service import MIN_ROWS, IndicatorService
+
+LAST_DAY = date(2026, 9, 30).toordinal()
+LENGTHS = [300, 251, 120, MIN_ROWS + 1, MIN_ROWS, MIN_ROWS - 1, 12]
+RF_RATE = 3.0
+FACTOR_BETAS = {2: 1.1}
+
+
+def synthetic_store(lengths: list[int], seed: int = 0) -> PriceStore:
+    """Random-walk OHLCV for stock ids 1..N, each ending on LAST_DAY."""
+    rng = np.random.default_rng(seed)
+    columns = []
+    for stock_id, n in enumerate(lengths, start=1):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        open_ = close * np.exp(rng.normal(0, 0.005, n))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, n)))
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, n)))
+        volume = rng.integers(1_000, 100_000, n)
+        days = np.arange(LAST_DAY - n + 1, LAST_DAY + 1)
+        columns.append((np.full(n, stock_id), days, open_, high, low, close, volume))
+    return PriceStore.from_columns(*(np.concatenate(c) for c in zip(*columns)))
+
+
+def benchmark_returns(days: int = 400) -> pd.Series:
+    index = [date.fromordinal(d) for d in range(LAST_DAY - days + 1, LAST_DAY + 1)]
+    return pd.Series(np.random.default_rng(99).normal(0, 0.01, days), index=index)
+
+
+def pandas_rows(store: PriceStore, bench: pd.Series) -> dict[int, tuple]:
+    rows = {}
+    for stock_id in store.stock_ids.tolist():
+        bars = store.bars(stock_id)
+        raw = [
+            (date.fromordinal(int(d)), o, h, l, c, int(v))
+            for d, o, h, l, c, v in zip(
+                store.dates[bars], store.open[bars], store.high[bars],
+                store.low[bars], store.close[bars], store.volume[bars],
+            )
+        ]
+        df = IndicatorService.build_dataframe(raw)
+        if df is not None:
+            rows[stock_id] = IndicatorService.compute(stock_id, df, bench, RF_RATE, FACTOR_BETAS.get(stock_id))
+    return rows
+
+
+def state_from(store: PriceStore) -> streaming.IndicatorState:
+    pm = IndicatorService.build_matrices(store, min_rows=1)
+    return streaming.from_history(pm.stock_ids, pm.dates, pm.high, pm.low, pm.close, pm.volume)
+
+
+def assert_rows_equal(actual: dict[int, tuple], expected: dict[int, tuple]) -> None:
+    assert sorted(actual) == sorted(expected)
+    for stock_id, row in expected.items():
+        for column, (a, b) in enumerate(zip(actual[stock_id], row)):
+            if isinstance(b, float) and a is not None:
+                # values are rounded to 4 places; allow one step of rounding disagreement
+                assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1.5e-4), (stock_id, column, a, b)
+            else:
+                assert a == b, (stock_id, column, a, b)
+
+
+@pytest.fixture(scope="module")
+def store() -> PriceStore:
+    return synthetic_store(LENGTHS)
+
+
+@pytest.fixture(scope="module")
+def bench() -> pd.Series:
+    return benchmark_returns()
+
+
+@pytest.fixture(scope="module")
+def expected(store, bench) -> dict[int, tuple]:
+    return pandas_rows(store, bench)
+
+
+def test_short_histories_are_skipped(expected):
+    assert sorted(expected) == [i + 1 for i, n in enumerate(LENGTHS) if n >= MIN_ROWS]
+
+
+def test_compute_batch_matches_pandas(store, bench, expected):
+    pm = IndicatorService.build_matrices(store)
+    rows = IndicatorService.compute_batch(pm, bench, RF_RATE, FACTOR_BETAS)
+    assert_rows_equal({r[0]: r for r in rows}, expected)
+
+
+def test_compute_batch_without_benchmark(store, expected):
+    pm = IndicatorService.build_matrices(store)
+    rows = {r[0]: r for r in IndicatorService.compute_batch(pm, None, RF_RATE)}
+    for stock_id, row in expected.items():
+        assert rows[stock_id][-3:-1] == (None, None)
+        assert rows[stock_id][-1] == pytest.approx(row[-1], abs=1.5e-4)
+
+
+def test_state_from_history_matches_pandas(store, bench, expected):
+    rows = IndicatorService.compute_from_state(state_from(store), bench, RF_RATE, FACTOR_BETAS)
+    assert_rows_equal({r[0]: r for r in rows}, expected)
+
+
+@pytest.mark.parametrize("new_bars", [1, 5])
+def test_advanced_state_matches_pandas(store, bench, expected, new_bars):
+    stock_of_bar = np.repeat(store.stock_ids, store.lengths())
+    cutoff = LAST_DAY - new_bars + 1
+    head = store.dates < cutoff
+    state = state_from(PriceStore.from_columns(
+        stock_of_bar[head], store.dates[head], store.open[head], store.high[head],
+        store.low[head], store.close[head], store.volume[head],
+    ))
+
+    for day in range(cutoff, LAST_DAY + 1):
+        bars = np.flatnonzero(store.dates == day)
+        streaming.advance(
+            state, np.searchsorted(state.stock_ids, stock_of_bar[bars]),
+            store.dates[bars].astype(np.int64), store.high[bars], store.low[bars],
+            store.close[bars], store.volume[bars].astype(np.float64),
+        )
+
+    rows = IndicatorService.compute_from_state(state, bench, RF_RATE, FACTOR_BETAS)
+    assert_rows_equal({r[0]: r for r in rows}, expected)
@@ -0,0 +1,63 @@
+"""
+벡터화 Parabolic SAR 동등성 테스트
+
+batch.parabolic_sar가 종목별 루프(trend.parabolic_sar)와 모든 봉에서 같은
+값을 내는지 검증한다. 추세 전환이 여러 번 일어나는 가격과 1~3봉짜리
+짧은 이력을 NaN 패딩된 한 행렬에 섞어 계산한다.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.quant.indicators import batch, parabolic_sar
+
+
+def swinging_prices(n: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """(high, low) of a noisy sine wave, so the trend flips every few dozen bars."""
+    mid = 100 + 10 * np.sin(np.arange(n) * 2 * np.pi / rng.uniform(15, 60)) + np.cumsum(rng.normal(0, 0.5, n))
+    spread = np.abs(rng.normal(0.5, 0.3, n))
+    return mid + spread, mid - spread
+
+
+def padded(rows: list[np.ndarray], width: int) -> np.ndarray:
+    out = np.full((len(rows), width), np.nan)
+    for i, row in enumerate(rows):
+        out[i, width - len(row):] = row
+    return out
+
+
+@pytest.fixture(scope="module")
+def histories() -> list[tuple[np.ndarray, np.ndarray]]:
+    rng = np.random.default_rng(7)
+    lengths = [300, 257, 80, 3, 2, 1]
+    out = [swinging_prices(n, rng) for n in lengths]
+    # flat highs on the first two bars: the initial trend starts down
+    h, l = swinging_prices(40, rng)
+    h[1] = h[0]
+    out.append((h, l))
+    return out
+
+
+def test_matches_per_stock_loop(histories):
+    width = max(len(h) for h, _ in histories)
+    out = batch.parabolic_sar(padded([h for h, _ in histories], width), padded([l for _, l in histories], width))
+
+    for i, (h, l) in enumerate(histories):
+        expected = parabolic_sar(pd.Series(h), pd.Series(l)).to_numpy()
+        row = out[i, width - len(h):]
+        np.testing.assert_allclose(row, expected, rtol=0, atol=1e-12)
+        assert np.isnan(out[i, :width - len(h)]).all()
+
+
+def test_reversals_are_exercised(histories):
+    h, l = histories[0]
+    sar = parabolic_sar(pd.Series(h), pd.Series(l)).to_numpy()
+    above = sar > (h + l) / 2
+    assert np.count_nonzero(above[1:] != above[:-1]) >= 5
+
+
+def test_last_value_per_stock(histories):
+    width = max(len(h) for h, _ in histories)
+    last = batch.parabolic_sar_last(padded([h for h, _ in histories], width), padded([l for _, l in histories], width))
+    expected = [parabolic_sar(pd.Series(h), pd.Series(l)).iloc[-1] for h, l in histories]
+    np.testing.assert_allclose(last, expected, rtol=0, atol=1e-12)
@@ -0,0 +1,86 @@
+"""
+시뮬레이션 청크 크기 불변성 테스트
+
+SIMULATION_CHUNK_MB(chunking._CHUNK_BYTES)를 바꿔도 같은 시드의 경로와
+요약 통계가 바이트 단위로 같은지 검증한다. 단일 종목 GBM·부트스트랩과
+포트폴리오 생성기의 모든 샘플러를 다룬다.
+"""
+import numpy as np
+import pytest
+
+from app.quant.simulation import (
+    SAMPLERS,
+    chunking,
+    generate_bootstrap_paths,
+    generate_correlated_gbm_paths,
+    generate_gbm_paths,
+    generate_portfolio_bootstrap_paths,
+    normal_block,
+    replicate_bounds,
+    simulation_summary,
+)
+
+CHUNK_MB = [0.001, 0.3, 16, 1000]
+DAYS = 60
+SIMS = 3000
+SEED = 42
+
+
+@pytest.fixture(scope="module")
+def market():
+    """(current prices, daily returns (T, n), shares) of a four-stock portfolio."""
+    rng = np.random.default_rng(0)
+    returns = rng.multivariate_normal(
+        [0.0005, 0.0003, 0.0008, 0.0], np.diag([4e-4, 2e-4, 9e-4, 1e-4]) * 0.7 + 5e-5, size=250,
+    )
+    return np.array([70_000.0, 120_000.0, 15_000.0, 450_000.0]), returns, np.array([10.0, 5.0, 40.0, 2.0])
+
+
+def summaries_by_chunk(monkeypatch, simulate) -> list[dict]:
+    out = []
+    for mb in CHUNK_MB:
+        monkeypatch.setattr(chunking, "_CHUNK_BYTES", int(mb * 2 ** 20))
+        normal_block.cache_clear()
+        out.append(simulate())
+    normal_block.cache_clear()
+    return out
+
+
+def assert_all_equal(results: list[dict]) -> None:
+    for result in results[1:]:
+        assert result == results[0]
+
+
+@pytest.mark.parametrize("antithetic", [True, False])
+def test_gbm(monkeypatch, antithetic):
+    assert_all_equal(summaries_by_chunk(monkeypatch, lambda: simulation_summary(
+        generate_gbm_paths(70_000.0, 0.0004, 0.02, DAYS, SIMS, antithetic, seed=SEED),
+    )))
+
+
+def test_bootstrap(monkeypatch, market):
+    _, returns, _ = market
+    assert_all_equal(summaries_by_chunk(monkeypatch, lambda: simulation_summary(
+        generate_bootstrap_paths(70_000.0, returns[:, 0], DAYS, SIMS, seed=SEED),
+    )))
+
+
+@pytest.mark.parametrize("sampler", SAMPLERS)
+def test_portfolio_bootstrap(monkeypatch, market, sampler):
+    prices, returns, shares = market
+    assert_all_equal(summaries_by_chunk(monkeypatch, lambda: simulation_summary(
+        generate_portfolio_bootstrap_paths(prices, returns, shares, DAYS, SIMS, seed=SEED, sampler=sampler),
+        replicates=replicate_bounds(SIMS, sampler),
+    )))
+
+
+@pytest.mark.parametrize("sampler", SAMPLERS)
+def test_correlated_gbm(monkeypatch, market, sampler):
+    prices, returns, shares = market
+    log_returns = np.log1p(returns)
+    mu, sigma = log_returns.mean(axis=0), log_returns.std(axis=0, ddof=1)
+    corr = np.corrcoef(returns.T)
+    assert_all_equal(summaries_by_chunk(monkeypatch, lambda: simulation_summary(
+        generate_correlated_gbm_paths(prices, mu, sigma, corr, shares, DAYS, SIMS, seed=SEED, sampler=sampler),
+        replicates=replicate_bounds(SIMS, sampler),
+    )))
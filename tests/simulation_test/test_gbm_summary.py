@@ -0,0 +1,52 @@
+"""
+GBM 요약 통계 동등성 테스트
+
+gbm_summary가 같은 normal_block으로 만든 경로의 summary()와 정확히 같은
+값을 내는지 검증한다. 한 블록을 여러 종목이 공유하는 경우(공통 난수)도 포함한다.
+gbm_analytic_summary의 닫힌 형태 통계는 큰 시드 Monte Carlo와 허용 오차 안에서 비교한다.
+"""
+import pytest
+
+from app.quant.simulation import (
+    gbm_analytic_summary,
+    gbm_summary,
+    generate_gbm_paths,
+    normal_block,
+    simulation_summary,
+)
+
+SEED = 7
+DAYS = 60
+
+STOCKS = [
+    (70_000.0, 0.0004, 0.02),
+    (1_250.0, -0.001, 0.045),
+    (312.5, 0.0, 0.008),
+]
+
+
+@pytest.mark.parametrize("num_simulations", [1000, 1001])
+@pytest.mark.parametrize("antithetic", [True, False])
+@pytest.mark.parametrize("confidence", [0.95, 0.99])
+def test_matches_summary_of_paths(num_simulations, antithetic, confidence):
+    block = normal_block(SEED, num_simulations, DAYS, antithetic)
+    for price, mu, sigma in STOCKS:
+        paths = generate_gbm_paths(price, mu, sigma, DAYS, num_simulations, antithetic, seed=SEED)
+        assert gbm_summary(price, mu, sigma, block, confidence) == simulation_summary(paths, confidence)
+
+
+@pytest.mark.parametrize("price, mu, sigma", STOCKS)
+def test_analytic_summary_agrees_with_monte_carlo(price, mu, sigma):
+    days, num_simulations = 20, 200_000
+    mc = simulation_summary(generate_gbm_paths(price, mu, sigma, days, num_simulations, seed=SEED))
+    normal_block.cache_clear()
+    analytic = gbm_analytic_summary(price, mu, sigma, days)
+
+    for key in ("expected_return", "var", "cvar"):
+        assert analytic[key] == pytest.approx(mc[key], abs=1e-3), key
+    for level, value in analytic["final_price_percentiles"].items():
+        assert value == pytest.approx(mc["final_price_percentiles"][level], rel=2e-3), level
+    for a_row, mc_row in zip(analytic["path_percentiles"], mc["path_percentiles"], strict=True):
+        assert a_row.keys() == mc_row.keys()
+        for level in a_row.keys() - {"day"}:
+            assert a_row[level] == pytest.approx(mc_row[level], rel=2e-3), (a_row["day"], level)